@@ -0,0 +1,16 @@
+"""Fashion Fatal story engine and tools, usable without Streamlit."""
+
+from .engine import (
+    CLUES,
+    DIFFICULTIES,
+    ENDINGS,
+    ITEMS,
+    RESTART,
+    TITLES,
+    Block,
+    Choice,
+    Difficulty,
+    GameState,
+    StepResult,
+    step,
+)
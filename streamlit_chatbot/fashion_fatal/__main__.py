@@ -0,0 +1,5 @@
+"""``python -m fashion_fatal`` plays the story in a terminal (see ``terminal.py``)."""
+
+from .terminal import main
+
+main()
@@ -0,0 +1,394 @@
+"""Every transition of every session, logged for analysis.
+
+With ``FASHION_FATAL_EVENTS`` set to a folder, the page logs one event per
+played step: session token, time, the scene the button was on and the scene
+and choice it led to, the skill checks rolled and the player's stats after
+the step. ``EventLog.log`` only appends to a list under a lock; a background
+thread wakes every FLUSH_INTERVAL seconds, or as soon as BATCH_SIZE events are
+waiting, and appends them to the open segment as one gzip member of JSON
+lines. A segment is sealed (renamed from ``*.jsonl.gz.open`` to
+``*.jsonl.gz``) once it holds SEGMENT_EVENTS events or is SEGMENT_SECONDS old,
+and when the log is closed. A write that fails (a full disk) is cut back off
+the segment and its events wait for the next flush (see ``writebehind.py``).
+Segments left open by a process that died are sealed by the next EventLog
+started on the folder, up to the last batch written in full.
+
+The funnel reads sealed segments it has not seen yet, one line at a time, and
+folds them into counters kept in a small JSON state file, so running it again
+only reads new segments and memory does not grow with the number of events:
+
+    cd streamlit_chatbot
+    python -m fashion_fatal.analytics funnel events/
+    python -m fashion_fatal.analytics generate events/ --games 100000 # synthetic events to try it on
+
+It reports, per scene, how many players got there and how many left without
+pressing another button, which buttons were pressed, and the skill check pass
+rate of every stat by difficulty.
+"""
+
+import argparse
+import collections
+import gzip
+import itertools
+import json
+import os
+import pathlib
+import random
+import threading
+import time
+import zlib
+
+from . import engine, graph
+from .journal import Journal
+from .writebehind import WriteBehind
+
+FLUSH_INTERVAL = 1.0 # Seconds between background flushes
+BATCH_SIZE = 1024 # Waiting events that trigger an early flush
+SEGMENT_EVENTS = 100_000 # Events per segment before it is sealed
+SEGMENT_SECONDS = 3600 # Age at which a segment is sealed however small
+SEGMENT_SUFFIX = '.jsonl.gz'
+OPEN_SUFFIX = SEGMENT_SUFFIX + '.open' # Still being written; the funnel skips it
+STATE_FILE = 'funnel.json'
+
+
+def transition(session, journal, result):
+    """The event of the step ``journal`` just played, as a JSON-ready dict."""
+    event = journal.events[-1]
+    earlier = itertools.islice(reversed(journal.events), 1, None)
+    before = next((previous.scene for previous in earlier if previous.scene is not None), None)
+    state = event.state
+    case = engine.STORY.case.assess(state)
+    return {
+        'session': session,
+        'time': round(time.time(), 3),
+        'step': event.step,
+        'from': before,
+        'scene': event.scene,
+        'choice': event.choice,
+        'difficulty': state.difficulty,
+        'checks': result.checks,
+        'ending': result.ending,
+        'score': result.score,
+        'stats': {
+            'fashion_score': state.fashion_score,
+            'player_observant': state.player_observant,
+            'social_grace': state.social_grace,
+            'story_progress': state.story_progress,
+            'romance': state.romance,
+            'evidence': dict(case.tallies)['evidence'],
+            'case_points': case.points,
+        },
+    }
+
+
+# --- Writing ---
+class EventLog(WriteBehind):
+    """Write-behind event log in rotating gzip JSONL segments."""
+
+    write_errors = (OSError,)
+
+    def __init__(self, directory, flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE,
+                 segment_events=SEGMENT_EVENTS, segment_seconds=SEGMENT_SECONDS):
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.segment_events = segment_events
+        self.segment_seconds = segment_seconds
+        self._pending = []
+        self._lock = threading.Lock() # Guards _pending only
+        self._segment = None # Path of the open segment
+        self._opened = 0.0
+        self._written = 0 # Events in the open segment
+        self._segments = 0 # Segments started by this log, for unique names
+        self.recovered = seal_abandoned(self.directory, segment_seconds + flush_interval)
+        self._start_writer('event-log-writer', flush_interval)
+
+    def log(self, event):
+        """Queue a JSON-ready event; it reaches the disk with the next flush."""
+        with self._lock:
+            self._pending.append(event)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.wake()
+
+    def flush(self):
+        """Write everything queued so far, and seal the segment if it is full or old enough."""
+        written = super().flush()
+        with self._write_lock:
+            if self._segment is not None and (
+                self._written >= self.segment_events or time.time() - self._opened >= self.segment_seconds
+            ):
+                self._seal()
+        return written
+
+    def _take(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        return batch
+
+    def _write(self, batch):
+        if self._segment is None:
+            self._start_segment()
+        data = ''.join(json.dumps(event, separators=(',', ':')) + '\n' for event in batch)
+        # Each flush is a complete gzip member; gzip readers join them.
+        with open(self._segment, 'ab') as f:
+            end = f.tell()
+            try:
+                f.write(gzip.compress(data.encode(), compresslevel=6))
+                f.flush()
+            except OSError:
+                f.truncate(end) # No half member for the funnel to trip over
+                raise
+        self._written += len(batch)
+
+    def _requeue(self, batch):
+        with self._lock:
+            self._pending[:0] = batch
+
+    def _release(self):
+        if self._segment is not None:
+            self._seal()
+
+    def _start_segment(self):
+        # Names sort by start time, so the funnel reads segments in order.
+        self._segments += 1
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.gmtime())
+        self._segment = self.directory / f'events-{stamp}-{os.getpid()}-{self._segments:05d}{OPEN_SUFFIX}'
+        self._opened = time.time()
+        self._written = 0
+
+    def _seal(self):
+        self._segment.rename(_sealed_name(self._segment))
+        self._segment = None
+
+
+def _sealed_name(path):
+    return path.with_name(path.name[:-len('.open')])
+
+
+def seal_abandoned(directory, max_age=SEGMENT_SECONDS + FLUSH_INTERVAL):
+    """Seal the open segments left in ``directory`` by logs that were never closed.
+
+    A segment is abandoned if the process named in it is gone, or if nothing
+    was written to it for ``max_age`` seconds, by which time a live log would
+    have sealed it itself. A batch cut short by the crash is dropped so the
+    funnel can read the rest. Returns the paths of the sealed segments.
+    """
+    sealed = []
+    for path in sorted(pathlib.Path(directory).glob(f'events-*{OPEN_SUFFIX}')):
+        try:
+            if not _abandoned(path, max_age):
+                continue
+            with open(path, 'r+b') as f:
+                f.truncate(_complete_length(f.read()))
+            path.rename(_sealed_name(path))
+        except FileNotFoundError:
+            continue # Sealed by its own log or another process meanwhile
+        sealed.append(_sealed_name(path))
+    return sealed
+
+
+def _abandoned(path, max_age):
+    if time.time() - path.stat().st_mtime >= max_age:
+        return True
+    if os.name != 'posix':
+        return False # No safe way to ask whether the process is alive
+    try:
+        pid = int(path.name.split('-')[3]) # events-{date}-{time}-{pid}-{n}
+    except (IndexError, ValueError):
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass # Alive, but somebody else's
+    return False
+
+
+def _complete_length(data):
+    """The length of ``data`` up to the end of its last complete gzip member."""
+    end = 0
+    while end < len(data):
+        member = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        try:
+            member.decompress(data[end:])
+        except zlib.error:
+            break
+        if not member.eof:
+            break
+        end = len(data) - len(member.unused_data)
+    return end
+
+
+# --- Funnel ---
+_COUNTERS = ('entered', 'left', 'finished', 'endings', 'picks', 'checks')
+
+
+class Funnel:
+    """Counters over all events read so far. Its size depends on the story, not on the events."""
+
+    def __init__(self):
+        self.segments = [] # Sealed segments already folded in, by name
+        self.events = 0
+        self.starts = 0 # Steps with no scene before them: new or restarted games
+        self.entered = collections.Counter() # scene -> steps that played it
+        self.left = collections.Counter() # scene -> buttons pressed on it
+        self.finished = collections.Counter() # scene -> steps that ended the game there
+        self.endings = collections.Counter() # (difficulty, ending) -> runs
+        self.picks = collections.Counter() # (from scene, to scene, choice) -> times pressed
+        self.checks = collections.Counter() # (difficulty, stat, passed) -> checks
+
+    def add(self, event):
+        self.events += 1
+        before = event['from']
+        if before is None:
+            self.starts += 1
+        else:
+            self.left[before] += 1
+            self.picks[before, event['scene'], event['choice']] += 1
+        self.entered[event['scene']] += 1
+        if event['ending']:
+            self.finished[event['scene']] += 1
+            self.endings[event['difficulty'], event['ending']] += 1
+        for stat, passed in event['checks']:
+            self.checks[event['difficulty'], stat, passed] += 1
+
+    def read(self, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as lines:
+            for line in lines:
+                self.add(json.loads(line))
+        self.segments.append(path.name)
+
+    def update(self, directory):
+        """Fold in the sealed segments of ``directory`` not read before; returns how many were read."""
+        seen = set(self.segments)
+        new = sorted(path for path in pathlib.Path(directory).glob(f'*{SEGMENT_SUFFIX}') if path.name not in seen)
+        for path in new:
+            self.read(path)
+        return len(new)
+
+    def to_json(self):
+        return {
+            'segments': self.segments,
+            'events': self.events,
+            'starts': self.starts,
+            **{name: [[*key, count] if isinstance(key, tuple) else [key, count]
+                      for key, count in getattr(self, name).items()]
+               for name in _COUNTERS},
+        }
+
+    @classmethod
+    def from_json(cls, value):
+        funnel = cls()
+        funnel.segments = value['segments']
+        funnel.events = value['events']
+        funnel.starts = value['starts']
+        for name in _COUNTERS:
+            counter = getattr(funnel, name)
+            for *key, count in value[name]:
+                counter[key[0] if len(key) == 1 else tuple(key)] = count
+        return funnel
+
+
+def load_funnel(path):
+    try:
+        return Funnel.from_json(json.loads(pathlib.Path(path).read_text(encoding='utf-8')))
+    except FileNotFoundError:
+        return Funnel()
+
+
+def save_funnel(funnel, path):
+    partial = pathlib.Path(f'{path}.tmp')
+    partial.write_text(json.dumps(funnel.to_json(), separators=(',', ':')), encoding='utf-8')
+    partial.replace(path)
+
+
+def format_report(funnel, scene_graph, top=5):
+    labels = {(t.scene, t.to, t.choice): t.label for t in scene_graph.transitions}
+    lines = [f'{funnel.events:,} events, {funnel.starts:,} games started, {len(funnel.segments)} segments', '']
+    lines.append(f'{"scene":<24} {"reached":>9} {"went on":>9} {"dropped":>8}')
+    for scene in scene_graph.scenes:
+        reached, went_on = funnel.entered[scene], funnel.left[scene]
+        dropped = max(reached - went_on - funnel.finished[scene], 0)
+        share = f'{dropped / reached:.1%}' if reached else '-'
+        lines.append(f'{scene:<24} {reached:>9,} {went_on:>9,} {share:>8}')
+
+    lines += ['', 'buttons pressed']
+    by_scene = collections.defaultdict(list)
+    for (before, scene, choice), count in funnel.picks.items():
+        by_scene[before].append((count, labels.get((before, scene, choice), f'{scene} / {choice}')))
+    for scene in scene_graph.scenes:
+        picks = sorted(by_scene.get(scene, ()), reverse=True)
+        total = sum(count for count, _ in picks)
+        if total:
+            lines.append(f'  {scene}')
+            lines += [f'    {count / total:6.1%}  {label}' for count, label in picks[:top]]
+
+    lines += ['', 'skill checks passed']
+    rates = collections.defaultdict(lambda: [0, 0])
+    for (difficulty, stat, passed), count in funnel.checks.items():
+        rates[difficulty, stat][0] += count if passed else 0
+        rates[difficulty, stat][1] += count
+    for difficulty in engine.DIFFICULTIES:
+        for (level, stat), (passed, total) in sorted(rates.items()):
+            if level == difficulty:
+                lines.append(f'  {difficulty:<7} {stat:<18} {passed / total:6.1%} of {total:,}')
+
+    if funnel.endings:
+        lines += ['', 'endings']
+        for difficulty in engine.DIFFICULTIES:
+            finished = sum(count for (level, _), count in funnel.endings.items() if level == difficulty)
+            for ending in engine.ENDINGS:
+                count = funnel.endings[difficulty, ending]
+                if count:
+                    lines.append(f'  {difficulty:<7} {ending:<22} {count / finished:6.1%}')
+    return '\n'.join(lines)
+
+
+# --- Synthetic events ---
+def generate(directory, games, seed=0, quit_chance=0.02):
+    """Log ``games`` random playthroughs, some abandoned midway, as the page would."""
+    rng = random.Random(seed)
+    log = EventLog(directory)
+    for index in range(games):
+        journal = Journal(seed=rng.getrandbits(64))
+        session = f'game-{seed}-{index}'
+        journal.amend(difficulty=rng.choice(tuple(engine.DIFFICULTIES)))
+        result = journal.apply('0', engine.STORY.start, None)
+        log.log(transition(session, journal, result))
+        while result.choices and result.choices != (engine.RESTART,) and rng.random() >= quit_chance:
+            picked = rng.choice(result.choices)
+            result = journal.apply(journal.next_step(), picked.scene, picked.choice)
+            log.log(transition(session, journal, result))
+    log.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Event log funnel for Fashion Fatal.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    funnel_parser = commands.add_parser('funnel', help='read new segments and report the funnel')
+    funnel_parser.add_argument('directory', type=pathlib.Path)
+    funnel_parser.add_argument('--state', type=pathlib.Path, help=f'counters kept between runs (default: DIRECTORY/{STATE_FILE})')
+    generator = commands.add_parser('generate', help='log random playthroughs to try the funnel on')
+    generator.add_argument('directory', type=pathlib.Path)
+    generator.add_argument('--games', type=int, default=10_000)
+    generator.add_argument('--seed', default='0')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.command == 'generate':
+        generate(args.directory, args.games, args.seed)
+        print(f'logged {args.games:,} games to {args.directory} in {time.perf_counter() - started:.1f}s')
+        return
+    state = args.state or args.directory / STATE_FILE
+    funnel = load_funnel(state)
+    before = funnel.events
+    read = funnel.update(args.directory)
+    save_funnel(funnel, state)
+    print(format_report(funnel, graph.load_graph()))
+    print(f'\n{read} new segments, {funnel.events - before:,} new events read in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
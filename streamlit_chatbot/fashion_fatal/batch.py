@@ -0,0 +1,480 @@
+"""Vectorized cohorts: simulate many Fashion Fatal players at once with NumPy.
+
+``simulate.py`` steps one player at a time through ``engine.step``, which
+costs a Python-level RNG call per player per check. Here a whole cohort of
+players moves through the story together. Their stats, relationship scores
+and inventory live in NumPy arrays, and skill checks, clue rolls and
+relationship gains are array operations over every player in a scene:
+
+    cd streamlit_chatbot
+    python -m fashion_fatal.batch --players 1000000 --policy investigator
+
+The rules below mirror the scenes in ``story.json`` but skip all the
+narrative text. They only track what can change a later choice or the ending.
+Nothing ties them to the story but ``--check``, which compares the cohort's
+ending shares with the exact probabilities of ``solver.py`` for the same
+policy and fails when any of them is further off than sampling explains:
+
+    python -m fashion_fatal.batch --players 200000 --check
+
+Run it after every change to ``story.json``. Requires NumPy.
+"""
+
+import argparse
+import collections
+import time
+
+import numpy as np
+
+from . import engine
+from .simulate import INVESTIGATOR_WEIGHTS, UNFINISHED
+
+# --- Columns ---
+# Every registry item, plus the clues that a rule tests (tracked like items).
+ITEMS = engine.ITEMS.ids + (
+    'clue:benefactor_letter',
+    'clue:mv_initials',
+    'clue:deciphered_note',
+)
+CHARACTERS = engine.CHARACTERS
+ROMANCES = (None, 'Alex', 'Jordan', 'Taylor')
+FASHION = ('Low', 'Medium', 'High')
+SCENES = tuple(engine.TITLES)
+
+_ITEM = {item: column for column, item in enumerate(ITEMS)}
+_CHARACTER = {name: column for column, name in enumerate(CHARACTERS)}
+_ROMANCE = {name: code for code, name in enumerate(ROMANCES)}
+_SCENE = {scene: code for code, scene in enumerate(SCENES)}
+_LOW, _MEDIUM, _HIGH = range(3)
+
+# Every choice id is turned into a small integer code on first use.
+_CHOICES = [None]
+_CHOICE = {None: 0}
+
+
+def choice_code(choice):
+    if choice not in _CHOICE:
+        _CHOICE[choice] = len(_CHOICES)
+        _CHOICES.append(choice)
+    return _CHOICE[choice]
+
+
+class Cohort:
+    """The state of ``size`` players, one row per player."""
+
+    def __init__(self, size, difficulty, rng):
+        self.rng = rng
+        self.threshold, self.gain, self.clue_chance = engine.DIFFICULTIES[difficulty]
+        self.observant = np.zeros(size, np.int16)
+        self.social = np.zeros(size, np.int16)
+        self.fashion = np.full(size, _MEDIUM, np.int8)
+        self.romance = np.zeros(size, np.int8)
+        self.date_taken = np.zeros(size, bool)
+        self.scores = np.zeros((size, len(CHARACTERS)))
+        self.items = np.zeros((size, len(ITEMS)), bool)
+
+    def has(self, item, rows):
+        return self.items[rows, _ITEM[item]]
+
+    def give(self, item, rows):
+        self.items[rows, _ITEM[item]] = True
+
+    def skill_check(self, stat, rows):
+        # One vectorized randint(1, 5) <= threshold + stat per player.
+        return self.rng.integers(1, 6, size=len(rows)) <= (self.threshold + stat[rows])
+
+    def clue_roll(self, base_chance, rows):
+        return self.rng.random(len(rows)) < (base_chance * self.clue_chance)
+
+    def add_score(self, character, amount, rows):
+        self.scores[rows, _CHARACTER[character]] += amount * self.gain
+
+
+# --- Scenes ---
+# Each handler applies the effects of ``choices`` (one code per row of ``rows``)
+# and returns the options on screen next as [(choice id, scene, available rows mask)].
+def _picked(choices, choice, rows):
+    return rows[choices == choice_code(choice)]
+
+
+def _arrival(c, rows, choices):
+    return [
+        ('mingle_initial', 'pre_challenge_mingling', True),
+        ('observe_initial', 'pre_challenge_mingling', True),
+        ('seek_influential', 'pre_challenge_mingling', True),
+    ]
+
+
+def _pre_challenge_mingling(c, rows, choices):
+    for choice in ('mingle_initial', 'seek_influential'):
+        c.social[_picked(choices, choice, rows)] += 1
+    observed = _picked(choices, 'observe_initial', rows)
+    c.observant[observed] += 1
+    c.give('faded_invitation', observed)
+    c.give('chess_piece', observed)
+    return [
+        ('alex_arrival', 'design_challenge', True),
+        ('jordan_arrival', 'design_challenge', True),
+        ('taylor_arrival', 'design_challenge', True),
+        ('maya_arrival', 'design_challenge', True),
+    ]
+
+
+def _design_challenge(c, rows, choices):
+    for name in ('Alex', 'Jordan', 'Taylor'):
+        picked = _picked(choices, f'{name.lower()}_arrival', rows)
+        c.romance[picked] = _ROMANCE[name]
+        c.add_score(name, 1, picked)
+    c.add_score('Maya', 1, _picked(choices, 'maya_arrival', rows))
+    return [
+        ('creative_design', 'backstage_incident', True),
+        ('spy_rivals', 'backstage_incident', True),
+        ('charm_judges', 'backstage_incident', True),
+        ('investigate_east_wing_early', 'backstage_incident', c.has('faded_invitation', rows)),
+    ]
+
+
+def _backstage_incident(c, rows, choices):
+    c.fashion[_picked(choices, 'creative_design', rows)] = _HIGH
+    spied = _picked(choices, 'spy_rivals', rows)
+    c.observant[spied] += 1
+    c.give('suspicious_photo', spied[c.skill_check(c.observant, spied)])
+    charmed = _picked(choices, 'charm_judges', rows)
+    c.social[charmed] += 1
+    c.fashion[charmed] = _MEDIUM
+    return [
+        ('help_jennifer', 'rooftop_party', True),
+        ('focus_self', 'rooftop_party', True),
+        ('ask_taylor_incident', 'rooftop_party', True),
+        ('confront_blake_sabotage', 'rooftop_party', c.has('suspicious_photo', rows)),
+        ('ask_maya_incident', 'rooftop_party', True),
+    ]
+
+
+def _rooftop_party(c, rows, choices):
+    helped = _picked(choices, 'help_jennifer', rows)
+    c.give('broken_bracelet', helped)
+    c.fashion[helped[c.fashion[helped] == _MEDIUM]] = _HIGH
+    c.add_score('Jennifer', 1, helped)
+    c.add_score('Taylor', 1, _picked(choices, 'ask_taylor_incident', rows))
+    confronted = _picked(choices, 'confront_blake_sabotage', rows)
+    c.add_score('Blake', -1, confronted)
+    c.give('blake_confession', confronted[c.skill_check(c.social, confronted)])
+    asked = _picked(choices, 'ask_maya_incident', rows)
+    c.add_score('Maya', 1, asked)
+    c.give('maya_observation', asked[c.skill_check(c.social, asked)])
+
+    free = ~c.date_taken[rows]
+    options = [
+        (f'romance_interlude_{name.lower()}', 'romance_interlude', free & (c.romance[rows] == _ROMANCE[name]))
+        for name in ('Alex', 'Jordan', 'Taylor')
+    ]
+    return options + [
+        ('talk_alex_party', 'midnight_ball', True),
+        ('approach_jordan_party', 'midnight_ball', True),
+        ('observe_taylor_party', 'midnight_ball', True),
+        ('eavesdrop_party', 'midnight_ball', True),
+        ('talk_maya_party', 'midnight_ball', True),
+    ]
+
+
+# Interlude answer -> (character, relationship change), as in the romance_interlude scene of story.json.
+_INTERLUDE_RESPONSES = {
+    'alex_confess_suspicion': ('Alex', 1),
+    'alex_share_passion': ('Alex', 1),
+    'alex_dodge': ('Alex', -1),
+    'jordan_admit_search': ('Jordan', 1),
+    'jordan_share_story': ('Jordan', 1),
+    'jordan_change_subject': ('Jordan', -1),
+    'taylor_express_fear': ('Taylor', 1),
+    'taylor_ask_history': ('Taylor', 1),
+    'taylor_keep_vague': ('Taylor', -1),
+}
+
+
+def _romance_interlude(c, rows, choices):
+    c.date_taken[rows] = True
+    options = []
+    for name in ('Alex', 'Jordan', 'Taylor'):
+        entered = choices == choice_code(f'romance_interlude_{name.lower()}')
+        c.add_score(name, 2, rows[entered])
+        options += [
+            (response, 'romance_interlude', entered)
+            for response, (character, _) in _INTERLUDE_RESPONSES.items() if character == name
+        ]
+    answered = np.zeros(len(rows), bool)
+    for response, (name, change) in _INTERLUDE_RESPONSES.items():
+        picked = choices == choice_code(response)
+        c.add_score(name, change, rows[picked])
+        answered |= picked
+    return options + [('after_interlude', 'midnight_ball', answered)]
+
+
+def _midnight_ball(c, rows, choices):
+    # Choices made on the rooftop only count if the interlude was skipped.
+    choices = np.where(c.date_taken[rows], 0, choices)
+    jordan = _picked(choices, 'approach_jordan_party', rows)
+    c.add_score('Jordan', 2, jordan)
+    c.give('jordan_map', jordan)
+    taylor = _picked(choices, 'observe_taylor_party', rows)
+    c.add_score('Taylor', 2, taylor)
+    c.give('tarnished_key', taylor)
+    eavesdropped = _picked(choices, 'eavesdrop_party', rows)
+    c.observant[eavesdropped] += 1
+    c.give('gossip_snippet', eavesdropped[c.skill_check(c.observant, eavesdropped)])
+    maya = _picked(choices, 'talk_maya_party', rows)
+    c.add_score('Maya', 1, maya)
+    c.give('cryptic_note', maya[c.skill_check(c.social, maya)])
+
+    leads = ('jordan_map', 'tarnished_key', 'faded_invitation', 'chess_piece', 'cryptic_note')
+    return [
+        ('sneak_vip', 'secret_passage', True),
+        ('observe_marcelline_alex', 'secret_passage', True),
+        ('find_east_wing_clue', 'secret_passage', np.any([c.has(item, rows) for item in leads], axis=0)),
+        ('press_blake', 'secret_passage', c.has('blake_confession', rows)),
+        ('examine_chess_piece', 'secret_passage', c.has('chess_piece', rows)),
+        ('examine_bracelet', 'secret_passage', c.has('broken_bracelet', rows)),
+    ]
+
+
+def _secret_passage(c, rows, choices):
+    alex = c.romance[rows] == _ROMANCE['Alex']
+    sneaked = choices == choice_code('sneak_vip')
+    found = rows[sneaked][c.clue_roll(0.6, rows[sneaked])]
+    c.give('coded_letter', found)
+    c.give('clue:benefactor_letter', found)
+    c.add_score('Alex', 1, rows[sneaked & alex])
+    observed = choices == choice_code('observe_marcelline_alex')
+    c.observant[rows[observed]] += 1
+    c.add_score('Alex', -1, rows[observed & alex])
+    pressed = _picked(choices, 'press_blake', rows)
+    c.add_score('Blake', 1, pressed)
+    c.give('marcelline_ledger', pressed[c.skill_check(c.social, pressed)])
+    c.observant[_picked(choices, 'examine_chess_piece', rows)] += 1
+    bracelet = _picked(choices, 'examine_bracelet', rows)
+    c.observant[bracelet] += 1
+    first_look = bracelet[~c.has('clue:mv_initials', bracelet)]
+    c.give('clue:mv_initials', first_look)
+    c.give('locket_fragment', first_look)
+
+    # Examining an item keeps the player in the passage; the east wing clue opens the study.
+    examined = (choices == choice_code('examine_chess_piece')) | (choices == choice_code('examine_bracelet'))
+    east_wing = choices == choice_code('find_east_wing_clue')
+    leads = ('jordan_map', 'tarnished_key', 'faded_invitation', 'cryptic_note')
+    return [
+        ('enter_study', 'hidden_study', east_wing),
+        ('sneak_vip', 'secret_passage', examined),
+        ('observe_marcelline_alex', 'secret_passage', examined),
+        ('find_east_wing_clue', 'secret_passage', examined & np.any([c.has(item, rows) for item in leads], axis=0)),
+        ('press_blake', 'secret_passage', examined & c.has('blake_confession', rows)),
+        ('general_search_study', 'hidden_study', ~(examined | east_wing)),
+    ]
+
+
+def _hidden_study(c, rows, choices):
+    # The search buttons are drawn before the outcome of this visit is applied.
+    options = [
+        ('find_ledger', 'hidden_study', ~c.has('marcelline_ledger', rows)),
+        ('examine_document', 'hidden_study', ~c.has('ancient_document', rows)),
+        ('decipher_letter_search', 'hidden_study',
+         ~c.has('coded_letter', rows) & ~c.has('clue:benefactor_letter', rows)),
+        ('find_hidden_camera', 'hidden_study', ~c.has('hidden_camera', rows)),
+        ('find_locket_half', 'hidden_study', c.has('locket_fragment', rows)),
+        ('decipher_cryptic_note', 'hidden_study',
+         c.has('cryptic_note', rows) & ~c.has('clue:deciphered_note', rows)),
+        ('leave_study_ready', 'marcelline_trap', True),
+    ]
+
+    c.give('marcelline_ledger', _picked(choices, 'find_ledger', rows))
+    c.give('ancient_document', _picked(choices, 'examine_document', rows))
+    for choice, item in (('decipher_letter_search', 'coded_letter'), ('find_hidden_camera', 'hidden_camera')):
+        searching = _picked(choices, choice, rows)
+        searching = searching[~c.has(item, searching)]
+        c.give(item, searching[c.skill_check(c.observant, searching)])
+    locket = _picked(choices, 'find_locket_half', rows)
+    locket = locket[~c.has('locket_complete', locket) & c.has('locket_fragment', locket)]
+    completed = locket[c.skill_check(c.observant, locket)]
+    c.items[completed, _ITEM['locket_fragment']] = False
+    c.give('locket_complete', completed)
+    c.give('clue:mv_initials', completed)
+    note = _picked(choices, 'decipher_cryptic_note', rows)
+    note = note[c.has('cryptic_note', note) & ~c.has('clue:deciphered_note', note)]
+    deciphered = note[c.skill_check(c.observant, note)]
+    c.give('clue:deciphered_note', deciphered)
+    c.give('garden_dead_drop', deciphered)
+    return options
+
+
+def _marcelline_trap(c, rows, choices):
+    accepted = choices == choice_code('accept_invitation')
+    c.observant[rows[accepted & c.has('locket_complete', rows)]] += 1
+    return [
+        ('accept_invitation', 'marcelline_trap', True),
+        ('avoid_trap_direct_confront', 'confrontation', True),
+        ('feign_loyalty', 'confrontation', accepted),
+        ('bluff_evidence', 'confrontation', accepted),
+        ('refuse_direct_confront', 'confrontation', accepted),
+    ]
+
+
+def _tally_columns(name):
+    # The columns of a tally in the story's "case" table.
+    for tally, items, clues in engine.STORY.case.tallies:
+        if tally == name:
+            return engine.ITEMS.ids_in(items) + [f'clue:{clue}' for clue in engine.CLUES.ids_in(clues)]
+    raise KeyError(name)
+
+
+_EVIDENCE = _tally_columns('evidence')
+_PUBLIC_CHOICES = ('avoid_trap_direct_confront', 'feign_loyalty', 'bluff_evidence', 'refuse_direct_confront')
+
+
+def _confrontation(c, rows, choices):
+    """Return the ending of every row (an index into OUTCOMES)."""
+    evidence = c.items[rows][:, [_ITEM[item] for item in _EVIDENCE]].sum(axis=1).astype(float)
+    feigned = choices == choice_code('feign_loyalty')
+    evidence[feigned] += c.skill_check(c.social, rows[feigned])
+    evidence[choices == choice_code('bluff_evidence')] += 0.5 * (c.observant[rows[choices == choice_code('bluff_evidence')]] >= c.threshold)
+
+    blake = c.has('blake_confession', rows) & (c.scores[rows, _CHARACTER['Blake']] > 0)
+    maya = c.has('maya_observation', rows) & (c.scores[rows, _CHARACTER['Maya']] > 0)
+    win_score = (c.fashion[rows] == _HIGH).astype(int) + (evidence >= 3) + blake + maya
+
+    public = np.isin(choices, [choice_code(choice) for choice in _PUBLIC_CHOICES])
+    endings = np.full(len(rows), OUTCOMES.index(UNFINISHED))
+    endings[public] = np.select(
+        [win_score[public] >= 3, win_score[public] >= 1],
+        [OUTCOMES.index(engine.PUBLIC_VICTORY), OUTCOMES.index(engine.PARTIAL_SUCCESS)],
+        OUTCOMES.index(engine.FAILED_EXPOSURE),
+    )
+    return endings
+
+
+SCENE_HANDLERS = {
+    'arrival': _arrival,
+    'pre_challenge_mingling': _pre_challenge_mingling,
+    'design_challenge': _design_challenge,
+    'backstage_incident': _backstage_incident,
+    'rooftop_party': _rooftop_party,
+    'romance_interlude': _romance_interlude,
+    'midnight_ball': _midnight_ball,
+    'secret_passage': _secret_passage,
+    'hidden_study': _hidden_study,
+    'marcelline_trap': _marcelline_trap,
+}
+OUTCOMES = engine.ENDINGS + (UNFINISHED,)
+
+
+# --- Running a Cohort ---
+def _sample(options, weights, rows, rng):
+    """Pick one available option per row, in proportion to the policy weights."""
+    table = np.zeros((len(rows), len(options)))
+    for column, (choice, _, available) in enumerate(options):
+        table[:, column] = weights.get(choice, 1) * np.broadcast_to(available, len(rows))
+    cumulative = table.cumsum(axis=1)
+    draws = rng.random(len(rows)) * cumulative[:, -1]
+    return (cumulative <= draws[:, None]).sum(axis=1)
+
+
+def play(size, difficulty, weights=None, seed=None, max_steps=500):
+    """Play ``size`` runs at once and return an array of ending indexes into OUTCOMES."""
+    rng = np.random.default_rng(seed)
+    weights = {} if weights is None else weights
+    cohort = Cohort(size, difficulty, rng)
+    scenes = np.full(size, _SCENE['arrival'], np.int8)
+    choices = np.zeros(size, np.int16)
+    endings = np.full(size, OUTCOMES.index(UNFINISHED), np.int8)
+    active = np.ones(size, bool)
+    confrontation = _SCENE['confrontation']
+
+    for _ in range(max_steps):
+        if not active.any():
+            break
+        for scene in np.unique(scenes[active]):
+            rows = np.flatnonzero(active & (scenes == scene))
+            if scene == confrontation:
+                endings[rows] = _confrontation(cohort, rows, choices[rows])
+                active[rows] = False
+                continue
+            options = SCENE_HANDLERS[SCENES[scene]](cohort, rows, choices[rows])
+            picked = _sample(options, weights, rows, rng)
+            scenes[rows] = np.array([_SCENE[target] for _, target, _ in options], np.int8)[picked]
+            choices[rows] = np.array([choice_code(choice) for choice, _, _ in options], np.int16)[picked]
+    return endings
+
+
+BATCH_POLICIES = {
+    'uniform': {},
+    'investigator': INVESTIGATOR_WEIGHTS,
+}
+
+
+def simulate(players, difficulties=tuple(engine.DIFFICULTIES), policy='uniform', seed=0):
+    """Return {difficulty: Counter(ending -> count)} for ``players`` runs per difficulty."""
+    totals = {}
+    for offset, difficulty in enumerate(difficulties):
+        endings = play(players, difficulty, BATCH_POLICIES[policy], seed=[seed, offset])
+        counts = np.bincount(endings, minlength=len(OUTCOMES))
+        totals[difficulty] = collections.Counter(dict(zip(OUTCOMES, counts.tolist())))
+    return totals
+
+
+# --- Checking the Rules ---
+CHECK_SIGMAS = 5 # Allowed distance from the exact probability, in standard errors
+CHECK_SLACK = 0.001 # Plus this much, for endings that are almost never reached
+
+
+def check(totals, policy='uniform', workers=None):
+    """(difficulty, outcome, share, exact) for every ending share the solver disagrees with."""
+    from . import solver
+
+    exact, _ = solver.solve_all((policy,), tuple(totals), workers)
+    mismatches = []
+    for difficulty, counts in totals.items():
+        runs = sum(counts.values())
+        for outcome in OUTCOMES:
+            expected = exact[policy, difficulty].get(outcome, 0.0)
+            share = counts[outcome] / runs
+            allowed = CHECK_SIGMAS * (expected * (1 - expected) / runs) ** 0.5 + CHECK_SLACK
+            if abs(share - expected) > allowed:
+                mismatches.append((difficulty, outcome, share, expected))
+    return mismatches
+
+
+def main(argv=None):
+    from .simulate import format_report, simulate as simulate_loop
+
+    parser = argparse.ArgumentParser(description='Vectorized Fashion Fatal cohorts (needs NumPy).')
+    parser.add_argument('--players', type=int, default=1_000_000, help='players per difficulty')
+    parser.add_argument('--policy', choices=sorted(BATCH_POLICIES), default='uniform')
+    parser.add_argument('--difficulty', nargs='+', choices=list(engine.DIFFICULTIES), default=list(engine.DIFFICULTIES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--compare', type=int, default=0, metavar='RUNS',
+                        help='also time RUNS per-player engine playthroughs for comparison')
+    parser.add_argument('--check', action='store_true',
+                        help='compare the ending shares with the exact solver; exit 1 if they disagree')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    totals = simulate(args.players, args.difficulty, args.policy, args.seed)
+    elapsed = time.perf_counter() - started
+    print(format_report(totals))
+    runs = args.players * len(args.difficulty)
+    print(f'cohort: {runs:,} runs in {elapsed:.2f}s ({runs / elapsed:,.0f} runs/s)')
+    if args.compare:
+        started = time.perf_counter()
+        simulate_loop(args.compare, args.difficulty, args.policy, args.seed, workers=1)
+        loop_elapsed = time.perf_counter() - started
+        loop_runs = args.compare * len(args.difficulty)
+        print(f'engine loop: {loop_runs:,} runs in {loop_elapsed:.2f}s ({loop_runs / loop_elapsed:,.0f} runs/s)')
+    if args.check:
+        mismatches = check(totals, args.policy)
+        for difficulty, outcome, share, expected in mismatches:
+            print(f'  {difficulty:<7} {outcome:<22} cohort {share:.4%}, solver {expected:.4%}')
+        print(f'{len(mismatches)} ending shares differ from the solver' if mismatches
+              else 'cohort rules agree with the solver')
+        raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
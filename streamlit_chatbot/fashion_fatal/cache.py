@@ -0,0 +1,64 @@
+"""Results of slow analyses, kept on disk between runs.
+
+Tools that derive something from the story (the scene graph, calibration
+sweeps) store it as JSON under a key made from everything it depends on, so
+a result is reused until the story file or a parameter changes:
+
+    key = cache.content_hash(story.STORY_PATH.read_bytes(), {'runs': 1000})
+    result = cache.cached('sweep', key, lambda: slow_sweep(1000))
+
+Files go to ``.fashion_fatal_cache`` in the working directory, or to the
+folder in ``FASHION_FATAL_CACHE``. Deleting the folder is always safe.
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+
+CACHE_ENV = 'FASHION_FATAL_CACHE'
+DEFAULT_DIR = '.fashion_fatal_cache'
+
+
+def cache_dir(environ=os.environ):
+    return pathlib.Path(environ.get(CACHE_ENV) or DEFAULT_DIR)
+
+
+def content_hash(*parts):
+    """A short hex digest of bytes, strings and JSON-ready values."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        elif not isinstance(part, bytes):
+            part = json.dumps(part, sort_keys=True, separators=(',', ':')).encode()
+        digest.update(len(part).to_bytes(8, 'little'))
+        digest.update(part)
+    return digest.hexdigest()[:16]
+
+
+def _path(kind, key, directory):
+    return (cache_dir() if directory is None else pathlib.Path(directory)) / f'{kind}-{key}.json'
+
+
+def load(kind, key, directory=None):
+    """The JSON value stored for (``kind``, ``key``), or None."""
+    try:
+        return json.loads(_path(kind, key, directory).read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def cached(kind, key, build, directory=None):
+    """The JSON value stored for (``kind``, ``key``), or ``build()`` saved there first."""
+    value = load(kind, key, directory)
+    if value is not None:
+        return value
+    path = _path(kind, key, directory)
+    value = build()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Written aside and renamed, so a concurrent reader never sees half a file.
+    partial = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    partial.write_text(json.dumps(value, separators=(',', ':')), encoding='utf-8')
+    partial.replace(path)
+    return value
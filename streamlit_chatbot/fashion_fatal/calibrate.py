@@ -0,0 +1,197 @@
+"""Calibration sweep over the difficulty settings.
+
+Easy, Normal and Hard are three hand-picked points of ``engine.Difficulty``:
+a skill check threshold, a relationship gain multiplier and a clue chance
+multiplier. This tool plays the story at every point of a grid of those
+three values, on all cores, and writes one CSV row per point:
+
+    cd streamlit_chatbot
+    python -m fashion_fatal.calibrate --threshold 1 2 3 4 5 --gain 0.5 1 1.5 2 --out sweep.csv
+
+Each row has the share of every ending, the average clues and items found,
+and how the romance went: who was chosen, how often the date was taken and
+the partner's final score. Rows of the current presets are named in the
+``preset`` column.
+
+Every point is cached on disk (see ``cache.py``) under a hash of its
+parameters, the run settings and the story, engine and simulator sources
+(the policies and the playthrough loop are ``simulate``'s), so growing the
+grid only plays the new points. Like ``simulate``, runs are split into
+chunks seeded from (seed, point, chunk), so results do not depend on the
+number of workers.
+"""
+
+import argparse
+import collections
+import csv
+import itertools
+import pathlib
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import cache, engine, simulate, story
+
+VERSION = 1 # Bump when the cached stats change shape
+CHUNK_SIZE = 2_000 # Playthroughs per task handed to a worker
+NO_ROMANCE = 'none'
+ROMANCES = ('Alex', 'Jordan', 'Taylor')
+BASE_DIFFICULTY = 'Normal' # Only the state's label; the point's settings are played
+# Everything a row depends on: the story, the engine, and the policies and
+# playthrough loop in simulate.py.
+_SOURCES = (
+    story.STORY_PATH, pathlib.Path(engine.__file__), pathlib.Path(story.__file__), pathlib.Path(simulate.__file__),
+)
+
+
+def content_hash():
+    """A hash of everything a playthrough depends on besides its settings."""
+    return cache.content_hash(*(path.read_bytes() for path in _SOURCES), VERSION)
+
+
+def grid(thresholds, gains, clue_chances):
+    """Every combination, as Difficulty tuples of (int, float, float) so equal points hash alike."""
+    return [
+        engine.Difficulty(int(threshold), float(gain), float(clue))
+        for threshold, gain, clue in itertools.product(thresholds, gains, clue_chances)
+    ]
+
+
+# --- Playthroughs ---
+def _empty():
+    return {
+        'runs': 0, 'endings': {}, 'clues': 0, 'items': 0,
+        'romance': {}, 'dates': 0, 'partner_score': 0,
+    }
+
+
+def _run_chunk(task):
+    seed, point, policy_name, chunk, runs = task
+    rng = random.Random(f'{seed}:{tuple(point)}:{chunk}')
+    policy = simulate.POLICIES[policy_name]
+    stats = _empty()
+    endings = collections.Counter()
+    romance = collections.Counter()
+    for _ in range(runs):
+        ending, state = simulate.play(BASE_DIFFICULTY, policy, rng, point)
+        endings[ending] += 1
+        stats['clues'] += state.clues_collected.bit_count()
+        stats['items'] += state.inventory.bit_count()
+        romance[state.romance or NO_ROMANCE] += 1
+        if state.romance:
+            stats['dates'] += state.date_opportunity_taken
+            stats['partner_score'] += state.relationship(state.romance)
+    stats.update(runs=runs, endings=dict(endings), romance=dict(romance))
+    return point, stats
+
+
+def _merge(total, stats):
+    for name in ('runs', 'clues', 'items', 'dates', 'partner_score'):
+        total[name] += stats[name]
+    for name in ('endings', 'romance'):
+        for key, count in stats[name].items():
+            total[name][key] = total[name].get(key, 0) + count
+
+
+def sweep(points, runs, policy='uniform', seed=0, workers=None, directory=None):
+    """Stats for every Difficulty in ``points``, as {point: stats}; cached points are not played again.
+
+    Returns the stats and the number of points that had to be played.
+    """
+    content = content_hash()
+
+    def key(point):
+        return cache.content_hash(content, list(point), runs, policy, str(seed))
+
+    results = {}
+    missing = []
+    for point in points:
+        found = cache.load('calibrate', key(point), directory)
+        if found is None:
+            missing.append(point)
+        else:
+            results[point] = found
+
+    tasks = [
+        (seed, point, policy, chunk, min(CHUNK_SIZE, runs - start))
+        for point in missing for chunk, start in enumerate(range(0, runs, CHUNK_SIZE))
+    ]
+    if workers == 1 or len(tasks) <= 1:
+        played = list(map(_run_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            played = list(pool.map(_run_chunk, tasks))
+    totals = {point: _empty() for point in missing}
+    for point, stats in played:
+        _merge(totals[point], stats)
+    for point, stats in totals.items():
+        results[point] = cache.cached('calibrate', key(point), lambda: stats, directory)
+    return {point: results[point] for point in points}, len(missing)
+
+
+# --- Report ---
+_PRESETS = {settings: name for name, settings in engine.DIFFICULTIES.items()}
+OUTCOMES = engine.ENDINGS + (simulate.UNFINISHED,)
+COLUMNS = (
+    ('preset', 'skill_check_threshold', 'relationship_gain_multiplier', 'clue_chance_multiplier', 'runs')
+    + OUTCOMES
+    + ('avg_clues', 'avg_items')
+    + tuple(f'romance_{name.lower()}' for name in ROMANCES + (NO_ROMANCE,))
+    + ('date_taken', 'avg_partner_score')
+)
+
+
+def row(point, stats):
+    runs = stats['runs']
+    romanced = runs - stats['romance'].get(NO_ROMANCE, 0)
+    values = [_PRESETS.get(point, ''), *point, runs]
+    values += [round(stats['endings'].get(outcome, 0) / runs, 4) for outcome in OUTCOMES]
+    values += [round(stats['clues'] / runs, 3), round(stats['items'] / runs, 3)]
+    values += [round(stats['romance'].get(name, 0) / runs, 4) for name in ROMANCES + (NO_ROMANCE,)]
+    values += [
+        round(stats['dates'] / romanced, 4) if romanced else '',
+        round(stats['partner_score'] / romanced, 3) if romanced else '',
+    ]
+    return values
+
+
+def write_csv(results, out):
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(COLUMNS)
+    for point, stats in results.items():
+        writer.writerow(row(point, stats))
+
+
+def main(argv=None):
+    thresholds = sorted({settings.skill_check_threshold for settings in engine.DIFFICULTIES.values()})
+    gains = sorted({settings.relationship_gain_multiplier for settings in engine.DIFFICULTIES.values()})
+    clue_chances = sorted({settings.clue_chance_multiplier for settings in engine.DIFFICULTIES.values()})
+    parser = argparse.ArgumentParser(description='Sweep a grid of difficulty settings and write the results as CSV.')
+    parser.add_argument('--threshold', nargs='+', type=int, default=thresholds, help='skill check thresholds')
+    parser.add_argument('--gain', nargs='+', type=float, default=gains, help='relationship gain multipliers')
+    parser.add_argument('--clue', nargs='+', type=float, default=clue_chances, help='clue chance multipliers')
+    parser.add_argument('--runs', type=int, default=10_000, help='playthroughs per grid point')
+    parser.add_argument('--policy', choices=sorted(simulate.POLICIES), default='uniform')
+    parser.add_argument('--seed', default='0')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--out', type=pathlib.Path, help='CSV file to write (default: standard output)')
+    args = parser.parse_args(argv)
+
+    points = grid(args.threshold, args.gain, args.clue)
+    started = time.perf_counter()
+    results, played = sweep(points, args.runs, args.policy, args.seed, args.workers)
+    if args.out:
+        with args.out.open('w', encoding='utf-8', newline='') as out:
+            write_csv(results, out)
+    else:
+        write_csv(results, sys.stdout)
+    print(
+        f'{len(points)} points, {played} played and {len(points) - played} from the cache'
+        f' in {time.perf_counter() - started:.1f}s',
+        file=sys.stderr,
+    )
+
+
+if __name__ == '__main__':
+    main()
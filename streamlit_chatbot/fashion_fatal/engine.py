@@ -0,0 +1,229 @@
+"""Headless game engine for Fashion Fatal.
+
+This runs the story without Streamlit. The entry point is
+``step(state, scene, choice, rng)``: it takes an immutable ``GameState``,
+applies one (scene, choice) transition and returns the new state together
+with the narrative blocks to show and the choices the player can make next.
+``chatbot.py`` is only a renderer on top of this module.
+
+The scenes themselves are data in ``story.json``. They are compiled once when
+this module is imported (see ``story.py``) and shared by every session.
+
+This module must never import streamlit.
+"""
+
+import dataclasses
+import operator
+from typing import NamedTuple
+
+from . import story
+from .story import Block, Choice, points
+
+
+# --- Difficulty Settings ---
+# The multipliers and thresholds affect skill checks and relationship gains.
+class Difficulty(NamedTuple):
+    skill_check_threshold: int # A check passes when random.randint(1,5) <= threshold + stat
+    relationship_gain_multiplier: float
+    clue_chance_multiplier: float
+
+
+DIFFICULTIES = {
+    'Easy': Difficulty(2, 1.5, 1.2), # Easier skill checks, faster relationship gains, more clues
+    'Normal': Difficulty(3, 1, 1),
+    'Hard': Difficulty(4, 0.5, 0.8), # Harder skill checks, slower relationship gains, fewer clues
+}
+
+# --- Endings ---
+# Reported in StepResult.ending when a confrontation choice resolves.
+PUBLIC_VICTORY = 'public_victory' # win_score >= 3
+PARTIAL_SUCCESS = 'partial_success' # win_score >= 1
+FAILED_EXPOSURE = 'failed_exposure'
+QUIET_JUSTICE = 'quiet_justice' # Taylor path with enough evidence
+INSUFFICIENT_EVIDENCE = 'insufficient_evidence' # Taylor path without it
+STAYED_SILENT = 'stayed_silent'
+ENDINGS = (PUBLIC_VICTORY, PARTIAL_SUCCESS, FAILED_EXPOSURE, QUIET_JUSTICE, INSUFFICIENT_EVIDENCE, STAYED_SILENT)
+
+
+# --- Characters ---
+# Relationship scores are a fixed-size tuple of ints in this order, in half
+# points (see story.points). None means the player has not met the character
+# yet (Jennifer, until backstage).
+CHARACTERS = ('Alex', 'Jordan', 'Taylor', 'Blake', 'Maya', 'Jennifer')
+CHARACTER_INDEX = {name: index for index, name in enumerate(CHARACTERS)}
+START_SCORES = (0, 0, 0, 0, 0, None)
+
+
+# --- Game State ---
+@dataclasses.dataclass(frozen=True, slots=True)
+class GameState:
+    """Everything the story remembers about one player, frozen.
+
+    The fields mirror the old ``st.session_state`` keys. Dicts are stored as
+    fixed-size tuples and item or clue lists as bitsets, and there is no
+    per-instance ``__dict__``, so a state is small, hashable and shareable.
+    """
+    inventory: int = 0 # Bitset of collected items; ITEMS.names(inventory) lists them
+    romance: object = None # Name of the chosen romance interest (Alex, Jordan, Taylor)
+    fashion_score: str = 'Medium' # Can be 'Low', 'Medium', 'High'
+    # One score per CHARACTERS entry in half points (0-10), None until met.
+    scores: tuple = START_SCORES
+    clues_collected: int = 0 # Bitset of clues found (for tracking progress), see CLUES
+    story_progress: int = 0 # 0-100 percentage, reflecting scene progression
+    date_opportunity_taken: bool = False # Tracks if the romance interlude was taken
+    final_romance_dialogue_unlocked: bool = False # Special flag for maxed romance dialogue
+    interlude_response_message: str = "" # Message from the romance interlude, shown in the next scene
+    player_observant: int = 0 # Hidden stat for observation checks
+    social_grace: int = 0 # Hidden stat for social interactions
+    difficulty: str = 'Normal' # One of the DIFFICULTIES keys
+
+    def replace(self, **changes):
+        unknown = changes.keys() - FIELDS
+        if unknown:
+            raise TypeError(f'GameState has no field(s) {sorted(unknown)}')
+        values = dict(zip(FIELDS, _values(self)))
+        values.update(changes)
+        return _build_state([values[name] for name in FIELDS])
+
+    @property
+    def relationship_scores(self):
+        """(name, points) pairs of the characters met so far, in CHARACTERS order."""
+        return _pairs(self.scores)
+
+    def relationship(self, character):
+        score = self.scores[CHARACTER_INDEX[character]]
+        return 0 if score is None else points(score)
+
+
+FIELDS = tuple(field.name for field in dataclasses.fields(GameState))
+_values = operator.attrgetter(*FIELDS)
+
+
+def _pairs(scores):
+    return tuple((name, points(score)) for name, score in zip(CHARACTERS, scores) if score is not None)
+
+
+def scores_from_pairs(pairs):
+    """A scores tuple from (name, half points) pairs; unlisted characters keep their defaults."""
+    scores = list(START_SCORES)
+    for name, score in pairs:
+        scores[CHARACTER_INDEX[name]] = score
+    return tuple(scores)
+
+
+class StepResult(NamedTuple):
+    state: GameState
+    blocks: tuple # Narrative Blocks, in display order
+    choices: tuple # Choices offered to the player next
+    ending: object = None # One of ENDINGS once the confrontation resolves
+    checks: tuple = () # (stat, passed) of every skill check rolled, in order
+    score: object = None # The points the ending was decided on, if the story gives them
+
+
+# Restart Game is the only choice that throws the current state away.
+RESTART = Choice('Restart Game', 'arrival', None)
+
+# --- Story ---
+# Parsed, checked and compiled once per process; every session shares it.
+STORY = story.load_story(fields=frozenset(FIELDS), characters=CHARACTERS)
+# A dictionary mapping scene IDs to their display titles, in story order.
+TITLES = STORY.titles
+DEFAULT_TITLE = STORY.title
+# Item and clue registries: id <-> bit <-> display name.
+ITEMS = STORY.items
+CLUES = STORY.clues
+
+
+class _Session:
+    """Mutable working copy of a GameState used while a scene runs.
+
+    Scene code reads and writes it exactly like it used to read and write
+    st.session_state; ``freeze()`` turns it back into a GameState.
+    """
+
+    def __init__(self, state):
+        self.__dict__.update(zip(FIELDS, _values(state)))
+        self.scores = list(state.scores)
+
+    @property
+    def relationship_scores(self):
+        return _pairs(self.scores)
+
+    def freeze(self):
+        self.scores = tuple(self.scores)
+        return _build_state(_values(self))
+
+
+def _state_builder():
+    # Skip the dataclass __init__: the values came from a GameState, and
+    # building states is on the hot path of every simulation. Like the
+    # __init__ dataclasses writes, the builder is generated with one line
+    # per field, each setting the slot directly past the frozen __setattr__.
+    names = {'new': object.__new__, 'GameState': GameState}
+    lines = ['def _build_state(values):', f'    {", ".join(FIELDS)}, = values', '    state = new(GameState)']
+    for name in FIELDS:
+        names[f'set_{name}'] = getattr(GameState, name).__set__
+        lines.append(f'    set_{name}(state, {name})')
+    lines.append('    return state')
+    exec('\n'.join(lines), names)
+    return names['_build_state']
+
+
+_build_state = _state_builder()
+
+
+class _Turn:
+    """Collects the output of one step and holds the difficulty settings."""
+
+    def __init__(self, rng, difficulty):
+        self.rng = rng
+        self.threshold, self.gain, self.clue_chance = difficulty
+        self.blocks = []
+        self.choices = []
+        self.checks = []
+        self.ending = None
+        self.score = None
+
+    def write(self, text):
+        self.blocks.append(Block('write', text))
+
+    def subheader(self, text):
+        self.blocks.append(Block('subheader', text))
+
+    def balloons(self):
+        self.blocks.append(Block('balloons'))
+
+    def button(self, label, scene, choice):
+        self.choices.append(Choice(label, scene, choice))
+
+    def skill_check(self, stat, name=None):
+        # Roll a five-sided die; lower is better, so a higher stat or threshold helps.
+        passed = self.rng.randint(1, 5) <= (self.threshold + stat)
+        self.checks.append((name, passed))
+        return passed
+
+    def clue_roll(self, base_chance):
+        return self.rng.random() < (base_chance * self.clue_chance)
+
+    def end(self, ending, score=None):
+        self.ending = ending
+        self.score = score
+
+    def restart(self):
+        self.choices.append(RESTART)
+
+
+def step(state, scene, choice, rng, settings=None):
+    """Apply one (scene, choice) transition to ``state``.
+
+    ``rng`` is anything with ``randint`` and ``random`` methods, such as the
+    ``random`` module or a ``random.Random`` instance. Unknown scenes render
+    nothing and offer no choices, just like the old page did. ``settings`` is
+    a Difficulty to play with instead of the state's own, for calibration.
+    """
+    turn = _Turn(rng, settings or DIFFICULTIES[state.difficulty])
+    session = _Session(state)
+    found = STORY.scenes.get(scene)
+    if found is not None:
+        found.run(turn, session, choice)
+    return StepResult(session.freeze(), tuple(turn.blocks), tuple(turn.choices), turn.ending, tuple(turn.checks), turn.score)
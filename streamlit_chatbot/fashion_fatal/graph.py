@@ -0,0 +1,345 @@
+"""The scene graph of story.json, read without running anything.
+
+Walks the action tree of every scene once and indexes each button as a
+Transition: the scene it is shown in, its label, the scene and choice id it
+leads to, and the conditions that must hold for it to appear (an ``if``, the
+choice that led here, a passed or failed check). On top of that index it
+reports content that can never be played:
+
+    cd streamlit_chatbot
+    python -m fashion_fatal.graph
+    python -m fashion_fatal.graph --json > graph.json
+
+- choices a scene handles that no button ever sends it,
+- buttons that send a choice the scene does not look at,
+- scenes no button leads to, and scenes where some path offers no button,
+- items and clues that are tested but never given, or given but never used.
+
+The index depends only on the story file, so ``load_graph`` caches it on disk
+(see ``cache.py``) under a hash of the file, and other tools can read the
+transition table without walking the JSON again.
+"""
+
+import argparse
+import json
+import pathlib
+import re
+from typing import NamedTuple
+
+from . import cache, story
+
+VERSION = 2 # Bump when the index layout changes, so cached copies are rebuilt; 2: reads
+
+
+class Transition(NamedTuple):
+    scene: str # Scene that shows the button
+    label: str
+    to: str # Scene the button leads to
+    choice: object # Choice id sent along, a {field} pattern, or None
+    guards: tuple # Conditions for the button to show, as text
+
+
+class Graph(NamedTuple):
+    start: str
+    scenes: tuple # Scene ids in story order
+    transitions: tuple # Every button, in story order
+    handled: dict # scene -> choice ids its actions branch on
+    set_choices: dict # scene -> choice ids it sets for itself with "set_choice"
+    endings: dict # scene -> endings it can reach
+    dead_ends: tuple # Scenes where some path shows no button and no restart
+    items: dict # 'declared', 'given', 'tested', 'dropped' -> item ids
+    clues: dict # 'declared', 'given', 'tested' -> clue ids
+    reads: dict # scene -> {'items', 'clues', 'names'} its conditions and values test
+
+    def leaving(self, scene):
+        """The transitions shown in ``scene``."""
+        return [transition for transition in self.transitions if transition.scene == scene]
+
+    def entering(self, scene):
+        return [transition for transition in self.transitions if transition.to == scene]
+
+
+# --- Extraction ---
+def describe(expr):
+    """A condition or value of story.json as short readable text."""
+    if isinstance(expr, str):
+        return expr
+    if not isinstance(expr, dict):
+        return json.dumps(expr)
+    (op, arg), = expr.items()
+    if op in ('has', 'knows', 'score'):
+        return f'{op} {arg}'
+    if op == 'not':
+        return _negate(describe(arg))
+    if op in ('all', 'any'):
+        return '(' + f' {"and" if op == "all" else "or"} '.join(describe(value) for value in arg) + ')'
+    if op in ('ge', 'gt', 'mul'):
+        symbol = {'ge': '>=', 'gt': '>', 'mul': '*'}[op]
+        return f'{describe(arg[0])} {symbol} {describe(arg[1])}'
+    if op == 'is':
+        return f'{arg[0]} == {json.dumps(arg[1])}'
+    if op == 'choice_in':
+        return f'choice in {arg}'
+    if op == 'count':
+        return f'count({", ".join(describe(value) for value in arg)})'
+    if op == 'holding':
+        return f'holding({", ".join(arg.get("items", []) + arg.get("clues", []))})'
+    return json.dumps(expr)
+
+
+def _negate(text):
+    return f'not {text}' if text.startswith('(') else f'not ({text})'
+
+
+class _Walker:
+    """Collects buttons, choices, items and clues from one story's JSON."""
+
+    def __init__(self, data):
+        self.data = data
+        self.blocks = data.get('blocks', {})
+        self.transitions = []
+        self.handled = {}
+        self.set_choices = {}
+        self.endings = {}
+        self.dead_ends = []
+        self.items = {key: set() for key in ('given', 'tested', 'dropped')}
+        self.clues = {key: set() for key in ('given', 'tested')}
+        self.reads = {}
+        self.case = data.get('case', {})
+        self.scene = None
+
+    def graph(self):
+        data = self.data
+        case = data.get('case', {})
+        for held in case.get('tallies', {}).values():
+            self.items['tested'].update(held.get('items', ()))
+            self.clues['tested'].update(held.get('clues', ()))
+        self.items['tested'].update(case.get('witnesses', {}).values())
+        for scene_id, scene in data['scenes'].items():
+            self.scene = scene_id
+            self.handled[scene_id] = set()
+            self.set_choices[scene_id] = set()
+            self.endings[scene_id] = set()
+            self.reads[scene_id] = {key: set() for key in ('items', 'clues', 'names')}
+            if not self.actions(scene['do'], ()):
+                self.dead_ends.append(scene_id)
+        return Graph(
+            start=data['start'],
+            scenes=tuple(data['scenes']),
+            transitions=tuple(self.transitions),
+            handled={scene: sorted(ids) for scene, ids in self.handled.items()},
+            set_choices={scene: sorted(ids) for scene, ids in self.set_choices.items()},
+            endings={scene: sorted(ids) for scene, ids in self.endings.items()},
+            dead_ends=tuple(self.dead_ends),
+            items={'declared': [entry['id'] for entry in data.get('items', [])], **_sorted(self.items)},
+            clues={'declared': [entry['id'] for entry in data.get('clues', [])], **_sorted(self.clues)},
+            reads={scene: _sorted(read) for scene, read in self.reads.items()},
+        )
+
+    def actions(self, actions, guards):
+        """Walk a list of actions; True if every path through it shows a button or restarts."""
+        leaves = False
+        for action in actions:
+            leaves = self.action(action, guards) or leaves
+        return leaves
+
+    def action(self, action, guards):
+        kind = next(iter(action))
+        if 'if' in action:
+            self.condition(action['if'])
+        for key in ('let', 'inc', 'set'):
+            for value in action.get(key, {}).values():
+                self.condition(value)
+        if kind == 'button':
+            self.transitions.append(Transition(
+                self.scene, action['button'], action.get('to'), action.get('choice'),
+                guards + ((describe(action['if']),) if 'if' in action else ()),
+            ))
+            return 'if' not in action
+        if kind == 'if':
+            test = describe(action['if'])
+            then = self.actions(action.get('then', []), guards + (test,))
+            otherwise = self.actions(action.get('else', []), guards + (_negate(test),))
+            return then and otherwise
+        if kind == 'on_choice':
+            branches = action['on_choice']
+            self.handled[self.scene].update(branches)
+            leaves = [self.actions(steps, guards + (f'choice == {choice}',)) for choice, steps in branches.items()]
+            leaves.append(self.actions(action.get('else', []), guards + (f'choice not in {list(branches)}',)))
+            return all(leaves)
+        if kind in ('check', 'roll'):
+            test = f'check {action["check"]}' if kind == 'check' else f'roll {action["roll"]}'
+            good, bad = ('pass', 'fail') if kind == 'check' else ('hit', 'miss')
+            passed = self.actions(action.get(good, []), guards + (f'{test} {good}',))
+            failed = self.actions(action.get(bad, []), guards + (f'{test} {bad}',))
+            return passed and failed
+        if kind == 'include':
+            return self.actions(self.blocks[action['include']], guards)
+        if kind == 'give':
+            self.items['given'].add(action['give'])
+            if 'clue' in action:
+                self.clues['given'].add(action['clue'])
+        elif kind == 'note':
+            self.clues['given'].add(action['note'])
+        elif kind == 'drop':
+            self.items['dropped'].add(action['drop'])
+        elif kind == 'set_choice':
+            self.set_choices[self.scene].add(action['set_choice'])
+        elif kind == 'end':
+            self.endings[self.scene].add(action['end'])
+            if 'score' in action:
+                self.condition(action['score'])
+        return kind == 'restart'
+
+    def condition(self, expr):
+        """Note the items, clues, names and choice ids a condition or value looks at."""
+        reads = self.reads[self.scene]
+        if isinstance(expr, str):
+            reads['names'].add(expr) # A state field or a "let" name
+            return
+        if not isinstance(expr, dict) or len(expr) != 1:
+            return
+        (op, arg), = expr.items()
+        if op == 'has':
+            self.items['tested'].add(arg)
+            reads['items'].add(arg)
+        elif op == 'knows':
+            self.clues['tested'].add(arg)
+            reads['clues'].add(arg)
+        elif op == 'holding':
+            self.items['tested'].update(arg.get('items', ()))
+            self.clues['tested'].update(arg.get('clues', ()))
+            reads['items'].update(arg.get('items', ()))
+            reads['clues'].update(arg.get('clues', ()))
+        elif op == 'is':
+            reads['names'].add(arg[0])
+        elif op == 'score':
+            pass # A relationship score, not a name
+        elif op == 'case':
+            self.case_read(arg)
+        elif op == 'choice_in':
+            self.handled[self.scene].update(arg)
+        elif isinstance(arg, list):
+            for value in arg:
+                self.condition(value)
+        else:
+            self.condition(arg)
+
+    def case_read(self, name):
+        """Note what {"case": name} looks at: a tally's evidence, a witness's item, or all the points."""
+        reads = self.reads[self.scene]
+        if name == 'points':
+            for point in self.case.get('points', ()):
+                self.condition(point)
+        elif name in self.case.get('tallies', {}):
+            held = self.case['tallies'][name]
+            reads['items'].update(held.get('items', ()))
+            reads['clues'].update(held.get('clues', ()))
+        elif name in self.case.get('witnesses', {}):
+            reads['items'].add(self.case['witnesses'][name])
+
+
+def _sorted(groups):
+    return {key: sorted(ids) for key, ids in groups.items()}
+
+
+def extract(data):
+    """The Graph of parsed story.json ``data``."""
+    return _Walker(data).graph()
+
+
+def load_graph(path=story.STORY_PATH, directory=None):
+    """The Graph of a story file, from the disk cache when the file has not changed."""
+    raw = pathlib.Path(path).read_bytes()
+    key = cache.content_hash(raw, VERSION)
+    value = cache.cached('graph', key, lambda: _to_json(extract(json.loads(raw))), directory)
+    return _from_json(value)
+
+
+def _to_json(graph):
+    value = graph._asdict()
+    value['transitions'] = [transition._asdict() for transition in graph.transitions]
+    return value
+
+
+def _from_json(value):
+    value = dict(value)
+    value['scenes'] = tuple(value['scenes'])
+    value['dead_ends'] = tuple(value['dead_ends'])
+    value['transitions'] = tuple(
+        Transition(**{**transition, 'guards': tuple(transition['guards'])}) for transition in value['transitions']
+    )
+    return Graph(**value)
+
+
+# --- Findings ---
+def _pattern(choice):
+    # A "fill" choice id such as "romance_interlude_{romance_id}" matches any text in the braces.
+    return re.compile('.*'.join(re.escape(part) for part in re.split(r'\{[^}]*\}', choice)) + '$')
+
+
+def problems(graph):
+    """(kind, scene, detail) for every piece of content that cannot be played."""
+    found = []
+    sent = {scene: set() for scene in graph.scenes}
+    for transition in graph.transitions:
+        if transition.choice is not None:
+            sent[transition.to].add(transition.choice)
+    for scene in graph.scenes:
+        patterns = [_pattern(choice) for choice in sent[scene]]
+        reachable = set(graph.set_choices[scene])
+        for choice in graph.handled[scene]:
+            if choice not in reachable and not any(pattern.match(choice) for pattern in patterns):
+                found.append(('never sent', scene, choice))
+        for choice in sorted(sent[scene]):
+            if '{' not in choice and choice not in graph.handled[scene]:
+                found.append(('never handled', scene, choice))
+
+    reached = {graph.start}
+    frontier = [graph.start]
+    while frontier:
+        scene = frontier.pop()
+        for transition in graph.leaving(scene):
+            if transition.to not in reached:
+                reached.add(transition.to)
+                frontier.append(transition.to)
+    found += [('unreachable', scene, '') for scene in graph.scenes if scene not in reached]
+    found += [('dead end', scene, 'some path shows no button') for scene in graph.dead_ends]
+
+    for kind, groups in (('item', graph.items), ('clue', graph.clues)):
+        given, tested = set(groups['given']), set(groups['tested'])
+        for entry in groups['declared']:
+            if entry in tested and entry not in given:
+                found.append((f'{kind} never given', '', entry))
+            elif entry not in tested and entry not in given:
+                found.append((f'{kind} unused', '', entry))
+    return found
+
+
+def format_report(graph, found):
+    lines = [f'{len(graph.scenes)} scenes, {len(graph.transitions)} buttons', '']
+    for scene in graph.scenes:
+        leaving = graph.leaving(scene)
+        lines.append(f'{scene} ({len(leaving)} buttons)')
+        for transition in leaving:
+            guards = f'  if {" and ".join(transition.guards)}' if transition.guards else ''
+            lines.append(f'  -> {transition.to} / {transition.choice}{guards}')
+    lines += ['', f'{len(found)} problems' if found else 'no problems found']
+    lines += [f'  {kind:<18} {scene:<24} {detail}' for kind, scene, detail in found]
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scene graph of story.json and content that cannot be played.')
+    parser.add_argument('--story', default=str(story.STORY_PATH))
+    parser.add_argument('--json', action='store_true', help='print the transition index as JSON')
+    args = parser.parse_args(argv)
+    graph = load_graph(args.story)
+    if args.json:
+        print(json.dumps(_to_json(graph), indent=2))
+    else:
+        print(format_report(graph, problems(graph)))
+
+
+if __name__ == '__main__':
+    main()
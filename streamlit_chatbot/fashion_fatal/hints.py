@@ -0,0 +1,175 @@
+"""Precomputed hints: the best button to press in every reachable state.
+
+``solver.OptimalSolver`` works out, for every state the story can reach, the
+choice that gives the best chance of a public victory. That takes seconds
+per difficulty, far too slow for a button click, so it is done once and
+written to a table:
+
+    cd streamlit_chatbot
+    python -m fashion_fatal.hints
+
+The page loads the table at startup, and its "Hint" button answers with one
+lookup:
+
+    table = hints.load()
+    hint = table.lookup(result.state, result.choices) # (choice index, chance) or None
+
+A state is looked up by a 64-bit hash of the solver's canonical form of it
+and the buttons on screen. The table is a header, then the sorted hashes,
+then one byte of choice index and two bytes of chance per hash, so it loads
+as three flat arrays and a lookup is a binary search. The header holds a
+hash of everything the keys and answers depend on: story.json and the code
+that plays and canonicalizes states (engine.py, story.py, solver.py and the
+graph.py it reads the story with). ``load`` returns None, with a warning,
+when any of them has changed since the table was built, rather than giving
+hints for another story.
+"""
+
+import argparse
+import array
+import bisect
+import hashlib
+import pathlib
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+from . import cache, engine, graph, solver, story
+
+MAGIC = b'FFH'
+VERSION = 1
+HINTS_PATH = pathlib.Path(__file__).with_name('hints.bin')
+GOAL = engine.PUBLIC_VICTORY
+_CHANCE_SCALE = 0xFFFF # Chances are stored as 16-bit fractions
+
+
+_SOURCES = (
+    story.STORY_PATH, pathlib.Path(engine.__file__), pathlib.Path(story.__file__), pathlib.Path(solver.__file__),
+    pathlib.Path(graph.__file__),
+)
+
+
+def source_hash():
+    """A hash of everything the table depends on, as in ``calibrate.content_hash``."""
+    return cache.content_hash(*(path.read_bytes() for path in _SOURCES), VERSION, GOAL)
+
+
+def key(state, choices):
+    """The table key of a state with ``choices`` on screen."""
+    position = min((solver.STORY_ORDER.index(option.scene) for option in choices), default=0)
+    return _hash((solver.canonical(state, position), tuple(choices)))
+
+
+def _hash(node):
+    # A StateGraph node: (canonical state, choices on screen).
+    return int.from_bytes(hashlib.blake2b(repr(node).encode(), digest_size=8).digest(), 'little')
+
+
+class HintTable:
+    """Sorted state hashes with the best choice and its chance for each."""
+
+    def __init__(self, keys, choices, chances, source_hash):
+        self.keys = keys # array('Q'), sorted
+        self.choices = choices # bytes: index of the best choice
+        self.chances = chances # array('H'): chance of GOAL, out of _CHANCE_SCALE
+        self.source_hash = source_hash
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, state, choices):
+        """(index of the best choice, chance of GOAL), or None for a state not in the table."""
+        wanted = key(state, choices)
+        at = bisect.bisect_left(self.keys, wanted)
+        if at == len(self.keys) or self.keys[at] != wanted:
+            return None
+        return self.choices[at], self.chances[at] / _CHANCE_SCALE
+
+    def to_bytes(self):
+        header = MAGIC + bytes([VERSION]) + self.source_hash.encode() + len(self.keys).to_bytes(4, 'little')
+        return header + _little(self.keys) + bytes(self.choices) + _little(self.chances)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:len(MAGIC)] != MAGIC or data[len(MAGIC)] != VERSION:
+            raise ValueError('not a hint table of this version')
+        at = len(MAGIC) + 1
+        source_hash = data[at:at + 16].decode()
+        count = int.from_bytes(data[at + 16:at + 20], 'little')
+        at += 20
+        keys = array.array('Q')
+        keys.frombytes(data[at:at + 8 * count])
+        choices = data[at + 8 * count:at + 9 * count]
+        chances = array.array('H')
+        chances.frombytes(data[at + 9 * count:at + 11 * count])
+        if sys.byteorder == 'big':
+            keys.byteswap()
+            chances.byteswap()
+        return cls(keys, choices, chances, source_hash)
+
+
+def _little(values):
+    if sys.byteorder == 'big':
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+# --- Building ---
+def _solve_difficulty(difficulty):
+    optimal = solver.OptimalSolver(GOAL)
+    optimal.solve(difficulty)
+    entries = {}
+    for node_id, index in optimal.best.items():
+        if index is not None:
+            entries[_hash(optimal.graph.nodes[node_id])] = (index, round(optimal.values[node_id] * _CHANCE_SCALE))
+    return entries
+
+
+def build(difficulties=tuple(engine.DIFFICULTIES), workers=None):
+    """Solve every difficulty (one per worker process) and return the HintTable."""
+    if workers == 1 or len(difficulties) == 1:
+        results = list(map(_solve_difficulty, difficulties))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_solve_difficulty, difficulties))
+    entries = {}
+    for found in results:
+        entries.update(found)
+    ordered = sorted(entries)
+    return HintTable(
+        array.array('Q', ordered),
+        bytes(entries[wanted][0] for wanted in ordered),
+        array.array('H', (entries[wanted][1] for wanted in ordered)),
+        source_hash(),
+    )
+
+
+def load(path=HINTS_PATH):
+    """The hint table at ``path``, or None if it is missing or built for another story or engine."""
+    try:
+        table = HintTable.from_bytes(pathlib.Path(path).read_bytes())
+    except (OSError, ValueError):
+        return None
+    if table.source_hash != source_hash():
+        warnings.warn(f'{path} was built for another version of the story or engine; '
+                      'run python -m fashion_fatal.hints to rebuild it')
+        return None
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the table of best choices for the Hint button.')
+    parser.add_argument('--out', type=pathlib.Path, default=HINTS_PATH)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    table = build(workers=args.workers)
+    data = table.to_bytes()
+    args.out.write_bytes(data)
+    print(f'{len(table):,} states, {len(data):,} bytes written to {args.out} in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""Typed commands matched to the buttons on screen.
+
+A player can type "ask Maya what she saw" instead of pressing "Seek Maya's
+perspective on the incident." The text is matched only against the choices
+the current step offers, so the scene, the inventory and the story so far
+have already narrowed it down to a handful of buttons:
+
+    index = intents.load_index()
+    found = index.match("ask maya what she saw", result.choices) # Match or None
+
+The index is a TF-IDF vector per button, built from every button label in
+story.json and the words of its choice id (``ask_maya_incident``). A small
+synonym table maps typed words onto the words the labels use, so "chat" or
+"inspect" land on a button; a typed word that some button uses itself keeps
+its own meaning and only leans towards its synonym, so "decline" picks the
+button that says decline. A message that names a character or item only
+matches a button that names it too, and the best button has to beat the
+next one by a margin, since a wrong guess plays a choice that cannot be
+taken back. The index is built once per process from the scene graph (see
+``graph.py``); a match is a tokenize and a few sparse dot products, no model
+and no network. To try it or check it against every scene:
+
+    cd streamlit_chatbot
+    python -m fashion_fatal.intents
+    python -m fashion_fatal.intents --scene rooftop_party "ask maya what she saw"
+"""
+
+import argparse
+import collections
+import json
+import math
+import re
+import time
+from typing import NamedTuple
+
+from . import engine, graph, story
+
+MIN_SCORE = 0.3 # Below this cosine similarity a message matches nothing
+MARGIN = 0.1 # How far the best button must score above the next one
+RELATED_WEIGHT = 0.5 # Weight of the synonym of a word some button uses itself
+_WORD = re.compile(r'[a-z]+')
+STOPWORDS = frozenset("""
+    a about an and any are at be by do for from her his i in into is it its me my of on or our she he so some
+    that the their them they this to what which who with would you your want let lets go try
+""".split())
+# Words a player might type -> the word (or stem) the labels use. Typed text
+# only; a label keeps its own words, so two buttons never merge into one.
+SYNONYMS = {
+    'question': 'ask', 'inquire': 'ask', 'query': 'ask', 'quiz': 'ask', 'ask': 'talk',
+    'speak': 'talk', 'chat': 'talk', 'chatting': 'talk', 'tell': 'talk', 'say': 'talk', 'approach': 'talk',
+    'inspect': 'examine', 'check': 'examine', 'study': 'examine', 'analyze': 'examine', 'analyse': 'examine',
+    'watch': 'observe', 'spy': 'observe', 'saw': 'observe', 'see': 'observe', 'seen': 'observe',
+    'witness': 'observe', 'witnessed': 'observe', 'view': 'perspective',
+    'search': 'find', 'hunt': 'find', 'look': 'find', 'locate': 'find',
+    'assist': 'help', 'aid': 'help',
+    'reject': 'refuse', 'deny': 'refuse',
+    'agree': 'accept',
+    'pretend': 'feign', 'fake': 'feign', 'lie': 'feign',
+    'bug': 'surveillance', 'bugs': 'surveillance', 'camera': 'surveillance', 'cameras': 'surveillance',
+    'book': 'ledger', 'journal': 'ledger', 'letter': 'document', 'paper': 'document', 'papers': 'document',
+    'decode': 'decipher', 'translate': 'decipher', 'solve': 'decipher',
+    'flirt': 'romance', 'date': 'romance', 'private': 'romance',
+    'back': 'return',
+}
+
+
+def tokens(text):
+    """Lowercased, stemmed words of ``text`` without stopwords."""
+    found = []
+    for word in _WORD.findall(text.lower()):
+        word = _stem(word)
+        if len(word) > 1 and word not in STOPWORDS:
+            found.append(word)
+    return found
+
+
+def _stem(word):
+    for suffix in ('ing', 'ed', 'es', 's'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+# Words that name someone or something in the story. A message that names one
+# only matches a button that names it too, so "talk to Blake" never picks the
+# button for Maya just because both say "talk".
+ENTITIES = frozenset(tokens(' '.join(engine.CHARACTERS + ('Marcelline',)) + """
+    invitation chess photo bracelet confession map key gossip note letter ledger locket document camera
+    surveillance desk bookshelves judges rivals
+"""))
+# Phrases that must match nothing in their scene: each names someone who is
+# not on any button, or asks for something no button does.
+MUST_NOT_MATCH = (
+    ('rooftop_party', 'talk to blake'),
+    ('midnight_ball', 'I want to kiss Alex'),
+    ('design_challenge', 'ask Maya what she saw'),
+    ('design_challenge', 'look around'),
+)
+# Phrases that must pick the button with this choice id in their scene.
+MUST_MATCH = (
+    ('rooftop_party', 'ask Maya what she saw', 'talk_maya_party'),
+    ('rooftop_party', 'ask maya', 'talk_maya_party'),
+    ('marcelline_trap', 'decline', 'avoid_trap_direct_confront'),
+    ('marcelline_trap', 'refuse', 'refuse_direct_confront'),
+    ('hidden_study', 'leave', 'leave_study_ready'),
+    ('hidden_study', 'go back to the ball', 'leave_study_ready'),
+    ('romance_interlude', 'go back to the ball', 'after_interlude'),
+    ('backstage_incident', 'question Taylor', 'ask_taylor_incident'),
+)
+
+
+class Match(NamedTuple):
+    choice: object # The Choice on screen
+    score: float # Cosine similarity, 0..1
+
+
+class IntentIndex:
+    """Normalized TF-IDF vectors of button labels, and the IDF to weigh messages with."""
+
+    def __init__(self, idf, vectors):
+        self.idf = idf # token -> inverse document frequency
+        self.vectors = vectors # label -> {token: weight}, unit length
+        self.unseen = max(idf.values(), default=1.0) # Weight of a token no label uses
+
+    def vector(self, counts, known_only=False):
+        """The unit TF-IDF vector of ``counts`` (word -> count)."""
+        vector = {
+            word: count * self.idf.get(word, self.unseen)
+            for word, count in counts.items() if not known_only or word in self.idf
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {word: weight / norm for word, weight in vector.items()} if norm else {}
+
+    def label_vector(self, label):
+        # Labels filled in at play time ("Spend private time with **Alex**.") are not in the index.
+        found = self.vectors.get(label)
+        return found if found is not None else self.vector(collections.Counter(tokens(label)))
+
+    def terms(self, text):
+        """The weighted words of a typed message (word -> count), and the ENTITIES it names.
+
+        A word no button uses counts as its synonym. A word some button uses
+        counts as itself, and its synonym at RELATED_WEIGHT as well.
+        """
+        counts = collections.Counter()
+        named = set()
+        for word in _WORD.findall(text.lower()):
+            stem = _stem(word)
+            synonym = SYNONYMS.get(word) or SYNONYMS.get(stem)
+            if synonym is None or stem in self.idf:
+                if len(stem) < 2 or stem in STOPWORDS:
+                    continue
+                counts[stem] += 1
+                if stem in ENTITIES:
+                    named.add(stem)
+                if synonym is not None and synonym != stem:
+                    counts[synonym] += RELATED_WEIGHT
+            else:
+                counts[synonym] += 1
+                if synonym in ENTITIES:
+                    named.add(synonym)
+        return counts, named
+
+    def match(self, text, choices):
+        """The choice in ``choices`` that ``text`` asks for, or None when nothing (or more than one) fits.
+
+        Besides scoring well, and MARGIN better than any other button, the
+        button has to name everyone and everything the text names (see
+        ENTITIES) and, when the text says more than names, share at least
+        one of its other words: "kiss Alex" does not pick "Observe
+        Marcelline and Alex" for the name alone.
+        """
+        counts, named = self.terms(text)
+        query = self.vector(counts, known_only=True)
+        if not query or not choices:
+            return None
+        asked = counts.keys() - named
+        scored = []
+        for position, choice in enumerate(choices):
+            vector = self.label_vector(choice.label)
+            if named <= vector.keys() and (not asked or not asked.isdisjoint(vector)):
+                scored.append((sum(weight * vector.get(word, 0.0) for word, weight in query.items()), position))
+        if not scored:
+            return None
+        scored.sort(reverse=True)
+        best, position = scored[0]
+        if best < MIN_SCORE:
+            return None
+        for score, other in scored[1:]:
+            if choices[other].label != choices[position].label:
+                if best - score < MARGIN:
+                    return None # Too close to call between two different buttons
+                break
+        return Match(choices[position], best)
+
+
+def _documents(scene_graph):
+    # label -> words: the label itself and the words of every choice id it sends.
+    documents = collections.defaultdict(list)
+    for transition in scene_graph.transitions:
+        documents[transition.label] += tokens(re.sub(r'\{[^}]*\}', ' ', transition.label))
+        if transition.choice is not None:
+            documents[transition.label] += tokens(re.sub(r'\{[^}]*\}', ' ', transition.choice).replace('_', ' '))
+    documents[engine.RESTART.label] += tokens(engine.RESTART.label)
+    return documents
+
+
+def build(scene_graph):
+    """The IntentIndex of a Graph's buttons."""
+    documents = _documents(scene_graph)
+    frequency = collections.Counter(word for words in documents.values() for word in set(words))
+    idf = {word: math.log((1 + len(documents)) / (1 + count)) + 1 for word, count in frequency.items()}
+    index = IntentIndex(idf, {})
+    index.vectors = {label: index.vector(collections.Counter(words)) for label, words in documents.items()}
+    return index
+
+
+def load_index(path=story.STORY_PATH):
+    """The IntentIndex of a story file; build it once per process."""
+    with open(path, encoding='utf-8') as f:
+        return build(graph.extract(json.load(f)))
+
+
+# --- Checks ---
+def _scene_choices(scene_graph, scene):
+    return list(dict.fromkeys(story.Choice(t.label, t.to, t.choice) for t in scene_graph.leaving(scene)))
+
+
+def self_check(index, scene_graph):
+    """(scene, text, matched label or None) for every button its own label does not pick out,
+    every MUST_MATCH phrase that misses its button and every MUST_NOT_MATCH phrase that picks one."""
+    misses = []
+    for scene in scene_graph.scenes:
+        choices = _scene_choices(scene_graph, scene)
+        for choice in choices:
+            found = index.match(choice.label, choices)
+            if found is None or found.choice.label != choice.label:
+                misses.append((scene, choice.label, found and found.choice.label))
+    for scene, text, choice_id in MUST_MATCH:
+        found = index.match(text, _scene_choices(scene_graph, scene))
+        if found is None or found.choice.choice != choice_id:
+            misses.append((scene, text, found and found.choice.label))
+    for scene, text in MUST_NOT_MATCH:
+        found = index.match(text, _scene_choices(scene_graph, scene))
+        if found is not None:
+            misses.append((scene, text, found.choice.label))
+    return misses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Match typed commands to the buttons of a scene.')
+    parser.add_argument('text', nargs='?', help='a command to match')
+    parser.add_argument('--scene', help='scene whose buttons to match against (default: all buttons)')
+    args = parser.parse_args(argv)
+    scene_graph = graph.extract(json.loads(story.STORY_PATH.read_text(encoding='utf-8')))
+    started = time.perf_counter()
+    index = load_index()
+    print(f'index of {len(index.vectors)} labels, {len(index.idf)} words built in {time.perf_counter() - started:.3f}s')
+
+    if args.text:
+        transitions = scene_graph.leaving(args.scene) if args.scene else scene_graph.transitions
+        choices = [story.Choice(t.label, t.to, t.choice) for t in transitions]
+        found = index.match(args.text, choices)
+        print('no match' if found is None else f'{found.choice.label} -> {found.choice.scene} / {found.choice.choice}'
+              f' (score {found.score:.2f})')
+        return
+
+    misses = self_check(index, scene_graph)
+    print(f'{len(misses)} buttons not matched by their own label, or phrases matched wrongly')
+    for scene, label, matched in misses:
+        print(f'  {scene}: {label!r} -> {matched!r}')
+    choices = [story.Choice(t.label, t.to, t.choice) for t in scene_graph.leaving('rooftop_party')]
+    number = 10_000
+    started = time.perf_counter()
+    for _ in range(number):
+        index.match('ask maya what she saw', choices)
+    print(f'{(time.perf_counter() - started) / number * 1e6:.1f} us per match against {len(choices)} buttons')
+
+
+if __name__ == '__main__':
+    main()
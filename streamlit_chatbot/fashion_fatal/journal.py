@@ -0,0 +1,159 @@
+"""Append-only log of one player's transitions.
+
+Streamlit reruns the page script on every widget interaction, so the same
+``scene``/``choice`` query parameters arrive again and again. A Journal
+makes each transition happen exactly once. Every button carries a step id,
+and a (step id, scene, choice) that is already in the log just returns its
+result again. The state is not touched and the dice come out the same:
+
+    journal = Journal()
+    first = journal.apply('1', 'arrival', None)
+    again = journal.apply('1', 'arrival', None) # same result, nothing re-run
+    picked = first.choices[0]
+    journal.apply(journal.next_step(), picked.scene, picked.choice)
+
+The dice of a step come from the session seed and the step id, so the same
+step played again from the same state rolls the same way. That is what lets
+``save`` describe a session in a few bytes (see ``snapshot.py``) and
+``resume`` bring it back on the same scene, text and all.
+
+Only the newest result is kept whole. Older events keep the state they led
+to, not their text and buttons, so a session's memory grows by a few dozen
+bytes per step; an old step that is asked for again (the browser's back
+button) is played again from its recorded start state with the same dice.
+
+The events are enough to rebuild a session: ``replay(journal.events)`` gives
+an equivalent Journal without changing any state.
+"""
+
+import random
+from typing import NamedTuple
+
+from . import engine
+from .snapshot import Snapshot
+
+
+class Event(NamedTuple):
+    step: str # Step id the transition was requested with
+    scene: object # Scene played, or None for a settings change
+    choice: object # Choice id, or the (field, value) pairs of a settings change
+    state: engine.GameState # State after the event
+    ending: object = None
+
+
+class Journal:
+    """The events of one session and the state they lead to."""
+
+    def __init__(self, state=None, seed=None):
+        self.events = []
+        self.start = engine.GameState() if state is None else state
+        self.state = self.start
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.steps = 0 # Highest numeric step id recorded
+        self._seen = {} # (step, scene, choice) -> index in events
+        self._latest = None # (index, StepResult) of the newest scene event
+        self.resumed_at = None # (step, scene, choice) a resumed journal redraws first; not a new move
+
+    def next_step(self):
+        """A step id no earlier event has used."""
+        return str(self.steps + 1)
+
+    def rng(self, step):
+        # String seeds are hashed with SHA-512, so they are stable across processes.
+        return random.Random(f'{self.seed}:{step}')
+
+    def apply(self, step, scene, choice, rng=None):
+        """Play ``scene``/``choice`` once for ``step`` and return its StepResult.
+
+        The dice come from ``rng`` if given, otherwise from the session seed.
+        """
+        key = (step, scene, choice)
+        index = self._seen.get(key)
+        if index is not None:
+            return self._result(index)
+        rng = self.rng(step) if rng is None else rng
+        result = engine.step(self.state, scene, choice, rng)
+        self._record(Event(step, scene, choice, result.state, result.ending))
+        index = self._seen[key] = len(self.events) - 1
+        self._latest = (index, result)
+        return result
+
+    def amend(self, **changes):
+        """Change settings outside any scene (the difficulty on the arrival page)."""
+        state = self.state.replace(**changes)
+        if state != self.state:
+            self._record(Event(self.next_step(), None, tuple(sorted(changes.items())), state))
+        return state
+
+    def last(self):
+        """The most recent scene result, or None before the first step."""
+        for index in range(len(self.events) - 1, -1, -1):
+            if self.events[index].scene is not None:
+                return self._result(index)
+        return None
+
+    def _result(self, index):
+        if self._latest is not None and self._latest[0] == index:
+            return self._latest[1]
+        # An older step: play it again from where it started, with its dice.
+        event = self.events[index]
+        result = engine.step(self._state_before(index), event.scene, event.choice, self.rng(event.step))
+        if all(later.scene is None for later in self.events[index + 1:]):
+            self._latest = (index, result) # The newest scene after a replay
+        return result
+
+    def _state_before(self, index):
+        return self.events[index - 1].state if index else self.start
+
+    def save(self):
+        """A Snapshot that resumes this session on its current scene.
+
+        It holds the state the current scene was entered with, so resuming
+        plays that step again and gets the same text, dice and choices.
+        Settings changed since then are folded into that state.
+        """
+        last = None
+        for index, event in enumerate(self.events):
+            if event.scene is not None:
+                last = index
+        if last is None:
+            return Snapshot(self.state, engine.STORY.start, None, '0', self.seed)
+        event = self.events[last]
+        state = self._state_before(last)
+        for amended in self.events[last + 1:]:
+            state = state.replace(**dict(amended.choice))
+        return Snapshot(state, event.scene, event.choice, event.step, self.seed)
+
+    def _record(self, event):
+        self.events.append(event)
+        self.state = event.state
+        if event.step.isdigit():
+            self.steps = max(self.steps, int(event.step))
+        return event
+
+
+def resume(snapshot):
+    """A Journal that continues a saved session.
+
+    Nothing is played yet: applying ``snapshot.step``, ``snapshot.scene`` and
+    ``snapshot.choice`` to it redraws the scene the player saved on. That
+    step was already counted when it was first played, so the journal keeps
+    it in ``resumed_at`` for the page to tell the two apart.
+    """
+    journal = Journal(snapshot.state, snapshot.seed)
+    journal.resumed_at = (snapshot.step, snapshot.scene, snapshot.choice)
+    return journal
+
+
+def replay(events, state=None, seed=None):
+    """Rebuild a Journal from recorded events.
+
+    States come from the events; a scene's text and buttons are only played
+    again when asked for.
+    """
+    journal = Journal(state, seed)
+    for event in events:
+        journal._record(event)
+        if event.scene is not None:
+            journal._seen[event.step, event.scene, event.choice] = len(journal.events) - 1
+    return journal
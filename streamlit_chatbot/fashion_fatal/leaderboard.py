@@ -0,0 +1,168 @@
+"""Endings of every session, counted across the server process.
+
+Each finished run is one Finish: the ending, the difficulty, the points the
+ending was decided on (``win_score`` in the confrontation, bonuses included),
+the romance and the evidence held.
+``record`` only appends it to a list under a lock. A background thread wakes
+every FLUSH_INTERVAL seconds, or as soon as BATCH_SIZE runs are waiting,
+folds them into the counts, writes the batch to SQLite in one transaction
+(when a path is given) and publishes a new Board:
+
+    leaderboard = Leaderboard('stats.db')
+    leaderboard.record(finish) # returns at once
+    board = leaderboard.board # the latest Board, no lock taken
+    board.share(engine.PUBLIC_VICTORY, 'Hard') # 0.12
+
+A Board is never changed after it is published, so reading it needs no lock
+and never waits for a flush; it trails ``record`` by at most one flush. On
+startup the counts of earlier processes are read back from the database. A
+flush that fails is rolled back and tried again with the next one (see
+``writebehind.py``).
+"""
+
+import collections
+import sqlite3
+import threading
+from typing import NamedTuple
+
+from . import engine
+from .writebehind import WriteBehind
+
+FLUSH_INTERVAL = 1.0 # Seconds between background flushes
+BATCH_SIZE = 256 # Waiting runs that trigger an early flush
+NO_ROMANCE = '' # Stored for runs without a romance, so the key has no NULLs
+
+# How each ending reads in "12% of players ... on Hard".
+ENDING_TEXT = {
+    engine.PUBLIC_VICTORY: 'exposed Marcelline publicly',
+    engine.PARTIAL_SUCCESS: 'partly exposed Marcelline',
+    engine.FAILED_EXPOSURE: 'failed to expose Marcelline',
+    engine.QUIET_JUSTICE: 'brought Marcelline down quietly with Taylor',
+    engine.INSUFFICIENT_EVIDENCE: 'went to Taylor without enough evidence',
+    engine.STAYED_SILENT: 'stayed silent',
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS endings (
+    difficulty TEXT NOT NULL,
+    ending TEXT NOT NULL,
+    win_score INTEGER NOT NULL,
+    romance TEXT NOT NULL,
+    evidence INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (difficulty, ending, win_score, romance, evidence)
+)
+"""
+
+
+class Finish(NamedTuple):
+    difficulty: str
+    ending: str
+    win_score: int # The ending's own score, or the case points if it has none
+    romance: str # NO_ROMANCE if none was chosen
+    evidence: int
+
+
+def finish(result):
+    """The Finish of the run that ended with the StepResult ``result``."""
+    state = result.state
+    case = engine.STORY.case.assess(state)
+    win_score = case.points if result.score is None else result.score
+    return Finish(state.difficulty, result.ending, win_score, state.romance or NO_ROMANCE, dict(case.tallies)['evidence'])
+
+
+class Board:
+    """Counts of finished runs by Finish, as of one flush. Read-only once published."""
+
+    def __init__(self, counts):
+        self.counts = counts # Finish -> runs
+        totals = collections.Counter()
+        endings = collections.Counter()
+        for key, count in counts.items():
+            totals[key.difficulty] += count
+            endings[key.difficulty, key.ending] += count
+        self._totals = totals
+        self._endings = endings
+
+    def total(self, difficulty=None):
+        return sum(self._totals.values()) if difficulty is None else self._totals[difficulty]
+
+    def share(self, ending, difficulty):
+        """The fraction of runs on ``difficulty`` that ended with ``ending``."""
+        total = self._totals[difficulty]
+        return self._endings[difficulty, ending] / total if total else 0.0
+
+    def lines(self, difficulty):
+        """"12% of players exposed Marcelline publicly on Hard", for every ending seen on ``difficulty``."""
+        return [
+            f'{self.share(ending, difficulty):.0%} of players {text} on {difficulty}'
+            for ending, text in ENDING_TEXT.items() if self._endings[difficulty, ending]
+        ]
+
+
+class Leaderboard(WriteBehind):
+    """Write-behind ending counts, shared by every session of the process."""
+
+    write_errors = (sqlite3.Error,)
+
+    def __init__(self, path=None, flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE):
+        self.path = None if path is None else str(path)
+        self.batch_size = batch_size
+        self._pending = []
+        self._lock = threading.Lock() # Guards _pending only
+        self._connection = None
+        counts = {}
+        if self.path is not None:
+            self._connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.execute(_SCHEMA)
+            rows = self._connection.execute(
+                'SELECT difficulty, ending, win_score, romance, evidence, count FROM endings'
+            )
+            counts = {Finish(*row[:5]): row[5] for row in rows}
+        self._counts = counts
+        self.board = Board(dict(counts))
+        self._start_writer('leaderboard-writer', flush_interval)
+
+    def record(self, run):
+        """Count a Finish; it shows on the board after the next flush."""
+        with self._lock:
+            self._pending.append(run)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.wake()
+
+    def _take(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        return batch
+
+    def _write(self, batch):
+        added = collections.Counter(batch)
+        if self._connection is not None:
+            try:
+                self._connection.execute('BEGIN')
+                self._connection.executemany(
+                    'INSERT INTO endings (difficulty, ending, win_score, romance, evidence, count) '
+                    'VALUES (?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT (difficulty, ending, win_score, romance, evidence) '
+                    'DO UPDATE SET count = count + excluded.count',
+                    [(*key, count) for key, count in added.items()],
+                )
+                self._connection.execute('COMMIT')
+            except sqlite3.Error:
+                if self._connection.in_transaction:
+                    self._connection.execute('ROLLBACK')
+                raise
+        for key, count in added.items():
+            self._counts[key] = self._counts.get(key, 0) + count
+        self.board = Board(dict(self._counts)) # Readers pick up the new board on their next look
+
+    def _requeue(self, batch):
+        with self._lock:
+            self._pending[:0] = batch
+
+    def _release(self):
+        if self._connection is not None:
+            self._connection.close()
@@ -0,0 +1,174 @@
+"""Many players on the Streamlit page at once.
+
+Drives whole games through ``chatbot.py`` with Streamlit's AppTest, from
+'arrival' to 'confrontation', with the buttons picked by a choice policy.
+Sessions are split across worker processes that run side by side, and every
+script run is timed and measured:
+
+    cd streamlit_chatbot
+    python -m fashion_fatal.loadtest --sessions 200 --out load.json
+    python -m fashion_fatal.loadtest --sessions 200 --out new.json --compare load.json
+
+The report has p50/p95/p99 script-run time, delta count and bytes per scene,
+and how much memory each session's journal holds (story text shared by all
+sessions is not counted). ``--out`` writes it as JSON, and ``--compare``
+prints the change of every percentile against an earlier file. Session i
+always gets the seed (seed, i), so two commits are measured on the same
+games. The 'arrival' times include AppTest starting the session up. Needs
+``streamlit``.
+"""
+
+import argparse
+import collections
+import json
+import os
+import pathlib
+import platform
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import engine, profiler, simulate
+from .pagebench import MAIN, MAX_STEPS, PAGE, SIDEBAR, Recorder, measure
+
+PERCENTILES = (50, 95, 99)
+
+
+# --- Sessions ---
+def session_seed(seed, session):
+    return f'{seed}:{session}'
+
+
+def play_session(page, policy, seed, session):
+    """One game through the page: per-run (scene, seconds, main, sidebar) and the journal size."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(session_seed(seed, session))
+    # The page seeds each new journal from the module-level random.
+    random.seed(rng.random())
+    runs = []
+    with Recorder() as recorder:
+        started = time.perf_counter()
+        at = AppTest.from_file(str(page), default_timeout=30).run()
+        scene = 'arrival'
+        for _ in range(MAX_STEPS):
+            elapsed = time.perf_counter() - started
+            counts = measure(recorder.runs[-1])
+            runs.append((scene, elapsed, counts[MAIN], counts[SIDEBAR]))
+            journal = at.session_state.journal
+            choices = journal.last().choices
+            if not choices or choices == (engine.RESTART,):
+                break
+            picked = rng.choices(range(len(choices)), policy(journal.state, choices))[0]
+            scene = choices[picked].scene
+            started = time.perf_counter()
+            at.button[picked].click().run()
+    return runs, profiler.session_bytes(at.session_state.journal)
+
+
+def _run_sessions(task):
+    page, policy_name, seed, sessions = task
+    policy = simulate.POLICIES[policy_name]
+    return [play_session(page, policy, seed, session) for session in sessions]
+
+
+def load_test(sessions, page=PAGE, policy='investigator', seed=0, workers=None):
+    """Play ``sessions`` games across worker processes; returns (per-session results, seconds)."""
+    workers = workers or os.cpu_count() or 1
+    tasks = [(str(page), policy, seed, range(start, sessions, workers)) for start in range(min(workers, sessions))]
+    started = time.perf_counter()
+    if len(tasks) == 1:
+        results = list(map(_run_sessions, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=len(tasks)) as pool:
+            results = list(pool.map(_run_sessions, tasks))
+    return [session for chunk in results for session in chunk], time.perf_counter() - started
+
+
+# --- Report ---
+def percentiles(values):
+    """Nearest-rank PERCENTILES of ``values``."""
+    ordered = sorted(values)
+    return {f'p{p}': ordered[max(0, -(-p * len(ordered) // 100) - 1)] for p in PERCENTILES}
+
+
+def summarize(results, seconds, config):
+    by_scene = collections.defaultdict(list)
+    for runs, _ in results:
+        for scene, elapsed, main, sidebar in runs:
+            by_scene[scene].append((elapsed, main, sidebar))
+    scenes = {}
+    for scene in engine.TITLES:
+        samples = by_scene.get(scene)
+        if not samples:
+            continue
+        scenes[scene] = {
+            'runs': len(samples),
+            'ms': {key: round(value * 1000, 3) for key, value in percentiles(s[0] for s in samples).items()},
+            'deltas': percentiles(s[1][0] + s[2][0] for s in samples),
+            'bytes': percentiles(s[1][1] + s[2][1] for s in samples),
+        }
+    all_runs = [run for runs, _ in results for run in runs]
+    return {
+        'config': config,
+        'python': platform.python_version(),
+        'sessions': len(results),
+        'script_runs': len(all_runs),
+        'wall_seconds': round(seconds, 3),
+        'runs_per_second': round(len(all_runs) / seconds, 1) if seconds else None,
+        'ms': {key: round(value * 1000, 3) for key, value in percentiles(run[1] for run in all_runs).items()},
+        'journal_bytes': percentiles(size for _, size in results),
+        'scenes': scenes,
+    }
+
+
+def format_report(report, baseline=None):
+    def cell(path, digits=1):
+        # The value at ``path`` in the report, with its change against the baseline.
+        new, old = report, baseline
+        for key in path:
+            new = new[key]
+            old = old.get(key) if isinstance(old, dict) else None
+        text = f'{new:,.{digits}f}'
+        if old:
+            text += f' ({(new - old) / old:+.0%})'
+        return text
+
+    lines = [
+        f'{report["sessions"]} sessions, {report["script_runs"]} script runs in {report["wall_seconds"]:.1f} s'
+        f' ({report["runs_per_second"]} runs/s)',
+        'journal bytes per session: '
+        + ', '.join(f'{key} {cell(("journal_bytes", key), 0)}' for key in report['journal_bytes']),
+        '',
+        f'{"scene":<24} {"runs":>5}  ' + '  '.join(f'{"ms " + key:>14}' for key in report['ms'])
+        + f'  {"deltas p50":>10}  {"bytes p50":>9}',
+    ]
+    for scene, row in report['scenes'].items():
+        times = '  '.join(f'{cell(("scenes", scene, "ms", key)):>14}' for key in row['ms'])
+        lines.append(f'{scene:<24} {row["runs"]:>5}  {times}  {row["deltas"]["p50"]:>10}  {row["bytes"]["p50"]:>9}')
+    times = '  '.join(f'{cell(("ms", key)):>14}' for key in report['ms'])
+    lines.append(f'{"all scenes":<24} {report["script_runs"]:>5}  {times}')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test of the Streamlit page with many AppTest sessions.')
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--policy', choices=sorted(simulate.POLICIES), default='investigator')
+    parser.add_argument('--seed', default='0')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--page', type=pathlib.Path, default=PAGE)
+    parser.add_argument('--out', type=pathlib.Path, help='write the report to this JSON file')
+    parser.add_argument('--compare', type=pathlib.Path, help='JSON report of an earlier run to compare with')
+    args = parser.parse_args(argv)
+    results, seconds = load_test(args.sessions, args.page.resolve(), args.policy, args.seed, args.workers)
+    config = {'sessions': args.sessions, 'policy': args.policy, 'seed': args.seed, 'workers': args.workers}
+    report = summarize(results, seconds, config)
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print(format_report(report, baseline))
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    main()
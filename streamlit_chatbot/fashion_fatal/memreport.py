@@ -0,0 +1,91 @@
+"""How much memory each player's session costs the server.
+
+Builds many sessions the way the page does (a Journal per player, stepped
+through the story with the session's seeded dice), keeps them all alive, and
+reports bytes per session two ways:
+
+    cd streamlit_chatbot
+    python -m fashion_fatal.memreport --sessions 1000 10000
+
+- ``traced``: growth of the Python heap (tracemalloc) while building the
+  sessions, divided by their number. This is what the process pays.
+- ``owned``: the objects reachable from one journal that are not part of
+  the compiled story, summed with sys.getsizeof. Story text and prebuilt
+  choices are shared by every session and not counted.
+
+Players stop at a random scene, so the sessions are a mix of early, middle
+and finished games, like a server under real traffic.
+"""
+
+import argparse
+import gc
+import random
+import statistics
+import time
+import tracemalloc
+
+from . import engine, profiler, simulate
+from .journal import Journal
+
+MAX_STEPS = 60 # Steps per session before giving up on reaching an ending
+
+
+def build_session(seed, policy, rng):
+    """One Journal played for a random number of steps."""
+    journal = Journal(seed=seed)
+    result = journal.apply('0', 'arrival', None)
+    for _ in range(rng.randint(0, MAX_STEPS)):
+        if not result.choices or result.choices == (engine.RESTART,):
+            break
+        picked = rng.choices(result.choices, policy(journal.state, result.choices))[0]
+        result = journal.apply(journal.next_step(), picked.scene, picked.choice)
+    return journal
+
+
+def measure(sessions, policy='investigator', seed=0):
+    """Bytes per session for ``sessions`` live sessions, plus how they were built."""
+    rng = random.Random(f'{seed}:{sessions}')
+    policy = simulate.POLICIES[policy]
+    profiler.story_objects() # Computed before tracing: it is shared, not per session
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    journals = [build_session(rng.getrandbits(64), policy, rng) for _ in range(sessions)]
+    seconds = time.perf_counter() - started
+    gc.collect()
+    traced = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    sample = journals[::max(1, sessions // 1000)]
+    owned = [profiler.session_bytes(journal) for journal in sample]
+    return {
+        'sessions': sessions,
+        'traced_per_session': traced / sessions,
+        'owned_mean': statistics.fmean(owned),
+        'owned_max': max(owned),
+        'events_mean': statistics.fmean(len(journal.events) for journal in journals),
+        'build_seconds': seconds,
+    }
+
+
+def format_report(rows):
+    lines = [f'{"sessions":>9} {"traced B/session":>17} {"owned mean":>11} {"owned max":>10} {"events":>7}']
+    for row in rows:
+        lines.append(
+            f'{row["sessions"]:>9,} {row["traced_per_session"]:>17,.0f} {row["owned_mean"]:>11,.0f}'
+            f' {row["owned_max"]:>10,} {row["events_mean"]:>7.1f}'
+        )
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Memory per live game session.')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--policy', choices=sorted(simulate.POLICIES), default='investigator')
+    parser.add_argument('--seed', default='0')
+    args = parser.parse_args(argv)
+    print(format_report([measure(count, args.policy, args.seed) for count in args.sessions]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""What the Streamlit page sends to the browser on every rerun.
+
+Plays the page headlessly with Streamlit's AppTest, clicking the buttons a
+choice policy picks, and counts the delta messages and bytes each rerun
+produces, and how long the run took. Every element written is one delta on
+the websocket, so deltas and bytes are what a player on a slow connection
+waits for:
+
+    cd streamlit_chatbot
+    python -m fashion_fatal.pagebench --games 5 --seed 1
+
+Totals are split into the main page and the sidebar, and reported for the
+whole game and for its late scenes (progress of LATE_PROGRESS or more), where
+the inventory and clue lists are longest. ``--db PATH`` turns on session
+persistence (see ``store.py``) to compare rerun latency with and without it.
+Needs ``streamlit``.
+"""
+
+import argparse
+import os
+import pathlib
+import random
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+from . import engine, simulate
+
+PAGE = pathlib.Path(__file__).resolve().parent.parent / 'chatbot.py'
+LATE_PROGRESS = 70 # Story progress from which a scene counts as late game
+MAX_STEPS = 60 # Clicks per game before giving up on reaching an ending
+MAIN, SIDEBAR = 0, 1 # Root containers in a delta path
+
+
+class Recorder:
+    """Keeps the forward messages of every script run AppTest makes."""
+
+    def __init__(self):
+        self.runs = []
+        self._run = LocalScriptRunner.run
+
+    def __enter__(self):
+        recorder = self
+
+        def run(runner, *args, **kwargs):
+            tree = recorder._run(runner, *args, **kwargs)
+            recorder.runs.append(list(runner.forward_msgs()))
+            return tree
+
+        LocalScriptRunner.run = run
+        return self
+
+    def __exit__(self, *exc):
+        LocalScriptRunner.run = self._run
+
+
+def measure(messages):
+    """(deltas, bytes) sent to the main page and the sidebar by one run."""
+    counts = {MAIN: [0, 0], SIDEBAR: [0, 0]}
+    for message in messages:
+        if message.WhichOneof('type') != 'delta':
+            continue
+        root = message.metadata.delta_path[0]
+        if root in counts:
+            counts[root][0] += 1
+            counts[root][1] += message.ByteSize()
+    return counts
+
+
+def play(page, policy, rng, samples):
+    """Click through one game, appending (progress, counts, seconds) per rerun to ``samples``."""
+    with Recorder() as recorder:
+        started = time.perf_counter()
+        at = AppTest.from_file(str(page), default_timeout=30).run()
+        for _ in range(MAX_STEPS):
+            elapsed = time.perf_counter() - started
+            journal = at.session_state.journal
+            samples.append((journal.state.story_progress, measure(recorder.runs[-1]), elapsed))
+            choices = journal.last().choices
+            if not choices or choices == (engine.RESTART,):
+                return
+            weights = policy(journal.state, choices)
+            index = rng.choices(range(len(choices)), weights)[0]
+            started = time.perf_counter()
+            at.button[index].click().run()
+
+
+def format_report(samples):
+    lines = [f'{"reruns":<10} {"part":<8} {"deltas":>8} {"bytes":>9} {"ms":>7}']
+    late = [sample for sample in samples if sample[0] >= LATE_PROGRESS]
+    for label, group in (('all', samples), ('late', late)):
+        if not group:
+            continue
+        ms = f'{statistics.fmean(seconds for _, _, seconds in group) * 1000:.1f}'
+        for part, root in (('main', MAIN), ('sidebar', SIDEBAR)):
+            deltas = statistics.fmean(counts[root][0] for _, counts, _ in group)
+            size = statistics.fmean(counts[root][1] for _, counts, _ in group)
+            lines.append(f'{f"{label} ({len(group)})":<10} {part:<8} {deltas:>8.1f} {size:>9.0f} {ms:>7}')
+            ms = ''
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Deltas and bytes per rerun of the Streamlit page.')
+    parser.add_argument('--games', type=int, default=5)
+    parser.add_argument('--policy', choices=sorted(simulate.POLICIES), default='investigator')
+    parser.add_argument('--seed', default='0')
+    parser.add_argument('--page', type=pathlib.Path, default=PAGE)
+    parser.add_argument('--db', help='persist sessions into this SQLite file while playing')
+    args = parser.parse_args(argv)
+    if args.db:
+        os.environ['FASHION_FATAL_DB'] = args.db
+    else:
+        os.environ.pop('FASHION_FATAL_DB', None)
+    rng = random.Random(args.seed)
+    samples = []
+    for _ in range(args.games):
+        # Each new session draws its dice seed from the module-level random (see Journal).
+        random.seed(rng.random())
+        play(args.page.resolve(), simulate.POLICIES[args.policy], rng, samples)
+    print(format_report(samples))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,518 @@
+"""Every button in every reachable situation, checked against a golden record.
+
+Walks the game from the first scene, playing every button on screen with
+every outcome of its dice (each skill check passed and failed, each clue
+roll hit and missed), and goes on from every state that leads to. The
+states are the real ones a player gets to; two of them are walked once if
+they are the same to the solver (see ``solver.canonical``) and still show
+the same text, so the loops back into the secret passage and the hidden
+study's searches end, and every confrontation choice is reached with every
+case the player can bring to it.
+
+Each of those steps has a transcript: the state it started from, the button,
+the dice, and the text, state, buttons and ending it led to. The golden
+record, ``golden_paths.txt``, keeps a count and a digest of every button's
+transcripts, and in full the first transcript walked of every button and
+ending, with the save code of the state it starts from:
+
+    cd streamlit_chatbot
+    python -m fashion_fatal.paths record # after an intended change
+    python -m fashion_fatal.paths check # before committing; exits 1 on any change
+    python -m fashion_fatal.paths check --quick # only the sampled transcripts, in seconds
+    python -m fashion_fatal.paths show hidden_study find_ledger --limit 3
+
+``check`` walks everything and names every button whose transcripts
+changed, appeared or went away, with a unified diff of every sampled
+transcript that changed; ``show`` prints a button's transcripts to look at.
+The walk goes one step further at a time, and each step's states are played
+in chunks spread over worker processes. ``python -m pytest tests`` replays
+the samples the same way.
+
+The sample does not hold every transcript, so a button can differ without a
+diff to show. ``record --full`` also writes every transcript to
+``golden_paths.full.xz`` (a few MB, not committed); ``check --full`` then
+prints the first differing transcript of every button.
+"""
+
+import argparse
+import array
+import collections
+import contextlib
+import difflib
+import hashlib
+import itertools
+import json
+import lzma
+import os
+import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from . import engine, render, snapshot, solver
+
+VERSION = 3 # Bump when the transcript format changes; 2: every transcript kept; 3: digests and samples
+GOLDEN_PATH = pathlib.Path(__file__).with_name('golden_paths.txt')
+FULL_PATH = pathlib.Path(__file__).with_name('golden_paths.full.xz') # Written on demand, not committed
+START = ('arrival', None) # The first step, played before any button
+CHUNK = 500 # States played per worker task
+# The confrontation picks the love interest's lines by whether their score is
+# at least ROMANCE_TEST times the difficulty's relationship gain.
+ROMANCE_TEST = 4
+
+
+class Transcript:
+    """One step from one state: what was on screen, what was pressed, what came of it."""
+
+    def __init__(self, state, option, outcome, probability, result):
+        self.state = state
+        self.option = option
+        self.outcome = outcome # (index, count) of the dice outcome
+        self.probability = probability
+        self.result = result
+
+    def parts(self):
+        """The start state, the button and dice, the state, the ending, the buttons, then the text line by line."""
+        result = self.result
+        index, count = self.outcome
+        return (
+            describe(self.state),
+            f'{self.option.label!r} -> {self.option.scene} / {self.option.choice}'
+            f' (dice outcome {index + 1} of {count}, p={self.probability:.6g})',
+            describe(result.state),
+            str(result.ending),
+            '\n'.join(f'  button: {choice.label!r} -> {choice.scene} / {choice.choice}' for choice in result.choices),
+            *render.narrative(result.blocks).markdown.split('\n'),
+        )
+
+    def text(self):
+        return _text(self.parts())
+
+
+def _text(parts):
+    start, pressed, state, ending, buttons, *narrative = parts
+    lines = [f'from: {start}', f'pressed: {pressed}', *narrative, f'state: {state}', f'ending: {ending}']
+    if buttons:
+        lines.append(buttons)
+    return '\n'.join(lines)
+
+
+def describe(state):
+    """A GameState as one line, with items and clues by id."""
+    fields = [
+        f'{name}={getattr(state, name)!r}' for name in engine.FIELDS if name not in ('inventory', 'clues_collected')
+    ]
+    fields.append(f'items={list(engine.ITEMS.ids_in(state.inventory))}')
+    fields.append(f'clues={list(engine.CLUES.ids_in(state.clues_collected))}')
+    return ' '.join(fields)
+
+
+def _seen_as(state, choices):
+    # The solver's canonical state drops what cannot change the ending; put
+    # back what still changes the text. The rest of what it drops (items,
+    # other scores, stats past their cap) only shows in the journey summary,
+    # which prints the real state walked.
+    position = min((solver.STORY_ORDER.index(option.scene) for option in choices), default=0)
+    canonical = solver.canonical(state, position)
+    won = None
+    if state.romance is not None:
+        gain = engine.DIFFICULTIES[state.difficulty].relationship_gain_multiplier
+        won = engine.points(state.scores[engine.CHARACTERS.index(state.romance)]) >= ROMANCE_TEST * gain
+    return canonical.replace(
+        romance=state.romance,
+        date_opportunity_taken=state.date_opportunity_taken,
+        interlude_response_message=state.interlude_response_message,
+    ), won, choices
+
+
+def _play(nodes):
+    """(button, transcript parts, (state, choices) it led to or None, (state, button, dice outcome))
+    of every step from a chunk of (state, choices)."""
+    played = []
+    for state, choices in nodes:
+        for option in choices:
+            if option == engine.RESTART:
+                continue
+            results = solver.outcomes(state, option.scene, option.choice)
+            for index, (probability, result) in enumerate(results):
+                transcript = Transcript(state, option, (index, len(results)), probability, result)
+                # The story ends at the confrontation, as in the solver.
+                after = None if option.scene == 'confrontation' else (result.state, result.choices)
+                played.append((f'{option.scene}/{option.choice}', transcript.parts(), after, (state, option, transcript.outcome)))
+    return played
+
+
+def walk(difficulty, pool=None):
+    """Yield (button, transcript parts, (state, button, dice outcome)) for every step reachable on ``difficulty``.
+
+    The order does not depend on ``pool``: each step's states are played in
+    chunks, and the results are taken in the order the chunks were made.
+    """
+    state = engine.GameState(difficulty=difficulty)
+    first = engine.step(state, *START, solver._ForkingRandom(()))
+    option = engine.Choice('(start)', *START)
+    yield '/'.join(map(str, START)), Transcript(state, option, (0, 1), 1.0, first).parts(), (state, option, (0, 1))
+    frontier = [(first.state, first.choices)]
+    seen = {_seen_as(*frontier[0])}
+    while frontier:
+        chunks = [frontier[start:start + CHUNK] for start in range(0, len(frontier), CHUNK)]
+        frontier = []
+        for played in (map if pool is None else pool.map)(_play, chunks):
+            for button, parts, after, source in played:
+                yield button, parts, source
+                if after is not None:
+                    node = _seen_as(*after)
+                    if node not in seen:
+                        seen.add(node)
+                        frontier.append(after)
+
+
+class Paths:
+    """The transcripts of one difficulty in the order walked, each distinct part or line stored once."""
+
+    def __init__(self, buttons=(), parts=(), transcripts=()):
+        self.buttons = list(buttons)
+        self.parts = list(parts)
+        self.transcripts = [array.array('I', row) for row in transcripts] # button id, then part ids
+        self._button_ids = {button: index for index, button in enumerate(self.buttons)}
+        self._part_ids = {part: index for index, part in enumerate(self.parts)}
+
+    def add(self, button, parts):
+        row = array.array('I', [_intern(self.buttons, self._button_ids, button)])
+        row.extend(_intern(self.parts, self._part_ids, part) for part in parts)
+        self.transcripts.append(row)
+
+    def text(self, index):
+        return _text([self.parts[i] for i in self.transcripts[index][1:]])
+
+    def keyed(self):
+        """{key: (button, hash of the transcript, index)}, keyed by the start state and the button with its dice."""
+        keyed = {}
+        for index, row in enumerate(self.transcripts):
+            parts = tuple(self.parts[i] for i in row[1:])
+            key = hash(parts[:2])
+            again = 0
+            while key in keyed: # The same state and button on another scene's page
+                again += 1
+                key = hash((parts[:2], again))
+            keyed[key] = (self.buttons[row[0]], hash(parts), index)
+        return keyed
+
+    def to_json(self):
+        return {'buttons': self.buttons, 'parts': self.parts, 'transcripts': [row.tolist() for row in self.transcripts]}
+
+
+def _intern(table, ids, value):
+    index = ids.get(value)
+    if index is None:
+        index = ids[value] = len(table)
+        table.append(value)
+    return index
+
+
+class Sample(NamedTuple):
+    difficulty: str
+    button: str
+    outcome: tuple # (index, count) of the dice outcome
+    code: str # Save code of the state the button was pressed in
+    label: str
+    text: str # The transcript
+
+
+class Summary:
+    """One difficulty's transcripts in short: a count and digest per button, and a sample in full."""
+
+    def __init__(self, difficulty):
+        self.difficulty = difficulty
+        self.digests = {} # button -> (transcripts, digest)
+        self.samples = []
+        self._sampled = set() # (button, ending) of every sample taken
+
+    def add(self, button, parts, source):
+        text = _text(parts)
+        count, digest = self.digests.get(button, (0, 0))
+        # A sum, so the digest does not depend on the order the walk found them in.
+        self.digests[button] = (count + 1, (digest + _digest(text)) % 2**64)
+        key = (button, parts[3])
+        if key not in self._sampled:
+            self._sampled.add(key)
+            state, option, outcome = source
+            code = snapshot.to_text(snapshot.Snapshot(state, option.scene, option.choice, '0', 0))
+            self.samples.append(Sample(self.difficulty, button, outcome, code, option.label, text))
+
+    @property
+    def transcripts(self):
+        return sum(count for count, _ in self.digests.values())
+
+
+def _digest(text):
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'little')
+
+
+def _pool(workers):
+    workers = workers or os.cpu_count()
+    return ProcessPoolExecutor(max_workers=workers) if workers > 1 else contextlib.nullcontext()
+
+
+def record(difficulties=tuple(engine.DIFFICULTIES), workers=None, full=False):
+    """Yield (Summary, Paths or None) of every reachable step, one difficulty at a time.
+
+    Paths, every transcript in full, is only kept with ``full``.
+    """
+    with _pool(workers) as pool:
+        for difficulty in difficulties:
+            summary, paths = Summary(difficulty), Paths() if full else None
+            for button, parts, source in walk(difficulty, pool):
+                summary.add(button, parts, source)
+                if full:
+                    paths.add(button, parts)
+            yield summary, paths
+
+
+def replay(sample):
+    """The transcript ``sample`` holds, played again from its save code."""
+    saved = snapshot.from_text(sample.code)
+    results = solver.outcomes(saved.state, saved.scene, saved.choice)
+    index, count = sample.outcome
+    if len(results) != count:
+        return f'{len(results)} dice outcomes instead of {count}'
+    probability, result = results[index]
+    option = engine.Choice(sample.label, saved.scene, saved.choice)
+    return Transcript(saved.state, option, sample.outcome, probability, result).text()
+
+
+def _replay_all(samples):
+    return [replay(sample) for sample in samples]
+
+
+def check_samples(samples, pool=None):
+    """Replay samples in chunks, on ``pool`` if given.
+
+    Returns (difficulty, button, what, diff of its first changed sample) per
+    button with a sample that changed.
+    """
+    chunks = [samples[start:start + CHUNK] for start in range(0, len(samples), CHUNK)]
+    replayed = itertools.chain.from_iterable((map if pool is None else pool.map)(_replay_all, chunks))
+    changed = collections.Counter()
+    first = {}
+    for sample, text in zip(samples, replayed):
+        if text != sample.text:
+            key = (sample.difficulty, sample.button)
+            changed[key] += 1
+            if key not in first:
+                first[key] = difflib.unified_diff(sample.text.split('\n'), text.split('\n'), 'golden', 'now', lineterm='')
+    return [(*key, f'{changed[key]} sampled transcripts changed', '\n'.join(diff)) for key, diff in first.items()]
+
+
+def compare_summaries(golden, current):
+    """(difficulty, button, what happened, '') per button whose transcripts differ."""
+    changes = []
+    for button in sorted(golden.digests.keys() | current.digests.keys()):
+        was, now = golden.digests.get(button), current.digests.get(button)
+        if was == now:
+            continue
+        if now is None:
+            what = 'no longer reachable'
+        elif was is None:
+            what = f'new, {now[0]} transcripts'
+        else:
+            what = f'changed ({was[0]} -> {now[0]} transcripts)'
+        changes.append((current.difficulty, button, what, ''))
+    return changes
+
+
+def compare(difficulty, golden, current):
+    """(difficulty, button, what happened, diff of its first differing transcript) per button whose Paths differ."""
+    before, after = golden.keyed(), current.keyed()
+    counts = collections.Counter(), collections.Counter()
+    first = {} # button -> (golden index, current index) of its first differing transcript
+    for key in before.keys() | after.keys():
+        was, now = before.get(key), after.get(key)
+        for count, entry in zip(counts, (was, now)):
+            if entry is not None:
+                count[entry[0]] += 1
+        if was is None or now is None or was[:2] != now[:2]:
+            where = (was and was[2], now and now[2])
+            for button in {entry[0] for entry in (was, now) if entry is not None}:
+                if button not in first or _order(where) < _order(first[button]):
+                    first[button] = where
+    changes = []
+    for button, (was, now) in sorted(first.items()):
+        if not counts[1][button]:
+            what = 'no longer reachable'
+        elif not counts[0][button]:
+            what = f'new, {counts[1][button]} transcripts'
+        else:
+            what = f'changed ({counts[0][button]} -> {counts[1][button]} transcripts)'
+        lines = [paths.text(index).split('\n') if index is not None else [] for paths, index in ((golden, was), (current, now))]
+        changes.append((difficulty, button, what, '\n'.join(difflib.unified_diff(*lines, 'golden', 'now', lineterm=''))))
+    return changes
+
+
+def _order(where):
+    # Walk order, so "first" means the same thing on every run.
+    return min(index for index in where if index is not None)
+
+
+# --- Golden Files ---
+_HEADER = """\
+# Golden transcripts of Fashion Fatal, written by: python -m fashion_fatal.paths record
+# "digest" lines: difficulty, button (scene/choice), transcripts, digest of them all.
+# "sample" blocks: difficulty, button, dice outcome, save code of the state, label; then the transcript.
+"""
+
+
+def save_golden(summaries, path=GOLDEN_PATH):
+    """Write Summaries as text: every digest, then every sample. Returns how many transcripts they cover."""
+    summaries = list(summaries)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(_HEADER)
+        f.write(f'version {VERSION}\n')
+        for summary in summaries:
+            for button, (count, digest) in sorted(summary.digests.items()):
+                f.write(f'digest {summary.difficulty} {button} {count} {digest:016x}\n')
+        for summary in summaries:
+            for sample in summary.samples:
+                index, count = sample.outcome
+                f.write(f'\nsample {sample.difficulty} {sample.button} {index + 1}/{count} {sample.code} '
+                        f'{json.dumps(sample.label, ensure_ascii=False)}\n')
+                f.writelines(f'| {line}\n' if line else '|\n' for line in sample.text.split('\n'))
+    return sum(summary.transcripts for summary in summaries)
+
+
+def load_golden(path=GOLDEN_PATH):
+    """The Summaries in a golden file, in the order written."""
+    summaries = {}
+    sample = None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line.startswith('|'):
+                sample[-1].append(line[2:])
+                continue
+            if sample is not None:
+                summaries[sample[0]].samples.append(Sample(*sample[:-1], '\n'.join(sample[-1])))
+                sample = None
+            if line.startswith('version '):
+                if int(line.split()[1]) != VERSION:
+                    raise SystemExit(f'{path} was recorded by another version of this tool; run record again')
+            elif line.startswith('digest '):
+                _, difficulty, button, count, digest = line.split(' ')
+                summary = summaries.setdefault(difficulty, Summary(difficulty))
+                summary.digests[button] = (int(count), int(digest, 16))
+            elif line.startswith('sample '):
+                _, difficulty, button, outcome, code, label = line.split(' ', 5)
+                index, count = map(int, outcome.split('/'))
+                sample = [difficulty, button, (index - 1, count), code, json.loads(label), []]
+    if sample is not None:
+        summaries[sample[0]].samples.append(Sample(*sample[:-1], '\n'.join(sample[-1])))
+    return list(summaries.values())
+
+
+def save_full(recorded, path=FULL_PATH):
+    """Write (difficulty, Paths) pairs, one line each after a header."""
+    with lzma.open(path, 'wt', encoding='utf-8') as f:
+        f.write(json.dumps({'version': VERSION}) + '\n')
+        for difficulty, paths in recorded:
+            f.write(f'{difficulty}\t{json.dumps(paths.to_json(), separators=(",", ":"))}\n')
+
+
+def load_full(path=FULL_PATH):
+    """Yield (difficulty, Paths) from a full record, one difficulty at a time."""
+    with lzma.open(path, 'rt', encoding='utf-8') as f:
+        if json.loads(f.readline()).get('version') != VERSION:
+            raise SystemExit(f'{path} was recorded by another version of this tool; run record --full again')
+        for line in f:
+            difficulty, _, value = line.partition('\t')
+            value = json.loads(value)
+            yield difficulty, Paths(value['buttons'], value['parts'], value['transcripts'])
+
+
+def check(path=GOLDEN_PATH, workers=None, full_path=None):
+    """Walk every difficulty and compare it with the golden record: (transcripts, changes).
+
+    With ``full_path``, each difficulty is also compared transcript by
+    transcript with that full record, for a diff of every changed button.
+    """
+    summaries = load_golden(path)
+    golden = {summary.difficulty: summary for summary in summaries}
+    full = load_full(full_path) if full_path else None
+    read = {} # Full record difficulties read ahead of the one being checked
+    transcripts = 0
+    changes = []
+    for summary, paths in record(workers=workers, full=full is not None):
+        transcripts += summary.transcripts
+        changes += compare_summaries(golden.pop(summary.difficulty, Summary(summary.difficulty)), summary)
+        if full is not None:
+            while summary.difficulty not in read:
+                name, recorded = next(full, (summary.difficulty, Paths()))
+                read[name] = recorded
+            changes += compare(summary.difficulty, read.pop(summary.difficulty), paths)
+    for summary in golden.values():
+        changes += compare_summaries(summary, Summary(summary.difficulty))
+    with _pool(workers) as pool:
+        changes += check_samples([sample for summary in summaries for sample in summary.samples], pool)
+    return transcripts, changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Golden transcripts of every button in every reachable state.')
+    parser.add_argument('--golden', type=pathlib.Path, default=GOLDEN_PATH)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    recorder = commands.add_parser('record', help='walk every path and write the golden record')
+    recorder.add_argument('--full', nargs='?', type=pathlib.Path, const=FULL_PATH,
+                          help=f'also write every transcript to FULL (default {FULL_PATH.name})')
+    checker = commands.add_parser('check', help='walk every path and compare with the golden record')
+    checker.add_argument('--full', nargs='?', type=pathlib.Path, const=FULL_PATH,
+                         help='also diff every transcript against a record written by record --full')
+    checker.add_argument('--quick', action='store_true', help='only replay the sampled transcripts')
+    shower = commands.add_parser('show', help="print a button's transcripts")
+    shower.add_argument('scene')
+    shower.add_argument('choice')
+    shower.add_argument('--difficulty', choices=list(engine.DIFFICULTIES), default='Normal')
+    shower.add_argument('--limit', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == 'show':
+        button = f'{args.scene}/{args.choice}'
+        shown = []
+        for pressed, parts, _ in walk(args.difficulty):
+            if pressed == button:
+                shown.append(_text(parts))
+                if len(shown) == args.limit:
+                    break
+        print('\n\n'.join(shown) if shown else f'{args.scene} / {args.choice} is never pressed on {args.difficulty}')
+        return
+
+    started = time.perf_counter()
+    if args.command == 'record':
+        recorded = list(record(workers=args.workers, full=args.full is not None))
+        written = save_golden((summary for summary, _ in recorded), args.golden)
+        print(f'{written:,} transcripts in {time.perf_counter() - started:.1f}s, written to {args.golden}')
+        if args.full is not None:
+            save_full(((summary.difficulty, paths) for summary, paths in recorded), args.full)
+            print(f'every transcript written to {args.full}')
+        return
+    if args.quick:
+        samples = [sample for summary in load_golden(args.golden) for sample in summary.samples]
+        with _pool(args.workers) as pool:
+            changes = check_samples(samples, pool)
+        print(f'{len(samples):,} sampled transcripts in {time.perf_counter() - started:.1f}s')
+    else:
+        transcripts, changes = check(args.golden, args.workers, args.full)
+        print(f'{transcripts:,} transcripts in {time.perf_counter() - started:.1f}s')
+    print(f'{len(changes)} buttons differ from the golden record' if changes else 'all identical to the golden record')
+    for difficulty, button, what, _ in changes:
+        print(f'  {difficulty:<7} {button:<48} {what}')
+    first = next((change for change in changes if change[3]), None)
+    if first is not None:
+        difficulty, button, _, diff = first
+        print(f'\nfirst difference, {difficulty} {button}:\n{diff}')
+    elif changes and not args.full:
+        print('\nno sampled transcript changed; run record --full on the last good commit and check --full for a diff')
+    raise SystemExit(1 if changes else 0)
+
+
+if __name__ == '__main__':
+    main()
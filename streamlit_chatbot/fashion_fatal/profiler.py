@@ -0,0 +1,213 @@
+"""Opt-in profiling of the Streamlit page on real traffic.
+
+Turn it on for every session with ``FASHION_FATAL_PROFILE=1`` (or set it to
+the path of the trace file), or for one browser with ``?profile=1`` in the
+URL. Each rerun of a profiled session then records:
+
+- how long each named section of the page took,
+- how many ``st.*`` calls each section made (elements, containers, widgets),
+- how many skill checks and clue rolls the scene step made (0 when the step
+  was already in the journal),
+- how many bytes the session's journal holds.
+
+The record is shown in a "Profile" expander in the sidebar and appended as
+one JSON line to the trace file, so slow scenes and busy sections can be
+found with ``jq`` or pandas instead of guessed:
+
+    profile = Profile(scene='hidden_study')
+    st = profile.count_calls(st)
+    with profile.section('story'):
+        ...
+    append_trace(trace_path(os.environ), profile.finish())
+
+``OFF`` has the same section interface and does nothing, so the page can
+keep its ``with`` blocks when profiling is off.
+
+This module must never import streamlit.
+"""
+
+import collections
+import contextlib
+import functools
+import gc
+import json
+import sys
+import threading
+import time
+import types
+
+from . import engine
+
+PROFILE_ENV = 'FASHION_FATAL_PROFILE'
+DEFAULT_TRACE = 'fashion_fatal_profile.jsonl'
+
+
+def requested(environ, params):
+    """Whether this rerun should be profiled."""
+    return bool(environ.get(PROFILE_ENV)) or params.get('profile') == '1'
+
+
+def trace_path(environ):
+    value = environ.get(PROFILE_ENV)
+    return value if value and value != '1' else DEFAULT_TRACE
+
+
+# --- Counting ---
+class _CountingRandom:
+    """Passes draws through to ``rng`` and counts them by kind."""
+
+    def __init__(self, rng, counts):
+        self._rng = rng
+        self._counts = counts
+
+    def randint(self, low, high):
+        self._counts['skill_checks'] += 1 # _Turn.skill_check rolls randint(1, 5)
+        return self._rng.randint(low, high)
+
+    def random(self):
+        self._counts['clue_rolls'] += 1
+        return self._rng.random()
+
+
+class _Counted:
+    """Counts calls made through a module or container, by dotted name.
+
+    Attributes that are containers (``st.sidebar``) and calls that return
+    one (``st.sidebar.expander(...)``) are wrapped too, so their calls are
+    counted under their own prefix.
+    """
+
+    __slots__ = ('_target', '_name', '_profile')
+
+    def __init__(self, target, name, profile):
+        self._target = target
+        self._name = name
+        self._profile = profile
+
+    def __getattr__(self, attr):
+        value = getattr(self._target, attr)
+        name = f'{self._name}.{attr}'
+        if not callable(value):
+            return _Counted(value, name, self._profile) if hasattr(value, '__enter__') else value
+
+        @functools.wraps(value)
+        def counted(*args, **kwargs):
+            self._profile.count(name)
+            result = value(*args, **kwargs)
+            return _Counted(result, name, self._profile) if hasattr(result, '__enter__') else result
+        return counted
+
+    def __enter__(self):
+        return self._target.__enter__()
+
+    def __exit__(self, *exc):
+        return self._target.__exit__(*exc)
+
+
+# --- Profiles ---
+class Profile:
+    """Timings and counts of one rerun."""
+
+    def __init__(self, **context):
+        self.context = context
+        self.sections = {}
+        self.calls = collections.Counter() # Dotted st.* name -> calls
+        self.section_calls = collections.Counter() # Section -> st.* calls made in it
+        self.rolls = collections.Counter()
+        self._section = None
+        self._started = time.perf_counter()
+
+    @contextlib.contextmanager
+    def section(self, name):
+        outer, self._section = self._section, name
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections[name] = self.sections.get(name, 0) + time.perf_counter() - started
+            self._section = outer
+
+    def count(self, name):
+        self.calls[name] += 1
+        self.section_calls[self._section or 'other'] += 1
+
+    def count_calls(self, module, name='st'):
+        return _Counted(module, name, self)
+
+    def rng(self, rng):
+        return _CountingRandom(rng, self.rolls)
+
+    def finish(self, **extra):
+        """The record of this rerun as a JSON-ready dict."""
+        return {
+            'time': time.time(),
+            **self.context,
+            **extra,
+            'total_ms': round((time.perf_counter() - self._started) * 1000, 3),
+            'sections_ms': {name: round(seconds * 1000, 3) for name, seconds in self.sections.items()},
+            'section_calls': dict(self.section_calls),
+            'calls': dict(self.calls),
+            'rolls': {'skill_checks': self.rolls['skill_checks'], 'clue_rolls': self.rolls['clue_rolls']},
+        }
+
+
+class _Off:
+    """The Profile interface, doing nothing."""
+
+    @staticmethod
+    def section(name):
+        return contextlib.nullcontext()
+
+
+OFF = _Off()
+
+_TRACE_LOCK = threading.Lock() # Sessions run on their own threads
+
+
+def append_trace(path, record):
+    line = json.dumps(record, separators=(',', ':')) + '\n'
+    with _TRACE_LOCK, open(path, 'a', encoding='utf-8') as trace:
+        trace.write(line)
+
+
+# --- Memory ---
+_NOT_OWNED = (types.ModuleType, type, types.FunctionType, types.BuiltinFunctionType)
+
+
+@functools.lru_cache(maxsize=None)
+def story_objects():
+    """Ids of everything the compiled story holds on to, which all sessions share."""
+    seen = set()
+    stack = [engine.STORY]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (types.ModuleType, type)):
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, types.FunctionType):
+            # Follow closures but not __globals__, which would reach every module.
+            stack.extend(cell.cell_contents for cell in obj.__closure__ or () if cell.cell_contents is not None)
+            stack.extend(obj.__defaults__ or ())
+        else:
+            stack.extend(gc.get_referents(obj))
+    return frozenset(seen)
+
+
+def deep_size(obj, shared=frozenset()):
+    """Bytes of ``obj`` and everything it references, except the ids in ``shared``."""
+    seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or id(obj) in shared or obj is None or isinstance(obj, (bool, *_NOT_OWNED)):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return size
+
+
+def session_bytes(obj):
+    """Memory a session's own objects take, not counting the shared story."""
+    return deep_size(obj, story_objects())
@@ -0,0 +1,54 @@
+"""Bitset registries for items and clues.
+
+Every item and clue in ``story.json`` has a short id and a display name. The
+registry gives each id one bit, so a GameState stores its inventory and its
+clues as two plain ints:
+
+    >>> items = Registry([('photo', '📱 Suspicious Photo'), ('key', '🗝️ Tarnished Key')])
+    >>> held = items.bit('photo') | items.bit('key')
+    >>> bool(held & items.bit('key')), items.names(held)
+    (True, ['📱 Suspicious Photo', '🗝️ Tarnished Key'])
+
+Membership is one AND, counting evidence is ``(held & mask).bit_count()``,
+and names are only looked up when something is drawn on screen.
+"""
+
+
+class Registry:
+    """Ids in a fixed order, each owning one bit of a mask."""
+
+    __slots__ = ('ids', '_names', '_bits')
+
+    def __init__(self, entries):
+        entries = list(entries)
+        self.ids = tuple(entry_id for entry_id, _ in entries)
+        self._names = tuple(name for _, name in entries)
+        self._bits = {entry_id: 1 << index for index, entry_id in enumerate(self.ids)}
+        if len(self._bits) != len(self.ids):
+            raise ValueError('registry ids must be unique')
+
+    def __contains__(self, entry_id):
+        return entry_id in self._bits
+
+    def __len__(self):
+        return len(self.ids)
+
+    def bit(self, entry_id):
+        return self._bits[entry_id]
+
+    def mask(self, entry_ids):
+        mask = 0
+        for entry_id in entry_ids:
+            mask |= self._bits[entry_id]
+        return mask
+
+    def name(self, entry_id):
+        return self._names[self.ids.index(entry_id)]
+
+    def ids_in(self, mask):
+        """The ids whose bits are set in ``mask``, in registry order."""
+        return [entry_id for index, entry_id in enumerate(self.ids) if mask >> index & 1]
+
+    def names(self, mask):
+        """Display names for the bits set in ``mask``, in registry order."""
+        return [name for index, name in enumerate(self._names) if mask >> index & 1]
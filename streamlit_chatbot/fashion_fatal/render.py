@@ -0,0 +1,38 @@
+"""A scene's story text as one markdown payload.
+
+A StepResult carries the scene as a list of small blocks: paragraphs, lone
+"---" separators, subheaders. Drawing them one by one costs one element and
+one websocket delta each. ``narrative`` joins them into a single markdown
+string instead, with subheaders as ``###`` headings (what ``st.subheader``
+draws), and notes whether the scene ends in balloons.
+
+Block text is already final: fixed text is built once when the story loads,
+and "fill" text is filled from precompiled templates during the step. The
+payload is cached by the blocks themselves, so every session reaching the
+same scene with the same variable pieces shares one string.
+"""
+
+import functools
+from typing import NamedTuple
+
+
+class Narrative(NamedTuple):
+    markdown: str
+    balloons: bool = False # Confetti for a victory!
+
+
+@functools.lru_cache(maxsize=4096)
+def narrative(blocks):
+    """Join a tuple of Blocks into one Narrative."""
+    parts = []
+    balloons = False
+    for block in blocks:
+        if block.kind == 'subheader':
+            parts.append(f'### {block.text}')
+        elif block.kind == 'balloons':
+            balloons = True
+        else:
+            parts.append(block.text)
+    # Blank lines keep every block its own paragraph, so a "---" stays a rule
+    # instead of underlining the paragraph before it.
+    return Narrative('\n\n'.join(parts), balloons)
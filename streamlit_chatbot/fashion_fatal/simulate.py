@@ -0,0 +1,141 @@
+"""Monte Carlo playthroughs of Fashion Fatal.
+
+Plays the story from 'arrival' to 'confrontation' many times with a choice
+policy and reports how often each ending happens, per difficulty:
+
+    cd streamlit_chatbot
+    python -m fashion_fatal.simulate --runs 1000000 --policy investigator --seed 7
+
+Runs are split into fixed-size chunks and every chunk gets its own RNG seeded
+from (seed, difficulty, chunk number). The same seed therefore gives the same
+report no matter how many worker processes share the work.
+"""
+
+import argparse
+import collections
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from . import engine
+
+CHUNK_SIZE = 10_000 # Playthroughs per task handed to a worker
+MAX_STEPS = 500 # Safety net; a normal run takes about a dozen steps
+UNFINISHED = 'unfinished' # Reported when a run never resolves an ending
+
+
+# --- Choice Policies ---
+# A policy gives a weight to every choice on offer. The simulator samples from
+# the weights; the exact solver uses the same weights as probabilities.
+def uniform(state, choices):
+    return [1] * len(choices)
+
+
+# Choices that gather evidence or earn support, and how much more likely the
+# investigator is to pick them than anything else.
+INVESTIGATOR_WEIGHTS = {
+    'observe_initial': 3,
+    'creative_design': 2,
+    'spy_rivals': 3,
+    'help_jennifer': 2,
+    'confront_blake_sabotage': 3,
+    'ask_maya_incident': 3,
+    'talk_maya_party': 3,
+    'examine_bracelet': 2,
+    'find_east_wing_clue': 3,
+    'press_blake': 3,
+    'find_ledger': 4,
+    'examine_document': 4,
+    'decipher_letter_search': 4,
+    'find_hidden_camera': 4,
+    'find_locket_half': 4,
+    'decipher_cryptic_note': 4,
+}
+
+
+def investigator(state, choices):
+    return [INVESTIGATOR_WEIGHTS.get(c.choice, 1) for c in choices]
+
+
+POLICIES = {
+    'uniform': uniform,
+    'investigator': investigator,
+}
+
+
+# --- Playthroughs ---
+def play(difficulty, policy, rng, settings=None):
+    """Play one run and return its ending (or UNFINISHED) and the final state.
+
+    ``settings`` is a Difficulty to play with instead of ``difficulty``'s own,
+    as in ``engine.step``.
+    """
+    result = engine.step(engine.GameState(difficulty=difficulty), 'arrival', None, rng, settings)
+    for _ in range(MAX_STEPS):
+        weights = policy(result.state, result.choices)
+        picked = rng.choices(result.choices, weights)[0]
+        result = engine.step(result.state, picked.scene, picked.choice, rng, settings)
+        if picked.scene == 'confrontation':
+            return result.ending or UNFINISHED, result.state
+    return UNFINISHED, result.state
+
+
+def chunk_seed(seed, difficulty, chunk):
+    # String seeds are hashed with SHA-512, so they are stable across processes.
+    return f'{seed}:{difficulty}:{chunk}'
+
+
+def _run_chunk(task):
+    seed, difficulty, policy_name, chunk, runs = task
+    rng = random.Random(chunk_seed(seed, difficulty, chunk))
+    policy = POLICIES[policy_name]
+    return difficulty, collections.Counter(play(difficulty, policy, rng)[0] for _ in range(runs))
+
+
+def simulate(runs, difficulties=tuple(engine.DIFFICULTIES), policy='uniform', seed=0, workers=None):
+    """Play ``runs`` playthroughs per difficulty and count the endings.
+
+    Returns {difficulty: Counter(ending -> count)}.
+    """
+    tasks = []
+    for difficulty in difficulties:
+        for chunk, start in enumerate(range(0, runs, CHUNK_SIZE)):
+            tasks.append((seed, difficulty, policy, chunk, min(CHUNK_SIZE, runs - start)))
+
+    if workers == 1 or len(tasks) == 1:
+        results = list(map(_run_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_chunk, tasks))
+
+    totals = {difficulty: collections.Counter() for difficulty in difficulties}
+    for difficulty, counts in results:
+        totals[difficulty].update(counts)
+    return totals
+
+
+def format_report(totals):
+    outcomes = engine.ENDINGS + (UNFINISHED,)
+    lines = []
+    for difficulty, counts in totals.items():
+        runs = sum(counts.values())
+        lines.append(f'{difficulty} ({runs:,} runs)')
+        for ending in outcomes:
+            share = counts[ending] / runs if runs else 0
+            lines.append(f'  {ending:<22} {counts[ending]:>10,}  {share:7.2%}')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Monte Carlo ending distribution for Fashion Fatal.')
+    parser.add_argument('--runs', type=int, default=100_000, help='playthroughs per difficulty')
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='uniform')
+    parser.add_argument('--difficulty', nargs='+', choices=list(engine.DIFFICULTIES), default=list(engine.DIFFICULTIES))
+    parser.add_argument('--seed', default='0')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+    totals = simulate(args.runs, args.difficulty, args.policy, args.seed, args.workers)
+    print(format_report(totals))
+
+
+if __name__ == '__main__':
+    main()
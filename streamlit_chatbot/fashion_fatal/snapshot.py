@@ -0,0 +1,328 @@
+"""Save codes: a whole session in a few dozen bytes.
+
+A Snapshot is the state a player entered their current scene with, the scene
+and choice that got them there, the step id and the session seed. Because
+the dice of a step come from (seed, step id), that is enough to play the
+scene again exactly as the player saw it (see ``journal.resume``).
+
+``encode`` packs a Snapshot into bytes and ``decode`` unpacks it;
+``to_text`` and ``from_text`` wrap those in URL-safe base64 for pasting:
+
+    code = snapshot.to_text(journal.save())
+    journal = resume(snapshot.from_text(code))
+
+The format is a magic prefix, a version byte, then unsigned varints (signed
+numbers zigzag-encoded). Items, clues, scenes, difficulties and characters
+are written as positions in the LAYOUTS entry of that version, not in the
+live story, and decoding maps them back by id. So when the story gains an
+item or a character, freeze the new lists as the next version: older codes
+keep decoding through their own layout, and anything the new story no longer
+has is dropped. Characters missing from an old save, like Maya once was,
+keep their starting score.
+"""
+
+import base64
+from typing import NamedTuple
+
+from . import engine
+
+MAGIC = b'FF'
+
+
+class SnapshotError(ValueError):
+    """A save code that cannot be written or read."""
+
+
+class Snapshot(NamedTuple):
+    state: engine.GameState # State the current scene was entered with
+    scene: str
+    choice: object # Choice id, or None
+    step: str # Step id of the current scene; numeric
+    seed: int # Session seed for the dice
+
+
+class Layout(NamedTuple):
+    """The ids a version writes positions into. Frozen once released."""
+    items: tuple
+    clues: tuple
+    scenes: tuple
+    characters: tuple
+    difficulties: tuple = ('Easy', 'Normal', 'Hard')
+    fashion_scores: tuple = ('Low', 'Medium', 'High')
+
+
+LAYOUTS = {
+    1: Layout(
+        items=(
+            'faded_invitation', 'chess_piece', 'suspicious_photo', 'broken_bracelet', 'blake_confession',
+            'maya_observation', 'jordan_map', 'tarnished_key', 'gossip_snippet', 'cryptic_note', 'coded_letter',
+            'marcelline_ledger', 'locket_fragment', 'ancient_document', 'hidden_camera', 'locket_complete',
+            'garden_dead_drop',
+        ),
+        clues=(
+            'faded_invitation', 'chess_piece', 'suspicious_photo', 'broken_bracelet', 'blake_confession',
+            'maya_observation', 'jordan_map', 'tarnished_key', 'gossip_snippet', 'cryptic_note',
+            'benefactor_letter', 'ledger_location', 'examined_chess_piece', 'examined_bracelet', 'mv_initials',
+            'deciphered_note', 'ledger_crimes', 'ancient_document', 'benefactor_plot', 'hidden_camera',
+            'locket_complete', 'garden_dead_drop', 'brooch_connection',
+        ),
+        scenes=(
+            'arrival', 'pre_challenge_mingling', 'design_challenge', 'backstage_incident', 'rooftop_party',
+            'romance_interlude', 'midnight_ball', 'secret_passage', 'hidden_study', 'marcelline_trap',
+            'confrontation',
+        ),
+        characters=('Alex', 'Jordan', 'Taylor', 'Blake', 'Maya', 'Jennifer'),
+    ),
+}
+VERSION = max(LAYOUTS) # Written by encode
+
+
+# --- Bit remapping ---
+def _remap(source_ids, target_ids):
+    """(bit, bit) pairs moving each id shared by two id lists to its new position."""
+    target = {entry_id: index for index, entry_id in enumerate(target_ids)}
+    return tuple(
+        (1 << index, 1 << target[entry_id])
+        for index, entry_id in enumerate(source_ids)
+        if entry_id in target
+    )
+
+
+def _translate(mask, pairs):
+    out = 0
+    for source, target in pairs:
+        if mask & source:
+            out |= target
+    return out
+
+
+class _Codec:
+    """Translation tables between one layout and the live story."""
+
+    def __init__(self, layout):
+        self.layout = layout
+        self.same_items = layout.items == engine.ITEMS.ids
+        self.same_clues = layout.clues == engine.CLUES.ids
+        self.items_in = _remap(layout.items, engine.ITEMS.ids)
+        self.clues_in = _remap(layout.clues, engine.CLUES.ids)
+        self.items_out = _remap(engine.ITEMS.ids, layout.items)
+        self.clues_out = _remap(engine.CLUES.ids, layout.clues)
+        self.scene_index = {scene: index for index, scene in enumerate(layout.scenes)}
+        self.character_index = {name: index for index, name in enumerate(layout.characters)}
+        # Live ids the layout cannot express; saving such a state needs a new version.
+        self.unknown_items = engine.ITEMS.mask(set(engine.ITEMS.ids) - set(layout.items))
+        self.unknown_clues = engine.CLUES.mask(set(engine.CLUES.ids) - set(layout.clues))
+
+
+_CODECS = {}
+
+
+def _codec(version):
+    codec = _CODECS.get(version)
+    if codec is None:
+        if version not in LAYOUTS:
+            raise SnapshotError(f'unknown save version {version}')
+        codec = _CODECS[version] = _Codec(LAYOUTS[version])
+    return codec
+
+
+# --- Varints ---
+def _put(out, number):
+    while number > 0x7F:
+        out.append(number & 0x7F | 0x80)
+        number >>= 7
+    out.append(number)
+
+
+def _put_signed(out, number):
+    _put(out, number << 1 if number >= 0 else (-number << 1) - 1)
+
+
+def _put_text(out, text):
+    data = text.encode()
+    _put(out, len(data))
+    out += data
+
+
+class _Reader:
+    __slots__ = ('data', 'at')
+
+    def __init__(self, data, at):
+        self.data = data
+        self.at = at
+
+    def number(self):
+        data = self.data
+        shift = result = 0
+        while True:
+            try:
+                byte = data[self.at]
+            except IndexError:
+                raise SnapshotError('save code is cut short') from None
+            self.at += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def signed(self):
+        number = self.number()
+        return number >> 1 if not number & 1 else -((number + 1) >> 1)
+
+    def text(self):
+        size = self.number()
+        end = self.at + size
+        if end > len(self.data):
+            raise SnapshotError('save code is cut short')
+        text = self.data[self.at:end].decode()
+        self.at = end
+        return text
+
+    def pick(self, options, what):
+        index = self.number()
+        if index >= len(options):
+            raise SnapshotError(f'save code has an unknown {what}')
+        return options[index]
+
+    @staticmethod
+    def character(number, layout):
+        # Characters are written 1-based, see encode.
+        if number > len(layout.characters):
+            raise SnapshotError('save code has an unknown character')
+        return layout.characters[number - 1]
+
+
+# Relationship scores are ints in half points (see story.points). The low bit
+# marked a float score in saves made before that, when Easy and Hard gains of
+# 1.5x and 0.5x left floats in the state; the half points read the same.
+def _put_score(out, score):
+    if not isinstance(score, int):
+        raise SnapshotError(f'cannot save relationship score {score!r}')
+    _put_signed(out, score << 1)
+
+
+def _read_score(reader):
+    return reader.signed() >> 1
+
+
+# --- Encoding ---
+_DATE_TAKEN, _DIALOGUE_UNLOCKED, _HAS_CHOICE = 1, 2, 4
+
+
+def encode(snapshot):
+    """Pack a Snapshot into bytes, using the newest layout."""
+    codec = _codec(VERSION)
+    layout = codec.layout
+    state = snapshot.state
+    if state.inventory & codec.unknown_items or state.clues_collected & codec.unknown_clues:
+        raise SnapshotError(f'the story has items or clues save version {VERSION} does not know; add a layout')
+    if snapshot.scene not in codec.scene_index:
+        raise SnapshotError(f'save version {VERSION} does not know scene {snapshot.scene!r}; add a layout')
+    if not snapshot.step.isdigit():
+        raise SnapshotError(f'step id {snapshot.step!r} is not a number')
+    out = bytearray(MAGIC)
+    out.append(VERSION)
+    _put(out, snapshot.seed)
+    _put(out, int(snapshot.step))
+    _put(out, codec.scene_index[snapshot.scene])
+    flags = (
+        state.date_opportunity_taken * _DATE_TAKEN
+        | state.final_romance_dialogue_unlocked * _DIALOGUE_UNLOCKED
+        | (snapshot.choice is not None) * _HAS_CHOICE
+    )
+    _put(out, flags)
+    if snapshot.choice is not None:
+        _put_text(out, snapshot.choice)
+    _put(out, layout.difficulties.index(state.difficulty))
+    _put(out, layout.fashion_scores.index(state.fashion_score))
+    _put(out, state.story_progress)
+    _put_signed(out, state.player_observant)
+    _put_signed(out, state.social_grace)
+    _put(out, state.inventory if codec.same_items else _translate(state.inventory, codec.items_out))
+    _put(out, state.clues_collected if codec.same_clues else _translate(state.clues_collected, codec.clues_out))
+    # Characters are 1-based so 0 can mean "no romance" or "name follows".
+    if state.romance is not None and state.romance not in codec.character_index:
+        raise SnapshotError(f'save version {VERSION} does not know character {state.romance!r}; add a layout')
+    _put(out, 0 if state.romance is None else codec.character_index[state.romance] + 1)
+    pairs = [(name, score) for name, score in zip(engine.CHARACTERS, state.scores) if score is not None]
+    _put(out, len(pairs))
+    for name, score in pairs:
+        index = codec.character_index.get(name)
+        _put(out, 0 if index is None else index + 1)
+        if index is None:
+            _put_text(out, name)
+        _put_score(out, score)
+    _put_text(out, state.interlude_response_message)
+    return bytes(out)
+
+
+def decode(data):
+    """Unpack bytes written by ``encode`` of any released version."""
+    if data[:len(MAGIC)] != MAGIC or len(data) <= len(MAGIC):
+        raise SnapshotError('not a Fashion Fatal save code')
+    codec = _codec(data[len(MAGIC)])
+    layout = codec.layout
+    reader = _Reader(data, len(MAGIC) + 1)
+    try:
+        seed = reader.number()
+        step = str(reader.number())
+        scene = reader.pick(layout.scenes, 'scene')
+        flags = reader.number()
+        choice = reader.text() if flags & _HAS_CHOICE else None
+        difficulty = reader.pick(layout.difficulties, 'difficulty')
+        fashion_score = reader.pick(layout.fashion_scores, 'fashion score')
+        progress = reader.number()
+        observant = reader.signed()
+        social = reader.signed()
+        inventory = reader.number()
+        clues = reader.number()
+        romance = reader.number()
+        romance = None if romance == 0 else reader.character(romance, layout)
+        scores = []
+        for _ in range(reader.number()):
+            index = reader.number()
+            name = reader.text() if index == 0 else reader.character(index, layout)
+            scores.append((name, _read_score(reader)))
+        message = reader.text()
+    except UnicodeDecodeError:
+        raise SnapshotError('save code has broken text') from None
+    if reader.at != len(data):
+        raise SnapshotError('save code has trailing bytes')
+    if not codec.same_items:
+        inventory = _translate(inventory, codec.items_in)
+    if not codec.same_clues:
+        clues = _translate(clues, codec.clues_in)
+    # Characters the story has gained since this save keep their starting
+    # score, and characters it has dropped are ignored.
+    scores = engine.scores_from_pairs((name, score) for name, score in scores if name in engine.CHARACTER_INDEX)
+    if scene not in engine.TITLES:
+        scene, choice = engine.STORY.start, None
+    state = engine.GameState().replace(
+        inventory=inventory,
+        romance=romance,
+        fashion_score=fashion_score,
+        scores=scores,
+        clues_collected=clues,
+        story_progress=progress,
+        date_opportunity_taken=bool(flags & _DATE_TAKEN),
+        final_romance_dialogue_unlocked=bool(flags & _DIALOGUE_UNLOCKED),
+        interlude_response_message=message,
+        player_observant=observant,
+        social_grace=social,
+        difficulty=difficulty,
+    )
+    return Snapshot(state, scene, choice, step, seed)
+
+
+def to_text(snapshot):
+    """A save code to show or paste: URL-safe base64 without padding."""
+    return base64.urlsafe_b64encode(encode(snapshot)).rstrip(b'=').decode('ascii')
+
+
+def from_text(text):
+    text = ''.join(text.split())
+    try:
+        data = base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+    except ValueError:
+        raise SnapshotError('not a Fashion Fatal save code') from None
+    return decode(data)
@@ -0,0 +1,399 @@
+"""Exact ending probabilities for Fashion Fatal.
+
+Instead of sampling playthroughs like ``simulate.py``, this walks the graph
+of reachable game states once and computes the probability of every ending
+under a choice policy:
+
+    cd streamlit_chatbot
+    python -m fashion_fatal.solver --policy uniform investigator
+
+Every random draw in a step is enumerated. The draws are only ever compared
+with a target, so each one branches into a pass and a fail: a skill check
+``randint(1, 5) <= target`` passes with probability target / 5, and a clue
+roll ``random() < p`` hits with probability p. States that only differ in
+display details (progress bar, pending interlude message, items nothing
+looks at any more) are canonicalized and solved once, however many routes
+lead to them.
+
+Retrying a failed search in the hidden study leaves the state unchanged, so
+those loops come back to the same node. They are solved in closed form: a
+node that returns to itself with probability q has value b / (1 - q).
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import engine, graph, story
+from .simulate import POLICIES, UNFINISHED
+
+OUTCOMES = engine.ENDINGS + (UNFINISHED,)
+DIE_SIDES = 5 # Skill checks roll randint(1, 5)
+STORY_ORDER = tuple(engine.TITLES) # Scenes only ever move forward through this list
+
+# --- Relevance ---
+# The last scene whose rules test each item, clue or flag. Once the player has
+# moved past that scene it can no longer change the ending, so the solver
+# forgets it. Anything no scene tests (the Gossip Snippet, the Garden Dead
+# Drop, most clues, the romance scores) is only ever shown. Items and clues
+# come from the scene graph, so a story edit cannot leave them stale.
+_GRAPH = graph.extract(json.loads(story.STORY_PATH.read_text(encoding='utf-8')))
+
+
+def _last_read(kind):
+    last = {}
+    for scene in STORY_ORDER:
+        for key in _GRAPH.reads[scene][kind]:
+            last[key] = scene
+    return last
+
+
+LAST_READ_ITEMS = _last_read('items')
+LAST_READ_CLUES = _last_read('clues')
+# The flags are tested again later, but only to pick dialogue and the scores of
+# characters who do not decide the ending, which the graph cannot tell apart
+# from a test that matters. So they are listed by hand, and checked against the
+# graph below.
+LAST_READ_FLAGS = {
+    'romance': 'rooftop_party', # Offers the interlude; later it only picks dialogue
+    'date_opportunity_taken': 'midnight_ball',
+}
+
+
+def _check_flags():
+    for flag, scene in LAST_READ_FLAGS.items():
+        if flag not in _GRAPH.reads[scene]['names']:
+            raise story.StoryError(f'{scene} no longer tests {flag}; update solver.LAST_READ_FLAGS')
+
+
+_check_flags()
+
+# Only these two scores decide anything (whether Blake and Maya testify, which
+# needs a score above zero). After the last scene that changes them only that
+# sign is kept.
+ENDING_CHARACTERS = ('Blake', 'Maya')
+LAST_SCORE_CHANGE = 'secret_passage'
+
+
+def _still_read(last_read, position):
+    return [key for key, scene in last_read.items() if STORY_ORDER.index(scene) >= position]
+
+
+# STORY_ORDER position -> (item mask, clue mask, flags) still read from that scene onwards.
+_STILL_READ = [
+    (
+        engine.ITEMS.mask(_still_read(LAST_READ_ITEMS, position)),
+        engine.CLUES.mask(_still_read(LAST_READ_CLUES, position)),
+        frozenset(_still_read(LAST_READ_FLAGS, position)),
+    )
+    for position in range(len(STORY_ORDER))
+]
+
+
+def canonical(state, position=0):
+    """Drop the parts of a state that cannot change how the story ends.
+
+    ``position`` is the index in STORY_ORDER of the earliest scene the player
+    can go to next; anything whose last reader comes before it is dropped.
+    Stats are capped where their checks saturate: once every skill check
+    passes, a higher stat leads to the same endings. Without the cap,
+    accepting Marcelline's invitation again and again would grow the graph
+    forever.
+    """
+    items, clues, flags = _STILL_READ[position]
+    threshold = engine.DIFFICULTIES[state.difficulty].skill_check_threshold
+    always_passes = max(DIE_SIDES - threshold, 0)
+    settled = position > STORY_ORDER.index(LAST_SCORE_CHANGE)
+    scores = []
+    for name, score in zip(engine.CHARACTERS, state.scores):
+        if score is None:
+            pass # Not met yet
+        elif name not in ENDING_CHARACTERS:
+            score = 0
+        elif settled:
+            score = int(score > 0)
+        scores.append(score)
+    return state.replace(
+        inventory=state.inventory & items,
+        clues_collected=state.clues_collected & clues,
+        scores=tuple(scores),
+        romance=state.romance if 'romance' in flags else None,
+        date_opportunity_taken=state.date_opportunity_taken and 'date_opportunity_taken' in flags,
+        # The bluff check compares the observant stat with the threshold itself.
+        player_observant=min(state.player_observant, max(always_passes, threshold)),
+        social_grace=min(state.social_grace, always_passes),
+        story_progress=0,
+        interlude_response_message='',
+    )
+
+
+# --- Enumerating Random Draws ---
+class _Fork(Exception):
+    """Raised by _ForkingRandom when a step reaches a draw it has no value for yet."""
+
+    def __init__(self, branches):
+        self.branches = branches # [(value to replay, probability), ...]
+
+
+class _Die:
+    """Stands in for randint(low, high) so the solver can see the target it must beat."""
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def __le__(self, target):
+        sides = self.high - self.low + 1
+        passes = min(max(target - self.low + 1, 0), sides) / sides
+        # Replaying ``low`` passes the check and ``high`` fails it.
+        raise _Fork([(value, p) for value, p in ((self.low, passes), (self.high, 1 - passes)) if p > 0])
+
+
+class _Threshold:
+    """Stands in for random() so the solver can see what it is compared against."""
+
+    def __lt__(self, chance):
+        branches = [(0.0, chance), (1.0, 1 - chance)] # 0.0 < chance is a hit, 1.0 < chance a miss
+        raise _Fork([(value, p) for value, p in branches if p > 0])
+
+
+class _ForkingRandom:
+    """Replays a fixed script of draws, then forks on the next one."""
+
+    def __init__(self, script):
+        self.script = script
+        self.position = 0
+
+    def _next(self):
+        if self.position < len(self.script):
+            value = self.script[self.position]
+            self.position += 1
+            return value
+        return None
+
+    def randint(self, low, high):
+        value = self._next()
+        return _Die(low, high) if value is None else value
+
+    def random(self):
+        value = self._next()
+        return _Threshold() if value is None else value
+
+
+def outcomes(state, scene, choice):
+    """Every possible result of one step, as [(probability, StepResult), ...]."""
+    results = []
+    pending = [((), 1.0)]
+    while pending:
+        script, probability = pending.pop()
+        try:
+            result = engine.step(state, scene, choice, _ForkingRandom(script))
+        except _Fork as fork:
+            pending.extend((script + (value,), probability * p) for value, p in fork.branches)
+        else:
+            results.append((probability, result))
+    return results
+
+
+# --- Solving ---
+class StateGraph:
+    """The reachable canonical states and the transitions between them.
+
+    Built lazily while solving. It does not depend on the policy, so one graph
+    is shared by every policy that is solved.
+    """
+
+    def __init__(self):
+        self.nodes = [] # node id -> (canonical state, choices on screen)
+        self._ids = {}
+        self._edges = {} # (node id, choice index) -> [(probability, ending, child node id)]
+
+    def node_id(self, result):
+        # The future depends only on the state and the buttons on screen.
+        position = min((STORY_ORDER.index(option.scene) for option in result.choices), default=0)
+        node = (canonical(result.state, position), result.choices)
+        node_id = self._ids.get(node)
+        if node_id is None:
+            node_id = self._ids[node] = len(self.nodes)
+            self.nodes.append(node)
+        return node_id
+
+    def edges(self, node_id, index):
+        key = (node_id, index)
+        if key not in self._edges:
+            state, choices = self.nodes[node_id]
+            option = choices[index]
+            final = option.scene == 'confrontation' # The story ends here; there is no next node
+            self._edges[key] = [
+                (p, result.ending, None if final else self.node_id(result))
+                for p, result in outcomes(state, option.scene, option.choice)
+            ]
+        return self._edges[key]
+
+    def start(self, difficulty):
+        result = engine.step(engine.GameState(difficulty=difficulty), 'arrival', None, _ForkingRandom(()))
+        return self.node_id(result)
+
+
+_OUTCOME_INDEX = {outcome: index for index, outcome in enumerate(OUTCOMES)}
+
+
+class Solver:
+    """Ending probabilities for every node of a StateGraph under one policy."""
+
+    def __init__(self, policy, graph=None):
+        self.policy = policy
+        self.graph = StateGraph() if graph is None else graph
+        self.values = {} # node id -> [probability of each outcome, in OUTCOMES order]
+        self._open = set() # nodes on the current search path, to catch cycles
+
+    def value(self, node_id):
+        if node_id in self.values:
+            return self.values[node_id]
+        if node_id in self._open:
+            raise ValueError(f'story graph has a cycle through {self.graph.nodes[node_id][1]}')
+        self._open.add(node_id)
+
+        state, choices = self.graph.nodes[node_id]
+        weights = self.policy(state, choices)
+        total_weight = sum(weights)
+        totals = [0.0] * len(OUTCOMES)
+        stay = 0.0 # Probability of coming straight back to this node
+        for index, weight in enumerate(weights):
+            if not weight:
+                continue
+            share = weight / total_weight
+            final = choices[index].scene == 'confrontation'
+            for p, ending, child in self.graph.edges(node_id, index):
+                p *= share
+                if final:
+                    totals[_OUTCOME_INDEX[ending or UNFINISHED]] += p
+                elif child == node_id:
+                    stay += p
+                else:
+                    for outcome, q in enumerate(self.value(child)):
+                        totals[outcome] += p * q
+
+        if stay >= 1 - 1e-12:
+            totals = [0.0] * len(OUTCOMES)
+            totals[_OUTCOME_INDEX[UNFINISHED]] = 1.0 # Nothing ever leaves this node
+        elif stay:
+            totals = [q / (1 - stay) for q in totals]
+        self._open.discard(node_id)
+        self.values[node_id] = totals
+        return totals
+
+    def solve(self, difficulty):
+        """Return {outcome: probability} for a new game on ``difficulty``."""
+        return dict(zip(OUTCOMES, self.value(self.graph.start(difficulty))))
+
+
+OPTIMAL = 'optimal' # Policy name for OptimalSolver on the command line
+
+
+class OptimalSolver:
+    """The best chance of one ending from every node (expectimax).
+
+    Where ``Solver`` averages over a policy's choices, this takes the best
+    choice at every node and the expectation over the dice, so ``best[node]``
+    is the index of the button a player wanting ``goal`` should press. A
+    choice that can come straight back to the same node (a failed search) is
+    worth b / (1 - q): the player keeps trying it until something happens.
+    """
+
+    def __init__(self, goal=engine.PUBLIC_VICTORY, graph=None):
+        self.goal = goal
+        self.graph = StateGraph() if graph is None else graph
+        self.values = {} # node id -> best probability of reaching the goal
+        self.best = {} # node id -> index of the choice that gets it
+        self._open = set()
+
+    def value(self, node_id):
+        if node_id in self.values:
+            return self.values[node_id]
+        if node_id in self._open:
+            raise ValueError(f'story graph has a cycle through {self.graph.nodes[node_id][1]}')
+        self._open.add(node_id)
+
+        state, choices = self.graph.nodes[node_id]
+        best_value, best_stay, best_index = 0.0, 1.0, None
+        for index, option in enumerate(choices):
+            final = option.scene == 'confrontation'
+            total = stay = 0.0
+            for p, ending, child in self.graph.edges(node_id, index):
+                if final:
+                    total += p if ending == self.goal else 0.0
+                elif child == node_id:
+                    stay += p
+                else:
+                    total += p * self.value(child)
+            value = 0.0 if stay >= 1 - 1e-12 else total / (1 - stay)
+            # On a tie (often when the goal is already out of reach), prefer the
+            # choice that moves the story on over one that comes back here.
+            if best_index is None or value > best_value + 1e-12 or (value > best_value - 1e-12 and stay < best_stay):
+                best_value, best_stay, best_index = value, stay, index
+
+        self._open.discard(node_id)
+        self.values[node_id] = best_value
+        self.best[node_id] = best_index
+        return best_value
+
+    def solve(self, difficulty):
+        """The best chance of ``goal`` in a new game on ``difficulty``."""
+        return self.value(self.graph.start(difficulty))
+
+
+def _solve_difficulty(task):
+    difficulty, policies = task
+    graph = StateGraph() # Difficulty is part of the state, so graphs never overlap
+    values = {
+        name: {engine.PUBLIC_VICTORY: OptimalSolver(graph=graph).solve(difficulty)} if name == OPTIMAL
+        else Solver(POLICIES[name], graph).solve(difficulty)
+        for name in policies
+    }
+    return difficulty, values, len(graph.nodes)
+
+
+def solve_all(policies=('uniform',), difficulties=tuple(engine.DIFFICULTIES), workers=None):
+    """Return {(policy, difficulty): {outcome: probability}} and the number of states visited.
+
+    Each difficulty is solved in its own worker process. The OPTIMAL policy
+    only reports its chance of a public victory.
+    """
+    tasks = [(difficulty, tuple(policies)) for difficulty in difficulties]
+    if workers == 1 or len(tasks) == 1:
+        results = list(map(_solve_difficulty, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_solve_difficulty, tasks))
+
+    report = {}
+    nodes = 0
+    for difficulty, values, count in results:
+        for name in policies:
+            report[name, difficulty] = values[name]
+        nodes += count
+    return report, nodes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Exact ending probabilities for Fashion Fatal.')
+    parser.add_argument('--policy', nargs='+', choices=sorted(POLICIES) + [OPTIMAL], default=['uniform'])
+    parser.add_argument('--difficulty', nargs='+', choices=list(engine.DIFFICULTIES), default=list(engine.DIFFICULTIES))
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    report, nodes = solve_all(args.policy, args.difficulty, args.workers)
+    elapsed = time.perf_counter() - started
+    for (policy, difficulty), values in report.items():
+        print(f'{policy} / {difficulty}')
+        for outcome in OUTCOMES:
+            if outcome in values:
+                print(f'  {outcome:<22} {values[outcome]:.6f}')
+    print(f'{nodes:,} distinct states solved in {elapsed:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""What starting a process and dispatching a scene cost.
+
+The old page was one script with an ``if scene == 'arrival': ... elif scene
+== 'confrontation'`` chain over all eleven scenes. Now ``story.json`` is
+compiled once per process into one function per scene, and ``engine.step``
+finds the scene with a dict lookup. This benchmark times both halves:
+
+    cd streamlit_chatbot
+    python -m fashion_fatal.startbench
+
+- startup, in fresh processes: importing the engine (which compiles the
+  story), reading story.json and compiling it again through
+  ``story.compile_story`` with the case table and each scene timed on its
+  own, and playing the first step;
+- reruns: finding a scene by dict lookup against the same scenes behind an
+  if/elif chain (the old dispatch), and running each scene's step.
+
+Per-scene compile times show what loading scenes lazily would save: it is
+paid once per process, and it is also where mistakes in the story file are
+caught, so every scene is compiled up front.
+"""
+
+import argparse
+import json
+import pathlib
+import random
+import statistics
+import subprocess
+import sys
+import timeit
+
+from . import engine
+
+PACKAGE_ROOT = pathlib.Path(__file__).resolve().parent.parent # Where fashion_fatal imports from
+
+# Run in a fresh interpreter, so nothing is imported or compiled yet.
+_STARTUP = """
+import json, time
+started = time.perf_counter()
+from fashion_fatal import engine, story
+phases = {'import engine (compiles story)': time.perf_counter() - started}
+mark = time.perf_counter()
+with open(story.STORY_PATH, encoding='utf-8') as f:
+    data = json.load(f)
+phases['read story.json'] = time.perf_counter() - mark
+scenes = {}
+mark = time.perf_counter()
+def compiled(scene_id):
+    global mark
+    now = time.perf_counter()
+    if scene_id is None:
+        phases['compile case table'] = now - mark
+    else:
+        scenes[scene_id] = now - mark
+    mark = now
+story.compile_story(data, frozenset(engine.FIELDS), engine.CHARACTERS, compiled)
+phases['compile all scenes'] = sum(scenes.values())
+mark = time.perf_counter()
+engine.step(engine.GameState(), 'arrival', None, __import__('random').Random(0))
+phases['first step'] = time.perf_counter() - mark
+print(json.dumps({'phases': phases, 'scenes': scenes}))
+"""
+
+
+def startup(runs=5):
+    """Median phase and per-scene compile times over ``runs`` fresh processes, in seconds."""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', _STARTUP], cwd=PACKAGE_ROOT, check=True, capture_output=True, text=True,
+        ).stdout
+        samples.append(json.loads(output))
+
+    def median(key, name):
+        return statistics.median(sample[key][name] for sample in samples)
+
+    return {
+        'phases': {name: median('phases', name) for name in samples[0]['phases']},
+        'scenes': {name: median('scenes', name) for name in samples[0]['scenes']},
+    }
+
+
+def _chain(scenes):
+    # The old page's dispatch: one comparison per scene until the right one.
+    lines = ['def dispatch(scene):']
+    for index, scene_id in enumerate(scenes):
+        lines.append(f'    {"if" if index == 0 else "elif"} scene == {scene_id!r}:')
+        lines.append(f'        return scenes[{scene_id!r}]')
+    namespace = {'scenes': scenes}
+    exec('\n'.join(lines), namespace)
+    return namespace['dispatch']
+
+
+def reruns(number=20_000):
+    """Per scene: (lookup seconds, if/elif chain seconds, step seconds) for one rerun."""
+    scenes = engine.STORY.scenes
+    chain = _chain(scenes)
+    lookup = scenes.get
+    # A state and choice that reach each scene, taken from seeded playthroughs.
+    rng = random.Random(0)
+    arrivals = {'arrival': (engine.GameState(), None)}
+    for _ in range(100):
+        result = engine.step(engine.GameState(), 'arrival', None, rng)
+        while result.choices and result.choices != (engine.RESTART,):
+            picked = rng.choice(result.choices)
+            arrivals.setdefault(picked.scene, (result.state, picked.choice))
+            result = engine.step(result.state, picked.scene, picked.choice, rng)
+    timings = {}
+    for scene_id in scenes:
+        looked_up = min(timeit.repeat(lambda: lookup(scene_id), number=number, repeat=5)) / number
+        chained = min(timeit.repeat(lambda: chain(scene_id), number=number, repeat=5)) / number
+        stepped = None
+        if scene_id in arrivals:
+            state, choice = arrivals[scene_id]
+            dice = random.Random(1)
+            stepped = min(timeit.repeat(
+                lambda: engine.step(state, scene_id, choice, dice), number=number // 10, repeat=5,
+            )) / (number // 10)
+        timings[scene_id] = (looked_up, chained, stepped)
+    return timings
+
+
+def format_report(start, timings):
+    lines = ['startup (median of fresh processes)']
+    lines += [f'  {name:<32} {seconds * 1000:8.2f} ms' for name, seconds in start['phases'].items()]
+    lines += [
+        '',
+        f'{"scene":<24} {"compile ms":>10} {"lookup ns":>10} {"if/elif ns":>11} {"step us":>8}',
+    ]
+    for scene_id, (looked_up, chained, stepped) in timings.items():
+        step_text = '-' if stepped is None else f'{stepped * 1e6:.1f}'
+        lines.append(
+            f'{scene_id:<24} {start["scenes"][scene_id] * 1000:>10.3f} {looked_up * 1e9:>10.0f}'
+            f' {chained * 1e9:>11.0f} {step_text:>8}'
+        )
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Startup and scene dispatch micro-benchmark.')
+    parser.add_argument('--processes', type=int, default=5, help='fresh processes to time startup in')
+    args = parser.parse_args(argv)
+    print(format_report(startup(args.processes), reruns()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""The "Game Status" panel as text, built once per distinct state.
+
+The sidebar shows stats, relationships, inventory, clues, how strong the
+case against Marcelline is, and progress. Only those parts of a GameState
+matter to it, so ``digest`` reduces a state to
+them, and ``panel`` turns a digest into one markdown string plus the progress
+value. Panels are cached by digest: the many reruns and sessions that sit on
+the same state share one string, and the page draws it as two elements
+instead of one element per line.
+"""
+
+import functools
+from typing import NamedTuple
+
+from . import engine
+
+
+class Panel(NamedTuple):
+    markdown: str
+    progress: int # Percent, for the progress bar
+
+
+def digest(state):
+    """The fields of ``state`` the panel shows, as a hashable tuple."""
+    return (
+        state.fashion_score,
+        state.player_observant,
+        state.social_grace,
+        state.scores,
+        state.romance,
+        state.inventory,
+        state.clues_collected,
+        state.story_progress,
+        engine.STORY.case.assess(state), # Bitset counts, so O(1) per rerun
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def panel(digest):
+    fashion, observant, social, scores, romance, inventory, clues, progress, case = digest
+    lines = [
+        '## Your Stats',
+        f'**Fashion Score:** {fashion}  ',
+        f'**Observant:** {observant}  ',
+        f'**Social Grace:** {social}',
+        '',
+        '## Relationships',
+    ]
+    for character, score in zip(engine.CHARACTERS, scores):
+        if score is None:
+            continue # Not met yet
+        # Indicate chosen romance interest
+        marker = ' *(Romantic Interest)*' if romance == character else ''
+        lines.append(f'**{character}:** {engine.points(score)} / 5{marker}  ')
+    # Items and clues are bitsets in the state; their names are looked up only here.
+    lines += ['', '## Inventory']
+    lines += [f'- {item}' for item in engine.ITEMS.names(inventory)] or ['Empty']
+    lines += ['', '## Clues Collected']
+    lines += [f'- {clue}' for clue in engine.CLUES.names(clues)] or ['None yet...']
+    if case.needed:
+        held = min(case.points, case.needed)
+        evidence = dict(case.tallies).get('evidence', 0)
+        lines += [
+            '',
+            '## Case Strength',
+            f'{"▰" * held}{"▱" * (case.needed - held)} **{case.points} / {case.needed}** toward exposing Marcelline  ',
+            f'Evidence: {evidence} · Witnesses: {", ".join(case.witnesses) or "none yet"}',
+        ]
+    lines += ['', '## Story Progress']
+    return Panel('\n'.join(lines), progress)
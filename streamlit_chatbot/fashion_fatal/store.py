@@ -0,0 +1,114 @@
+"""Sessions kept in SQLite, so a deploy or crash does not end anyone's game.
+
+A SessionStore maps a session token (kept in the page URL) to the latest save
+code of that session (see ``snapshot.py``). ``put`` never touches the disk:
+it only parks the bytes in a dict, where a newer save of the same session
+replaces an older one. A background thread wakes every FLUSH_INTERVAL
+seconds, or as soon as BATCH_SIZE sessions are waiting, and writes all of
+them in one transaction:
+
+    store = SessionStore('sessions.db')
+    store.put(token, snapshot.encode(journal.save())) # returns at once
+    saved = store.get(token) # bytes or None, pending writes included
+
+The database runs in WAL mode, so the writer never blocks the occasional
+read of a reconnecting player. A flush that fails (say, the database is
+locked by another process) is rolled back and its saves wait for the next
+one, unless a newer save of the same session came in meanwhile (see
+``writebehind.py``). ``close`` (also run at exit) flushes what is left.
+"""
+
+import sqlite3
+import threading
+import time
+
+from .writebehind import WriteBehind
+
+FLUSH_INTERVAL = 0.5 # Seconds between background flushes
+BATCH_SIZE = 256 # Waiting sessions that trigger an early flush
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    token TEXT PRIMARY KEY,
+    snapshot BLOB NOT NULL,
+    updated REAL NOT NULL
+)
+"""
+
+
+class SessionStore(WriteBehind):
+    """Write-behind map of session token -> save code bytes."""
+
+    write_errors = (sqlite3.Error,)
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE):
+        self.path = str(path)
+        self.batch_size = batch_size
+        self._pending = {} # token -> (bytes, time), not yet on disk
+        self._flushing = {} # The batch being written right now
+        self._lock = threading.Lock() # Guards _pending and _flushing
+        # One connection each for writing and reading, shared by all threads.
+        self._connection = self._connect()
+        self._connection.execute(_SCHEMA)
+        self._reader = self._connect()
+        self._read_lock = threading.Lock()
+        self._start_writer('session-store-writer', flush_interval)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        # With WAL, NORMAL only risks the last transactions on power loss, not corruption.
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def put(self, token, data):
+        """Remember ``data`` for ``token``; it reaches the disk with the next flush."""
+        with self._lock:
+            self._pending[token] = (bytes(data), time.time())
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.wake()
+
+    def get(self, token):
+        """The latest bytes put for ``token``, or None."""
+        with self._lock:
+            pending = self._pending.get(token) or self._flushing.get(token)
+        if pending is not None:
+            return pending[0]
+        with self._read_lock:
+            row = self._reader.execute('SELECT snapshot FROM sessions WHERE token = ?', (token,)).fetchone()
+        return None if row is None else row[0]
+
+    def _take(self):
+        with self._lock:
+            batch = self._flushing = self._pending
+            self._pending = {}
+        return batch
+
+    def _write(self, batch):
+        rows = [(token, data, updated) for token, (data, updated) in batch.items()]
+        try:
+            self._connection.execute('BEGIN')
+            self._connection.executemany(
+                'INSERT INTO sessions (token, snapshot, updated) VALUES (?, ?, ?) '
+                'ON CONFLICT (token) DO UPDATE SET snapshot = excluded.snapshot, updated = excluded.updated',
+                rows,
+            )
+            self._connection.execute('COMMIT')
+        except sqlite3.Error:
+            if self._connection.in_transaction:
+                self._connection.execute('ROLLBACK')
+            raise
+        with self._lock:
+            self._flushing = {}
+
+    def _requeue(self, batch):
+        with self._lock:
+            for token, saved in batch.items():
+                self._pending.setdefault(token, saved) # A newer save of the session wins
+            self._flushing = {}
+
+    def _release(self):
+        self._connection.close()
+        with self._read_lock:
+            self._reader.close()
@@ -0,0 +1,731 @@
+"""The Fashion Fatal story as data.
+
+Every scene lives in ``story.json``: its title, the progress it sets and a
+list of actions that write text, change the state and offer buttons. This
+module reads that file once per process, checks it, and compiles each scene
+into a plain function ``run(turn, session, choice)``. ``engine.step`` looks
+the scene up by id and calls it, so every session shares one read-only copy
+of the story and nothing is rebuilt on a rerun.
+
+Actions are JSON objects named by their first key:
+
+    {"write": "text"}                      show a paragraph ("fill": true formats {fields})
+    {"subheader": "text"}, {"balloons": true}
+    {"button": "label", "to": "scene", "choice": "id", "if": <condition>}
+    {"if": <condition>, "then": [...], "else": [...]}
+    {"on_choice": {"id": [...], ...}, "else": [...]}  branch on the choice that led here
+    {"check": "stat", "pass": [...], "fail": [...]}   skill check against a stat
+    {"roll": 0.6, "hit": [...], "miss": [...]}        clue roll with a base chance
+    {"set": {"field": value}}, {"add": {"stat": 1}}
+    {"score": {"name": 1}}                 relationship change, times the difficulty gain
+    {"set_score": {"name": 5}}               names are engine.CHARACTERS ("fill" allowed)
+    {"give": "item", "clue": "clue"}       add an item (and its clue) unless already held
+    {"note": "clue"}, {"drop": "item"}     items and clues are named by their registry ids
+    {"let": {"name": <value>}}, {"inc": {"name": <value>}}  scene-local values
+    {"set_choice": "id"}, {"end": "ending"}, {"restart": true}
+    {"end": "ending", "score": <value>}    the points the ending was decided on
+    {"include": "block"}                   splice in a shared list from "blocks"
+
+The "case" table scores the player's case against Marcelline from the state
+alone: "tallies" name sets of evidence ({"items": [...], "clues": [...]}),
+"witnesses" map a character to the item that makes them back the player up
+(with a positive score), and "points" lists conditions of which "needed" must
+hold for the strongest ending. Scenes read these through {"case": name}, and
+``Story.case.assess(state)`` gives the same numbers to the sidebar.
+
+Conditions and values are a name (a local, a state field, "threshold" or
+"gain"), a literal, or one of {"has": item}, {"knows": clue}, {"is": [name,
+literal]}, {"not": x}, {"all": [...]}, {"any": [...]}, {"ge": [a, b]},
+{"gt": [a, b]}, {"score": name}, {"mul": [a, b]}, {"count": [...]},
+{"holding": {"items": [...], "clues": [...]}} (how many of them are held),
+{"case": tally, witness or "points"} and {"choice_in": [ids]}.
+
+Mistakes in the file (an unknown scene, item, clue or action) raise
+StoryError when it is loaded, not halfway through somebody's game.
+"""
+
+import functools
+import json
+import pathlib
+import string
+from typing import NamedTuple
+
+from .registry import Registry
+
+STORY_PATH = pathlib.Path(__file__).with_name('story.json')
+VERSION = 3 # 2: items and clues became registries of {id, name}; 3: the "case" table
+
+
+class StoryError(ValueError):
+    """story.json does not describe a valid story."""
+
+
+class Choice(NamedTuple):
+    label: str # Button text
+    scene: str # Scene the button leads to
+    choice: object # Choice id passed to that scene (None for a plain visit)
+
+
+class Block(NamedTuple):
+    kind: str # 'write', 'subheader' or 'balloons'
+    text: str = ''
+
+
+class Scene(NamedTuple):
+    title: str
+    progress: int # story_progress set on every visit
+    run: object # run(turn, session, choice)
+
+
+class Assessment(NamedTuple):
+    points: int # How many of the case's "points" conditions hold
+    needed: int # Points the strongest ending asks for
+    tallies: tuple # (tally name, pieces held), in story order
+    witnesses: tuple # Characters who would back the player up
+
+
+class Case:
+    """The compiled "case" table.
+
+    Tallies are one mask per registry, so counting evidence is two ANDs and
+    two popcounts however many items the story adds.
+    """
+
+    __slots__ = ('tallies', 'witnesses', 'points', 'needed')
+
+    def __init__(self, tallies=(), witnesses=(), points=(), needed=0):
+        self.tallies = tuple(tallies) # (name, item mask, clue mask)
+        self.witnesses = tuple(witnesses) # (name, score index, item bit)
+        self.points = tuple(points) # Compiled conditions
+        self.needed = needed
+
+    def assess(self, state):
+        """The case as it stands for ``state`` (a GameState or a running session)."""
+        run = _Run(None, state, None)
+        return Assessment(
+            sum(1 for point in self.points if point(run)),
+            self.needed,
+            tuple((name, _tally(state, items, clues)) for name, items, clues in self.tallies),
+            tuple(name for name, index, item in self.witnesses if _supports(state, index, item)),
+        )
+
+
+def _tally(s, items, clues):
+    return (s.inventory & items).bit_count() + (s.clues_collected & clues).bit_count()
+
+
+# Relationship scores are kept in half points, so the 1.5x and 0.5x gains of
+# Easy and Hard stay exact ints; the story reads and writes them as 0-5 points.
+HALF_POINTS = 2 # Score units per relationship point
+
+
+def points(score):
+    """A score in half points on the 0-5 scale: 3 for 6, 1.5 for 3."""
+    whole, half = divmod(score, HALF_POINTS)
+    return score / HALF_POINTS if half else whole
+
+
+def _supports(s, index, item):
+    score = s.scores[index]
+    return s.inventory & item != 0 and score is not None and score > 0
+
+
+class Story(NamedTuple):
+    title: str # Page title for unknown scenes
+    start: str
+    endings: tuple
+    items: Registry
+    clues: Registry
+    scenes: dict # scene id -> Scene
+    case: Case = Case()
+
+    @property
+    def titles(self):
+        return {scene_id: scene.title for scene_id, scene in self.scenes.items()}
+
+
+@functools.lru_cache(maxsize=None)
+def load_story(path=STORY_PATH, fields=frozenset(), characters=()):
+    """Read, check and compile a story file. Cached, so each file is compiled once.
+
+    ``fields`` are the GameState field names that actions may read and set,
+    and ``characters`` the names in the order of the state's scores tuple.
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != VERSION:
+        raise StoryError(f'{path}: expected story version {VERSION}, got {data.get("version")!r}')
+    return compile_story(data, fields, characters)
+
+
+def compile_story(data, fields=frozenset(), characters=(), compiled=None):
+    """Check and compile parsed story data; ``load_story`` after reading the file.
+
+    ``compiled``, if given, is called with None once the case table is
+    compiled and then with each scene id as that scene is, for benchmarks.
+    """
+    return _Compiler(data, fields, characters).story(compiled or _nothing)
+
+
+# --- Running Scenes ---
+class _Run:
+    """What one scene run can see: the turn, the session, the choice and its locals."""
+
+    __slots__ = ('t', 's', 'choice', 'values')
+
+    def __init__(self, t, s, choice):
+        self.t = t
+        self.s = s
+        self.choice = choice
+        self.values = {}
+
+
+# Fields "fill" text may use besides the state's own, computed from the session.
+_COMPUTED_FIELDS = {
+    'romance_id': lambda s, items, clues: s.romance.lower(),
+    'romance_text': lambda s, items, clues: s.romance if s.romance else 'None',
+    'inventory_text': lambda s, items, clues: ', '.join(items.names(s.inventory)) or 'None',
+    'clues_text': lambda s, items, clues: ', '.join(clues.names(s.clues_collected)) or 'None',
+    'relationship_scores': lambda s, items, clues: dict(s.relationship_scores), # Shown as {name: score}
+}
+
+
+class _Template:
+    """A "fill" string parsed once at load time.
+
+    The {field} names are swapped for positions, so filling it is a single
+    str.format call over the looked-up values.
+    """
+
+    __slots__ = ('text', 'getters')
+
+    def __init__(self, text, items, clues):
+        pieces = []
+        getters = []
+        for literal, field, spec, conversion in string.Formatter().parse(text):
+            pieces.append(literal.replace('{', '{{').replace('}', '}}'))
+            if field is None:
+                continue
+            compute = _COMPUTED_FIELDS.get(field)
+            if compute is None:
+                getters.append(lambda s, name=field: getattr(s, name))
+            else:
+                getters.append(lambda s, compute=compute: compute(s, items, clues))
+            conversion = f'!{conversion}' if conversion else ''
+            spec = f':{spec}' if spec else ''
+            pieces.append(f'{{{len(getters) - 1}{conversion}{spec}}}')
+        self.text = ''.join(pieces)
+        self.getters = tuple(getters)
+
+    def fill(self, s):
+        return self.text.format(*[get(s) for get in self.getters])
+
+
+class _Static(NamedTuple):
+    """Output that never depends on the state, built once at load time."""
+    blocks: tuple
+    choices: tuple
+
+
+def _emit(static):
+    blocks, choices = static
+
+    def emit(run):
+        run.t.blocks.extend(blocks)
+        run.t.choices.extend(choices)
+    return emit
+
+
+def _sequence(steps):
+    # Runs of fixed text and buttons are merged into a single extend() call.
+    merged = []
+    for step in steps:
+        if isinstance(step, _Static) and merged and isinstance(merged[-1], _Static):
+            merged[-1] = _Static(merged[-1].blocks + step.blocks, merged[-1].choices + step.choices)
+        else:
+            merged.append(step)
+    steps = [_emit(step) if isinstance(step, _Static) else step for step in merged]
+    if len(steps) == 1:
+        return steps[0]
+
+    def run_all(run):
+        for step in steps:
+            step(run)
+    return run_all
+
+
+def _nothing(run):
+    pass
+
+
+# --- Checking and Compiling ---
+class _Compiler:
+    def __init__(self, data, fields, characters):
+        self.data = data
+        self.fields = frozenset(fields)
+        self.characters = {name: index for index, name in enumerate(characters)}
+        self.scene_ids = frozenset(data.get('scenes', {}))
+        self.items = self._registry('items')
+        self.clues = self._registry('clues')
+        self.endings = tuple(data.get('endings', ()))
+        self.blocks = data.get('blocks', {})
+        self.locals = set()
+        self._including = []
+        self.case = Case()
+        self._in_case = False # Compiling case points, which run without a turn
+
+    def fail(self, where, message):
+        raise StoryError(f'{where}: {message}')
+
+    def _registry(self, key):
+        entries = self.data.get(key, [])
+        if not all(isinstance(entry, dict) and {'id', 'name'} <= entry.keys() for entry in entries):
+            self.fail(key, 'every entry needs an "id" and a "name"')
+        try:
+            return Registry((entry['id'], entry['name']) for entry in entries)
+        except ValueError as error:
+            self.fail(key, str(error))
+
+    def _template(self, text, where):
+        self._check_template(text, where)
+        return _Template(text, self.items, self.clues)
+
+    def story(self, compiled):
+        data = self.data
+        if data.get('start') not in self.scene_ids:
+            self.fail('start', f'unknown scene {data.get("start")!r}')
+        self.case = self._case(data.get('case', {}))
+        compiled(None)
+        scenes = {}
+        for scene_id, scene in data['scenes'].items():
+            where = f'scenes.{scene_id}'
+            if not isinstance(scene.get('title'), str) or not isinstance(scene.get('progress'), int):
+                self.fail(where, 'needs a "title" string and a "progress" number')
+            self.locals = self._locals(scene['do'])
+            body = self.actions(scene['do'], f'{where}.do')
+            scenes[scene_id] = Scene(scene['title'], scene['progress'], self._scene(scene['progress'], body))
+            compiled(scene_id)
+        return Story(data.get('title', ''), data['start'], self.endings, self.items, self.clues, scenes, self.case)
+
+    def _case(self, case):
+        tallies = []
+        for name, held in case.get('tallies', {}).items():
+            where = f'case.tallies.{name}'
+            if not isinstance(held, dict) or not held.keys() <= {'items', 'clues'}:
+                self.fail(where, 'expected {"items": [...], "clues": [...]}')
+            tallies.append((name, self._mask(held.get('items', ()), self._item, where),
+                            self._mask(held.get('clues', ()), self._clue, where)))
+        witnesses = [
+            (name, self._character(name, f'case.witnesses.{name}'), self._item(item, f'case.witnesses.{name}'))
+            for name, item in case.get('witnesses', {}).items()
+        ]
+        needed = case.get('needed', 0)
+        if not isinstance(needed, int):
+            self.fail('case.needed', 'expected a number')
+        # Points are read outside any scene, so only the state and the table are in scope.
+        self.locals = set()
+        self.case = Case(tallies, witnesses, needed=needed) # For {"case": ...} inside the points
+        self._in_case = True
+        try:
+            points = self._values(case.get('points', []), 'case.points')
+        finally:
+            self._in_case = False
+        return Case(tallies, witnesses, points, needed)
+
+    @staticmethod
+    def _scene(progress, body):
+        def run_scene(t, s, choice):
+            s.story_progress = progress
+            body(_Run(t, s, choice))
+        return run_scene
+
+    def _locals(self, actions):
+        """Every name a scene binds with "let" or "inc", so later reads know it is local."""
+        names = set()
+        included = set()
+        stack = [actions]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                for key in ('let', 'inc'):
+                    if isinstance(node.get(key), dict):
+                        names.update(node[key])
+                block = node.get('include')
+                if isinstance(block, str) and block not in included:
+                    included.add(block)
+                    stack.append(self.blocks.get(block, []))
+                stack.extend(node.values())
+            elif isinstance(node, list):
+                stack.extend(node)
+        return names
+
+    # --- Actions ---
+    def actions(self, actions, where):
+        if not isinstance(actions, list):
+            self.fail(where, 'expected a list of actions')
+        steps = [self.action(action, f'{where}[{index}]') for index, action in enumerate(actions)]
+        return _sequence(steps) if steps else _nothing
+
+    def action(self, action, where):
+        if not isinstance(action, dict) or not action:
+            self.fail(where, 'expected an action object')
+        kind = next(iter(action))
+        compile_action = getattr(self, f'_action_{kind}', None)
+        if compile_action is None:
+            self.fail(where, f'unknown action {kind!r}')
+        return compile_action(action, where)
+
+    def _branch(self, action, key, where):
+        return self.actions(action.get(key, []), f'{where}.{key}')
+
+    def _action_write(self, action, where):
+        text = action['write']
+        if action.get('fill'):
+            template = self._template(text, where)
+            return lambda run: run.t.write(template.fill(run.s))
+        return _Static((Block('write', text),), ())
+
+    def _action_subheader(self, action, where):
+        return _Static((Block('subheader', action['subheader']),), ())
+
+    def _action_balloons(self, action, where):
+        return _Static((Block('balloons'),), ())
+
+    def _action_button(self, action, where):
+        label, scene, choice = action['button'], action.get('to'), action.get('choice')
+        if scene not in self.scene_ids:
+            self.fail(where, f'button leads to unknown scene {scene!r}')
+        condition = self.value(action['if'], f'{where}.if') if 'if' in action else None
+        if action.get('fill'):
+            label = self._template(label, where)
+            if choice is not None:
+                choice = self._template(choice, where)
+
+            def button(run):
+                choice_id = None if choice is None else choice.fill(run.s)
+                run.t.button(label.fill(run.s), scene, choice_id)
+        elif condition is None:
+            return _Static((), (Choice(label, scene, choice),))
+        else:
+            prebuilt = Choice(label, scene, choice)
+
+            def button(run):
+                run.t.choices.append(prebuilt)
+        if condition is None:
+            return button
+
+        def maybe_button(run):
+            if condition(run):
+                button(run)
+        return maybe_button
+
+    def _action_if(self, action, where):
+        condition = self.value(action['if'], f'{where}.if')
+        then = self._branch(action, 'then', where)
+        otherwise = self._branch(action, 'else', where)
+
+        def run_if(run):
+            if condition(run):
+                then(run)
+            else:
+                otherwise(run)
+        return run_if
+
+    def _action_on_choice(self, action, where):
+        branches = {
+            choice: self.actions(steps, f'{where}.on_choice.{choice}')
+            for choice, steps in action['on_choice'].items()
+        }
+        otherwise = self._branch(action, 'else', where)
+        return lambda run: branches.get(run.choice, otherwise)(run)
+
+    def _action_check(self, action, where):
+        stat = self._field(action['check'], where)
+        passed = self._branch(action, 'pass', where)
+        failed = self._branch(action, 'fail', where)
+
+        def run_check(run):
+            if run.t.skill_check(getattr(run.s, stat), stat):
+                passed(run)
+            else:
+                failed(run)
+        return run_check
+
+    def _action_roll(self, action, where):
+        chance = action['roll']
+        hit = self._branch(action, 'hit', where)
+        miss = self._branch(action, 'miss', where)
+
+        def run_roll(run):
+            if run.t.clue_roll(chance):
+                hit(run)
+            else:
+                miss(run)
+        return run_roll
+
+    def _action_set(self, action, where):
+        changes = [(self._field(name, where), value) for name, value in action['set'].items()]
+
+        def run_set(run):
+            for name, value in changes:
+                setattr(run.s, name, value)
+        return run_set
+
+    def _action_add(self, action, where):
+        changes = [(self._field(name, where), amount) for name, amount in action['add'].items()]
+
+        def run_add(run):
+            for name, amount in changes:
+                setattr(run.s, name, getattr(run.s, name) + amount)
+        return run_add
+
+    def _action_score(self, action, where):
+        # Gains other than whole and half multiples round to the nearest half point.
+        changes = [
+            (self._character(name, where), amount * HALF_POINTS) for name, amount in action['score'].items()
+        ]
+
+        def run_score(run):
+            scores = run.s.scores
+            for index, amount in changes:
+                score = scores[index]
+                scores[index] = (0 if score is None else score) + round(amount * run.t.gain)
+        return run_score
+
+    def _action_set_score(self, action, where):
+        changes = [(name, round(value * HALF_POINTS)) for name, value in action['set_score'].items()]
+        if action.get('fill'):
+            changes = [(self._template(name, where), value) for name, value in changes]
+            characters = self.characters
+
+            def run_set_score(run):
+                scores = run.s.scores
+                for name, value in changes:
+                    scores[characters[name.fill(run.s)]] = value
+            return run_set_score
+        changes = [(self._character(name, where), value) for name, value in changes]
+
+        def run_set_score(run):
+            scores = run.s.scores
+            for index, value in changes:
+                scores[index] = value
+        return run_set_score
+
+    def _action_give(self, action, where):
+        item = self._item(action['give'], where)
+        clue = self._clue(action['clue'], where) if 'clue' in action else 0
+
+        def give(run):
+            s = run.s
+            if not s.inventory & item:
+                s.inventory |= item
+                s.clues_collected |= clue
+        return give
+
+    def _action_note(self, action, where):
+        clue = self._clue(action['note'], where)
+
+        def note(run):
+            run.s.clues_collected |= clue
+        return note
+
+    def _action_drop(self, action, where):
+        item = self._item(action['drop'], where)
+
+        def drop(run):
+            run.s.inventory &= ~item
+        return drop
+
+    def _action_let(self, action, where):
+        values = [(name, self.value(value, f'{where}.let.{name}')) for name, value in action['let'].items()]
+
+        def let(run):
+            for name, value in values:
+                run.values[name] = value(run)
+        return let
+
+    def _action_inc(self, action, where):
+        values = [(name, self.value(value, f'{where}.inc.{name}')) for name, value in action['inc'].items()]
+
+        def inc(run):
+            for name, value in values:
+                run.values[name] += value(run)
+        return inc
+
+    def _action_set_choice(self, action, where):
+        choice = action['set_choice']
+
+        def set_choice(run):
+            run.choice = choice
+        return set_choice
+
+    def _action_end(self, action, where):
+        ending = action['end']
+        if ending not in self.endings:
+            self.fail(where, f'unknown ending {ending!r}')
+        if 'score' in action:
+            score = self.value(action['score'], f'{where}.score')
+            return lambda run: run.t.end(ending, score(run))
+        return lambda run: run.t.end(ending)
+
+    def _action_restart(self, action, where):
+        return lambda run: run.t.restart()
+
+    def _action_include(self, action, where):
+        name = action['include']
+        if name not in self.blocks:
+            self.fail(where, f'unknown block {name!r}')
+        if name in self._including:
+            self.fail(where, f'block {name!r} includes itself')
+        self._including.append(name)
+        try:
+            return self.actions(self.blocks[name], f'blocks.{name}')
+        finally:
+            self._including.pop()
+
+    # --- Values and Conditions ---
+    def value(self, expr, where):
+        if isinstance(expr, (bool, int, float)) or expr is None:
+            return lambda run: expr
+        if isinstance(expr, str):
+            return self._name(expr, where)
+        if not isinstance(expr, dict) or len(expr) != 1:
+            self.fail(where, f'expected a name, a literal or a one-key object, got {expr!r}')
+        (op, arg), = expr.items()
+        compile_value = getattr(self, f'_value_{op}', None)
+        if compile_value is None:
+            self.fail(where, f'unknown condition {op!r}')
+        return compile_value(arg, f'{where}.{op}')
+
+    def _values(self, args, where):
+        if not isinstance(args, list):
+            self.fail(where, 'expected a list')
+        return [self.value(arg, f'{where}[{index}]') for index, arg in enumerate(args)]
+
+    def _name(self, name, where):
+        if name in self.locals:
+            return lambda run: run.values[name]
+        if self._in_case and name in ('threshold', 'gain'):
+            self.fail(where, f'{name!r} depends on the difficulty and cannot be used in the case table')
+        if name == 'threshold':
+            return lambda run: run.t.threshold
+        if name == 'gain':
+            return lambda run: run.t.gain
+        name = self._field(name, where)
+        return lambda run: getattr(run.s, name)
+
+    def _value_has(self, item, where):
+        item = self._item(item, where)
+        return lambda run: run.s.inventory & item != 0
+
+    def _value_knows(self, clue, where):
+        clue = self._clue(clue, where)
+        return lambda run: run.s.clues_collected & clue != 0
+
+    def _value_holding(self, arg, where):
+        if not isinstance(arg, dict) or not arg.keys() <= {'items', 'clues'}:
+            self.fail(where, 'expected {"items": [...], "clues": [...]}')
+        items = self._mask(arg.get('items', ()), self._item, where)
+        clues = self._mask(arg.get('clues', ()), self._clue, where)
+        return lambda run: _tally(run.s, items, clues)
+
+    def _value_case(self, name, where):
+        for tally, items, clues in self.case.tallies:
+            if tally == name:
+                return lambda run: _tally(run.s, items, clues)
+        for witness, index, item in self.case.witnesses:
+            if witness == name:
+                return lambda run: _supports(run.s, index, item)
+        if name == 'points' and self.case.points:
+            points = self.case.points
+            return lambda run: sum(1 for point in points if point(run))
+        self.fail(where, f'the case table has no tally or witness {name!r}')
+
+    def _value_is(self, args, where):
+        if not isinstance(args, list) or len(args) != 2:
+            self.fail(where, 'expected [name, literal]')
+        value = self._name(args[0], where)
+        literal = args[1]
+        return lambda run: value(run) == literal
+
+    def _value_not(self, arg, where):
+        value = self.value(arg, where)
+        return lambda run: not value(run)
+
+    def _value_all(self, args, where):
+        values = self._values(args, where)
+        return lambda run: all(value(run) for value in values)
+
+    def _value_any(self, args, where):
+        values = self._values(args, where)
+        return lambda run: any(value(run) for value in values)
+
+    def _value_ge(self, args, where):
+        left, right = self._pair(args, where)
+        return lambda run: left(run) >= right(run)
+
+    def _value_gt(self, args, where):
+        left, right = self._pair(args, where)
+        return lambda run: left(run) > right(run)
+
+    def _value_mul(self, args, where):
+        left, right = self._pair(args, where)
+        return lambda run: left(run) * right(run)
+
+    def _value_count(self, args, where):
+        values = self._values(args, where)
+        return lambda run: sum(1 for value in values if value(run))
+
+    def _value_score(self, name, where):
+        index = self._character(name, where)
+
+        def score(run):
+            value = run.s.scores[index]
+            return 0 if value is None else points(value)
+        return score
+
+    def _value_choice_in(self, choices, where):
+        choices = frozenset(choices)
+        return lambda run: run.choice in choices
+
+    def _pair(self, args, where):
+        values = self._values(args, where)
+        if len(values) != 2:
+            self.fail(where, 'expected two values')
+        return values
+
+    # --- Names ---
+    def _field(self, name, where):
+        if self.fields and name not in self.fields:
+            self.fail(where, f'unknown state field {name!r}')
+        return name
+
+    def _character(self, name, where):
+        """The position of a character in the scores tuple."""
+        if name not in self.characters:
+            self.fail(where, f'unknown character {name!r}')
+        return self.characters[name]
+
+    @staticmethod
+    def _mask(ids, bit, where):
+        mask = 0
+        for entry in ids:
+            mask |= bit(entry, where)
+        return mask
+
+    def _item(self, item, where):
+        """The bit of an item id."""
+        if item not in self.items:
+            self.fail(where, f'unknown item {item!r}')
+        return self.items.bit(item)
+
+    def _clue(self, clue, where):
+        """The bit of a clue id."""
+        if clue not in self.clues:
+            self.fail(where, f'unknown clue {clue!r}')
+        return self.clues.bit(clue)
+
+    def _check_template(self, text, where):
+        for _, field, _, _ in string.Formatter().parse(text):
+            if field is not None and field not in _COMPUTED_FIELDS:
+                self._field(field, where)
@@ -0,0 +1,186 @@
+"""Play the story in a terminal, without Streamlit.
+
+Prints each scene's text and the buttons the page would show for the same
+state, and reads a choice per line: its number, its choice id, or a typed
+command as on the page (see ``intents.py``). ``status`` prints the sidebar
+panel and ``quit`` stops:
+
+    cd streamlit_chatbot
+    python -m fashion_fatal --difficulty Hard
+    python -m fashion_fatal --script runs.txt --quiet
+
+A script file holds one choice per line and blank lines between runs; ``#``
+starts a comment. Every run is a new game with its own dice, seeded from
+``--seed`` and the run number, so a script plays the same way every time.
+A line that is not a choice on screen, or lines left after the game ended,
+fail the run, and the command exits with status 1 if any run failed.
+
+Only the engine is imported, so the command starts in a few tens of
+milliseconds; the matcher for typed commands is built the first time one is
+needed.
+"""
+
+import argparse
+import functools
+import random
+import sys
+import time
+
+from . import engine, render
+from .journal import Journal
+
+QUIT = ('quit', 'exit', 'q')
+STATUS = 'status'
+
+
+@functools.cache
+def _intent_index():
+    from . import intents # Only when a command is typed out
+    return intents.load_index()
+
+
+def pick(text, choices):
+    """The choice in ``choices`` that ``text`` names, by number, choice id or typed command; or None."""
+    text = text.strip()
+    if text.isdigit():
+        number = int(text)
+        return choices[number - 1] if 1 <= number <= len(choices) else None
+    for choice in choices:
+        if text == choice.choice or (choice == engine.RESTART and text.lower() == 'restart'):
+            return choice
+    found = _intent_index().match(text, choices)
+    return None if found is None else found.choice
+
+
+def game_seed(seed, run):
+    # String seeds are hashed with SHA-512, so they are stable across processes.
+    return random.Random(f'{seed}:{run}').getrandbits(64)
+
+
+def start(difficulty, seed):
+    """A Journal on the first scene, with ``difficulty`` picked as on the arrival page."""
+    journal = Journal(seed=seed)
+    result = journal.apply('0', engine.STORY.start, None)
+    journal.amend(difficulty=difficulty)
+    return journal, result
+
+
+def show(result, scene, out):
+    out.write(f'\n== {engine.TITLES.get(scene, engine.DEFAULT_TITLE)}\n\n')
+    out.write(render.narrative(result.blocks).markdown + '\n\n')
+    for number, choice in enumerate(result.choices, 1):
+        out.write(f'  {number}. {choice.label}\n')
+
+
+def _over(result):
+    return not result.choices or result.choices == (engine.RESTART,)
+
+
+# --- Scripts ---
+def read_runs(lines):
+    """Runs of (line number, choice text) from script lines; blank lines separate runs."""
+    runs = []
+    current = []
+    for number, line in enumerate(lines, 1):
+        text = line.split('#', 1)[0].strip()
+        if text:
+            current.append((number, text))
+        elif not line.strip() and current:
+            runs.append(current)
+            current = []
+    if current:
+        runs.append(current)
+    return runs
+
+
+def play_script(run, difficulty, seed, out=None):
+    """Play one run of script lines; returns (ending, steps, error or None)."""
+    journal, result = start(difficulty, seed)
+    scene = engine.STORY.start
+    if out:
+        show(result, scene, out)
+    for position, (number, text) in enumerate(run):
+        if _over(result):
+            return result.ending, position, f'line {number}: the game is over, {len(run) - position} lines left'
+        picked = pick(text, result.choices)
+        if picked is None:
+            return result.ending, position, f'line {number}: {text!r} is not a choice in {scene}'
+        if out:
+            out.write(f'> {picked.label}\n')
+        scene = picked.scene
+        result = journal.apply(journal.next_step(), picked.scene, picked.choice)
+        if out:
+            show(result, scene, out)
+    return result.ending, len(run), None
+
+
+def run_scripts(runs, difficulty, seed, out, quiet):
+    failed = 0
+    endings = {}
+    started = time.perf_counter()
+    for index, run in enumerate(runs):
+        ending, steps, error = play_script(run, difficulty, game_seed(seed, index), None if quiet else out)
+        failed += error is not None
+        endings[ending] = endings.get(ending, 0) + 1
+        outcome = error or f'{ending or "no ending"} after {steps} choices'
+        out.write(f'run {index + 1}: {outcome}\n')
+    seconds = time.perf_counter() - started
+    summary = ', '.join(f'{ending or "no ending"} {count}' for ending, count in endings.items())
+    out.write(f'{len(runs)} runs in {seconds:.2f}s ({len(runs) / seconds:,.0f}/s): {summary}; {failed} failed\n')
+    return failed
+
+
+# --- Interactive ---
+def play(difficulty, seed, lines, out):
+    """Read choices from ``lines`` (stdin) until the input ends or the player quits."""
+    games = 0
+    journal, result = start(difficulty, game_seed(seed, games))
+    scene = engine.STORY.start
+    show(result, scene, out)
+    prompt = lines.isatty()
+    while True:
+        if prompt:
+            out.write('> ')
+            out.flush()
+        line = lines.readline()
+        if not line or line.strip().lower() in QUIT:
+            return
+        if line.strip().lower() == STATUS:
+            from . import status # The sidebar panel, only when asked for
+            panel = status.panel(status.digest(journal.state))
+            out.write(f'{panel.markdown}\n{panel.progress}% Complete\n')
+            continue
+        picked = pick(line, result.choices)
+        if picked is None:
+            out.write('Not one of the choices; type its number, or what you do.\n')
+            continue
+        if picked == engine.RESTART:
+            games += 1
+            journal, result = start(difficulty, game_seed(seed, games))
+            scene = engine.STORY.start
+        else:
+            scene = picked.scene
+            result = journal.apply(journal.next_step(), picked.scene, picked.choice)
+        show(result, scene, out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fashion_fatal', description='Play Fashion Fatal in a terminal.')
+    parser.add_argument('--difficulty', choices=list(engine.DIFFICULTIES), default='Normal')
+    parser.add_argument('--seed', default=None, help='dice seed (default: random)')
+    parser.add_argument('--script', type=argparse.FileType('r', encoding='utf-8'), help='file of scripted runs')
+    parser.add_argument('--quiet', action='store_true', help='with --script, print one line per run')
+    args = parser.parse_args(argv)
+    seed = random.getrandbits(64) if args.seed is None else args.seed
+    if args.script:
+        with args.script:
+            runs = read_runs(args.script)
+        raise SystemExit(1 if run_scripts(runs, args.difficulty, seed, sys.stdout, args.quiet) else 0)
+    try:
+        play(args.difficulty, seed, sys.stdin, sys.stdout)
+    except KeyboardInterrupt:
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""Bit-for-bit replay of recorded playthroughs.
+
+Every session owns its dice: step ``n`` of a journal rolls with
+``random.Random(f'{seed}:{n}')`` (see ``journal.py``), never with the shared
+``random`` module. So a playthrough is fully described by its starting save
+code (state and seed) and the list of (step, scene, choice) it took, and
+playing that list again against the same story must give the same states,
+endings and buttons at every step. Record a set of playthroughs once, then
+check them again after editing ``story.json`` or the engine:
+
+    cd streamlit_chatbot
+    python -m fashion_fatal.verify record --games 5000 --out plays.jsonl
+    python -m fashion_fatal.verify check plays.jsonl
+
+Each recorded step keeps a short fingerprint of its outcome: the state after
+it, the ending and the buttons on offer. Items and clues are fingerprinted
+by id, so adding one does not disturb old recordings, and the story text is
+left out, so rewording a scene is not a divergence. ``check`` replays every
+playthrough on all cores and reports the first step that came out
+differently; ``Journal(state, seed)`` with the same steps reproduces it.
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import operator
+import pathlib
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import engine, simulate, snapshot
+from .journal import Journal
+from .snapshot import Snapshot
+
+CHUNK_SIZE = 500 # Playthroughs per task handed to a worker
+MAX_STEPS = 100 # Safety net for recording; a normal run takes about a dozen steps
+
+
+# --- Fingerprints ---
+_PLAIN_FIELDS = tuple(name for name in engine.FIELDS if name not in ('inventory', 'clues_collected'))
+_plain_values = operator.attrgetter(*_PLAIN_FIELDS)
+
+
+@functools.lru_cache(maxsize=65536)
+def _ids(registry, mask):
+    return tuple(registry.ids_in(mask))
+
+
+def fingerprint(state, ending=None, choices=()):
+    """A short hash of what a step led to, stable across processes."""
+    outcome = (
+        _plain_values(state),
+        _ids(engine.ITEMS, state.inventory),
+        _ids(engine.CLUES, state.clues_collected),
+        ending,
+        tuple((choice.scene, choice.choice) for choice in choices),
+    )
+    return hashlib.blake2b(repr(outcome).encode(), digest_size=8).hexdigest()
+
+
+def replay_steps(state, seed, steps):
+    """Play (step, scene, choice) ``steps`` from ``state``; one fingerprint per step.
+
+    A step with scene None is a settings change, as recorded by
+    ``Journal.amend``.
+    """
+    journal = Journal(state, seed)
+    prints = []
+    for step, scene, choice in steps:
+        if scene is None:
+            prints.append(fingerprint(journal.amend(**dict(choice))))
+        else:
+            result = journal.apply(step, scene, choice)
+            prints.append(fingerprint(result.state, result.ending, result.choices))
+    return prints
+
+
+# --- Recording ---
+def record(journal):
+    """A JSON-ready playthrough of ``journal``: its start and its fingerprinted steps."""
+    steps = [(event.step, event.scene, event.choice) for event in journal.events]
+    prints = replay_steps(journal.start, journal.seed, steps)
+    return {
+        'start': snapshot.to_text(Snapshot(journal.start, engine.STORY.start, None, '0', journal.seed)),
+        'steps': [[*step, mark] for step, mark in zip(steps, prints)],
+    }
+
+
+def play_game(index, policy, seed):
+    """Play game ``index`` the way the page does; returns its Journal."""
+    rng = random.Random(f'{seed}:{index}')
+    journal = Journal(seed=rng.getrandbits(64))
+    result = journal.apply('0', engine.STORY.start, None)
+    # Pick the difficulty on the arrival page, like a player would.
+    journal.amend(difficulty=tuple(engine.DIFFICULTIES)[index % len(engine.DIFFICULTIES)])
+    for _ in range(MAX_STEPS):
+        if not result.choices or result.choices == (engine.RESTART,):
+            break
+        picked = rng.choices(result.choices, policy(journal.state, result.choices))[0]
+        result = journal.apply(journal.next_step(), picked.scene, picked.choice)
+    return journal
+
+
+# --- Checking ---
+def _load_steps(steps):
+    # JSON turns the (field, value) pairs of a settings change into lists.
+    return [
+        (step, scene, choice if scene is not None else tuple(map(tuple, choice))) for step, scene, choice, _ in steps
+    ]
+
+
+def _check_chunk(task):
+    start, playthroughs = task
+    divergences = []
+    steps_played = 0
+    for offset, playthrough in enumerate(playthroughs):
+        saved = snapshot.from_text(playthrough['start'])
+        steps = _load_steps(playthrough['steps'])
+        prints = replay_steps(saved.state, saved.seed, steps)
+        steps_played += len(steps)
+        for position, (recorded, mark) in enumerate(zip(playthrough['steps'], prints)):
+            if recorded[3] != mark:
+                step, scene, choice = steps[position]
+                divergences.append((start + offset, position, step, scene, choice))
+                break
+    return divergences, steps_played
+
+
+def check(playthroughs, workers=None):
+    """Replay ``playthroughs``; returns (divergences, steps played).
+
+    A divergence is (playthrough index, position, step, scene, choice) of the
+    first step whose outcome differs from the recording.
+    """
+    tasks = [(start, playthroughs[start:start + CHUNK_SIZE]) for start in range(0, len(playthroughs), CHUNK_SIZE)]
+    if workers == 1 or len(tasks) <= 1:
+        results = list(map(_check_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_check_chunk, tasks))
+    divergences = [divergence for found, _ in results for divergence in found]
+    return divergences, sum(played for _, played in results)
+
+
+def format_report(playthroughs, divergences, steps, seconds, limit=20):
+    lines = [f'{playthroughs:,} playthroughs, {steps:,} steps replayed in {seconds:.2f} s']
+    if not divergences:
+        lines.append('all identical to the recording')
+        return '\n'.join(lines)
+    lines.append(f'{len(divergences):,} diverged; first differing step of each:')
+    for index, position, step, scene, choice in divergences[:limit]:
+        lines.append(f'  #{index}: step {step} (event {position}) {scene} / {choice}')
+    if len(divergences) > limit:
+        lines.append(f'  ... and {len(divergences) - limit:,} more')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Record playthroughs and check that they replay identically.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    recorder = commands.add_parser('record', help='play games and write them as JSON lines')
+    recorder.add_argument('--games', type=int, default=1000)
+    recorder.add_argument('--policy', choices=sorted(simulate.POLICIES), default='uniform')
+    recorder.add_argument('--seed', default='0')
+    recorder.add_argument('--out', type=pathlib.Path, required=True)
+    checker = commands.add_parser('check', help='replay recorded games and report divergences')
+    checker.add_argument('path', type=pathlib.Path)
+    checker.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        policy = simulate.POLICIES[args.policy]
+        with args.out.open('w', encoding='utf-8') as out:
+            for index in range(args.games):
+                out.write(json.dumps(record(play_game(index, policy, args.seed)), separators=(',', ':')) + '\n')
+        print(f'recorded {args.games:,} playthroughs to {args.out}')
+        return
+
+    with args.path.open(encoding='utf-8') as lines:
+        playthroughs = [json.loads(line) for line in lines if line.strip()]
+    started = time.perf_counter()
+    divergences, steps = check(playthroughs, args.workers)
+    print(format_report(len(playthroughs), divergences, steps, time.perf_counter() - started))
+    raise SystemExit(1 if divergences else 0)
+
+
+if __name__ == '__main__':
+    main()
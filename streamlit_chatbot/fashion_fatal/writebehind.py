@@ -0,0 +1,96 @@
+"""The background writer shared by the write-behind stores.
+
+``SessionStore``, ``Leaderboard`` and ``EventLog`` take writes on the page's
+thread without touching the disk and leave the writing to one daemon thread
+each. The thread wakes every ``flush_interval`` seconds, or as soon as
+``wake`` is called because a batch is full, and runs ``flush``. A subclass
+says how to take the waiting batch, write it and put it back:
+
+    class Store(WriteBehind):
+        write_errors = (sqlite3.Error,)
+
+        def _take(self): ... # the waiting batch, emptied under the subclass's own lock
+        def _write(self, batch): ... # leaves the files as they were if it raises
+        def _requeue(self, batch): ... # puts a failed batch back, older than anything newer
+        def _release(self): ... # closes files, after the last flush
+
+A write that raises one of ``write_errors`` (a locked database, a full disk)
+is logged and its batch goes back in the queue; the thread keeps running and
+the next flush tries again. ``close``, also run at exit, stops the thread,
+flushes once more and releases the files.
+"""
+
+import atexit
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+
+class WriteBehind:
+    """Base class of a store written in batches by a background thread."""
+
+    write_errors = () # Exceptions a write may fail with and be retried after
+
+    def _start_writer(self, name, flush_interval):
+        self.flush_interval = flush_interval
+        self.flushes = 0 # Batches written, for benchmarks
+        self.failures = 0 # Batches that failed and were queued again
+        self._write_lock = threading.Lock() # One flush at a time
+        self._wake = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name=name, daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def wake(self):
+        """Flush now instead of at the end of the interval."""
+        self._wake.set()
+
+    def flush(self):
+        """Write everything waiting now. Returns False if the write failed and was queued again."""
+        with self._write_lock:
+            batch = self._take()
+            if not batch:
+                return True
+            try:
+                self._write(batch)
+            except self.write_errors:
+                log.exception('%s could not write %d entries; they stay queued', type(self).__name__, len(batch))
+                self._requeue(batch)
+                self.failures += 1
+                return False
+            self.flushes += 1
+            return True
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+        self.flush()
+        with self._write_lock:
+            self._release()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # A bug, not a bad disk; keep the thread up so later writes are not stranded.
+                log.exception('%s writer failed', type(self).__name__)
+
+    def _take(self):
+        raise NotImplementedError
+
+    def _write(self, batch):
+        raise NotImplementedError
+
+    def _requeue(self, batch):
+        raise NotImplementedError
+
+    def _release(self):
+        pass
@@ -0,0 +1,43 @@
+"""Segments left open by a crashed process are sealed without their torn batch."""
+
+import gzip
+import json
+import os
+import subprocess
+import sys
+
+from fashion_fatal import analytics
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def _member(*events):
+    return gzip.compress(''.join(json.dumps(event) + '\n' for event in events).encode())
+
+
+def test_seal_abandoned_drops_a_truncated_batch(tmp_path):
+    torn = _member({'n': 3})
+    path = tmp_path / f'events-20260101-000000-{_dead_pid()}-00001{analytics.OPEN_SUFFIX}'
+    path.write_bytes(_member({'n': 1}) + _member({'n': 2}) + torn[:len(torn) // 2])
+
+    assert analytics.seal_abandoned(tmp_path) == [tmp_path / path.name[:-len('.open')]]
+    assert not path.exists()
+    with gzip.open(tmp_path / path.name[:-len('.open')], 'rt') as f:
+        assert [json.loads(line) for line in f] == [{'n': 1}, {'n': 2}]
+
+
+def test_seal_abandoned_leaves_a_live_segment_open(tmp_path):
+    path = tmp_path / f'events-20260101-000000-{os.getpid()}-00001{analytics.OPEN_SUFFIX}'
+    path.write_bytes(_member({'n': 1}))
+    assert analytics.seal_abandoned(tmp_path) == []
+    assert path.exists()
+
+
+def test_stale_segment_is_sealed_whatever_its_pid(tmp_path):
+    path = tmp_path / f'events-20260101-000000-{os.getpid()}-00001{analytics.OPEN_SUFFIX}'
+    path.write_bytes(_member({'n': 1}))
+    assert analytics.seal_abandoned(tmp_path, max_age=0) == [tmp_path / path.name[:-len('.open')]]
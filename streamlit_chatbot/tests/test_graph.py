@@ -0,0 +1,31 @@
+"""The scene graph knows which scene tests which item, clue and name."""
+
+from fashion_fatal import graph
+
+
+def _story(**case):
+    return {
+        'start': 'hall',
+        'case': case,
+        'scenes': {
+            'hall': {'do': [
+                {'if': {'all': [{'has': 'key'}, 'romance']}, 'then': [{'write': 'x'}]},
+                {'button': 'On', 'to': 'study', 'if': {'is': ['fashion_score', 'High']}},
+                {'restart': True},
+            ]},
+            'study': {'do': [
+                {'let': {'evidence': {'case': 'evidence'}, 'witness': {'case': 'Blake'}}},
+                {'end': 'won', 'score': {'holding': {'clues': ['ink']}}},
+            ]},
+        },
+    }
+
+
+def test_reads_are_noted_per_scene():
+    found = graph.extract(_story(
+        tallies={'evidence': {'items': ['letter'], 'clues': ['stain']}},
+        witnesses={'Blake': 'confession'},
+    ))
+    assert found.reads['hall'] == {'items': ['key'], 'clues': [], 'names': ['fashion_score', 'romance']}
+    assert found.reads['study'] == {'items': ['confession', 'letter'], 'clues': ['ink', 'stain'], 'names': []}
+
@@ -0,0 +1,19 @@
+"""Typed commands pick the button they name, and nothing when in doubt."""
+
+import json
+
+from fashion_fatal import graph, intents, story
+
+
+def test_self_check_finds_nothing():
+    scene_graph = graph.extract(json.loads(story.STORY_PATH.read_text(encoding='utf-8')))
+    assert intents.self_check(intents.load_index(), scene_graph) == []
+
+
+def test_a_button_word_keeps_its_own_meaning():
+    index = intents.load_index()
+    counts, named = index.terms('decline the invitation')
+    assert counts == {'decline': 1, 'invitation': 1}
+    assert named == {'invitation'}
+    counts, named = index.terms('chat with Maya')
+    assert counts == {'talk': 1, 'maya': 1}
@@ -0,0 +1,16 @@
+"""A resumed journal redraws the saved step with the same dice, and says which step that is."""
+
+from fashion_fatal.journal import Journal, resume
+
+
+def test_resume_redraws_the_saved_step():
+    journal = Journal(seed=11)
+    first = journal.apply('1', 'arrival', None)
+    picked = first.choices[1]
+    played = journal.apply(journal.next_step(), picked.scene, picked.choice)
+
+    saved = journal.save()
+    again = resume(saved)
+    assert again.resumed_at == (saved.step, saved.scene, saved.choice) == ('2', picked.scene, picked.choice)
+    assert again.apply(saved.step, saved.scene, saved.choice) == played
+    assert journal.resumed_at is None
@@ -0,0 +1,56 @@
+"""The sampled golden transcripts still come out the same.
+
+Each sample is replayed from its save code, in chunks spread over worker
+processes, so this takes seconds. The full walk of every button in every
+reachable state takes minutes; set FASHION_FATAL_FULL_PATHS=1 to run it too,
+or run ``python -m fashion_fatal.paths check``.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from fashion_fatal import engine, paths
+
+
+@pytest.fixture(scope='module')
+def golden():
+    return {summary.difficulty: summary for summary in paths.load_golden()}
+
+
+@pytest.fixture(scope='module')
+def pool():
+    workers = os.cpu_count() or 1
+    if workers == 1:
+        yield None
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield pool
+
+
+@pytest.mark.parametrize('difficulty', list(engine.DIFFICULTIES))
+def test_sampled_transcripts_replay(golden, pool, difficulty):
+    summary = golden[difficulty]
+    assert summary.samples
+    changes = paths.check_samples(summary.samples, pool)
+    assert not changes, '\n\n'.join(f'{button}:\n{diff}' for _, button, _, diff in changes)
+
+
+def test_every_button_is_sampled(golden):
+    for summary in golden.values():
+        assert {sample.button for sample in summary.samples} == summary.digests.keys()
+
+
+def test_golden_round_trip(golden, tmp_path):
+    path = tmp_path / 'golden.txt'
+    paths.save_golden(golden.values(), path)
+    again = paths.load_golden(path)
+    assert [summary.digests for summary in again] == [summary.digests for summary in golden.values()]
+    assert [summary.samples for summary in again] == [summary.samples for summary in golden.values()]
+
+
+@pytest.mark.skipif(not os.environ.get('FASHION_FATAL_FULL_PATHS'), reason='walks 1.7M steps; set FASHION_FATAL_FULL_PATHS=1')
+def test_full_walk():
+    _, changes = paths.check()
+    assert not changes, '\n'.join(f'{difficulty} {button}: {what}' for difficulty, button, what, _ in changes)
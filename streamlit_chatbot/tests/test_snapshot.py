@@ -0,0 +1,61 @@
+"""Save codes round-trip, and codes handed out by older releases still load."""
+
+import pytest
+
+from fashion_fatal import engine, snapshot
+from fashion_fatal.snapshot import Snapshot, SnapshotError
+
+# A version 1 code; it must decode to the same snapshot for as long as version 1 is supported.
+VERSION_1_CODE = 'RkYBAQkIBBRnZW5lcmFsX3NlYXJjaF9zdHVkeQICSwYCjCGMwQEBBgEAAgADCAQABQAGBAA'
+
+
+def _sample():
+    state = engine.GameState(
+        inventory=engine.ITEMS.mask(['suspicious_photo', 'tarnished_key']),
+        clues_collected=engine.CLUES.mask(['examined_bracelet']),
+        romance='Maya',
+        scores=(2, 0, -1, 0, 3, None),
+        interlude_response_message='Thanks, see you at the ball!',
+        player_observant=3,
+        difficulty='Easy',
+    )
+    return Snapshot(state, 'hidden_study', 'general_search_study', '12', 2**64 - 1)
+
+
+def test_round_trip():
+    saved = _sample()
+    assert snapshot.decode(snapshot.encode(saved)) == saved
+    assert snapshot.from_text(snapshot.to_text(saved)) == saved
+
+
+def test_version_1_code_still_loads():
+    loaded = snapshot.from_text(VERSION_1_CODE)
+    assert loaded.scene == 'hidden_study'
+    assert loaded.choice == 'general_search_study'
+    assert loaded.step == '9'
+    assert loaded.seed == 1
+    state = loaded.state
+    assert list(engine.ITEMS.ids_in(state.inventory)) == [
+        'suspicious_photo', 'broken_bracelet', 'tarnished_key', 'locket_fragment']
+    assert list(engine.CLUES.ids_in(state.clues_collected)) == [
+        'suspicious_photo', 'broken_bracelet', 'tarnished_key', 'examined_bracelet', 'mv_initials']
+    assert state.romance == 'Alex'
+    assert state.scores == (0, 0, 2, 0, 0, 1)
+    assert (state.fashion_score, state.story_progress, state.difficulty) == ('High', 75, 'Hard')
+    assert (state.player_observant, state.social_grace) == (3, 1)
+    assert snapshot.from_text(snapshot.to_text(loaded)) == loaded
+
+
+@pytest.mark.parametrize('data, message', [
+    (b'XX\x01', 'not a Fashion Fatal save code'),
+    (b'FF\x01\x01', 'cut short'),
+    (b'FF\x7f', 'version'),
+])
+def test_bad_codes_are_refused(data, message):
+    with pytest.raises(SnapshotError, match=message):
+        snapshot.decode(data)
+
+
+def test_trailing_bytes_are_refused():
+    with pytest.raises(SnapshotError, match='trailing'):
+        snapshot.decode(snapshot.encode(_sample()) + b'\x00')
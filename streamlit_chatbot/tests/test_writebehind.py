@@ -0,0 +1,74 @@
+"""WriteBehind writes batches in order and keeps a failed batch for the next flush."""
+
+import threading
+
+from fashion_fatal.writebehind import WriteBehind
+
+
+class ListStore(WriteBehind):
+    """Writes to a list; ``broken`` makes the next write fail."""
+
+    write_errors = (OSError,)
+
+    def __init__(self):
+        self.written = []
+        self.broken = False
+        self._pending = []
+        self._lock = threading.Lock()
+        self._start_writer('test-writer', flush_interval=3600) # Only explicit flushes
+
+    def add(self, entry):
+        with self._lock:
+            self._pending.append(entry)
+
+    def _take(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        return batch
+
+    def _write(self, batch):
+        if self.broken:
+            raise OSError('disk full')
+        self.written.extend(batch)
+
+    def _requeue(self, batch):
+        with self._lock:
+            self._pending[:0] = batch
+
+
+def test_flush_writes_the_waiting_batch():
+    store = ListStore()
+    try:
+        store.add(1)
+        store.add(2)
+        assert store.flush()
+        assert store.written == [1, 2]
+        assert store.flushes == 1
+        assert store.flush() # Nothing waiting is not a failure
+        assert store.flushes == 1
+    finally:
+        store.close()
+
+
+def test_failed_write_is_requeued_ahead_of_newer_entries():
+    store = ListStore()
+    try:
+        store.add(1)
+        store.broken = True
+        assert not store.flush()
+        assert store.failures == 1
+        assert store.written == []
+        store.add(2)
+        store.broken = False
+        assert store.flush()
+        assert store.written == [1, 2]
+    finally:
+        store.close()
+
+
+def test_close_flushes_what_is_left():
+    store = ListStore()
+    store.add('last')
+    store.close()
+    assert store.written == ['last']
+    store.close() # A second close, as at exit, does nothing